@@ -0,0 +1,400 @@
+"""
+Local stand-in for the Telegram Bot API, for load tests that must not touch Telegram.
+
+Serves /bot<token>/<method> like api.telegram.org for the methods the bot relies on:
+sendMessage, sendSticker, editMessageText, editMessageReplyMarkup, deleteMessage,
+answerCallbackQuery, getMe, getUpdates, setWebhook and deleteWebhook. Failures are
+injected on demand: a fixed latency with jitter, 429 with retry_after (randomly or above
+a global messages per second limit) and 403 for blocked users.
+
+Updates posted to /fake/updates are handed to long polling, or to the registered webhook
+with its secret token. Counters of calls and injected errors are served on /fake/stats.
+
+Point the bot at it with BOT_API_SERVER=http://localhost:8081.
+
+Usage:
+    python -m benchmarks.fake_telegram serve --port 8081 --latency-ms 30 --flood-rate 0.01 --blocked-ratio 0.05
+    python -m benchmarks.fake_telegram broadcast --recipients 2000 --rate-limit 30 --broadcast-rate 25
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import ClientSession, web
+
+from tgbot.services import broadcaster
+
+# Methods delivering a message to a chat, they are subject to the flood limit and to blocked users
+SENDING_METHODS = {"sendMessage", "sendSticker"}
+
+
+class TelegramError(Exception):
+    def __init__(self, code: int, description: str, retry_after: Optional[int] = None) -> None:
+        self.code = code
+        self.description = description
+        self.retry_after = retry_after
+
+
+@dataclass
+class Faults:
+    """
+    Failures injected into the answers.
+
+    Attributes:
+        latency: Delay before every answer, seconds.
+        jitter: Random extra delay up to this many seconds.
+        flood_rate: Share of sending calls answered with 429.
+        rate_limit: Sending calls per second above which the server answers 429, 0 - no limit.
+        retry_after: retry_after of the 429 answers, seconds.
+        blocked_ratio: Share of chats which blocked the bot, the same chats on every call.
+        blocked: Chats which blocked the bot.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    flood_rate: float = 0.0
+    rate_limit: float = 0.0
+    retry_after: int = 1
+    blocked_ratio: float = 0.0
+    blocked: set[int] = field(default_factory=set)
+
+    def is_blocked(self, chat_id: int) -> bool:
+        if chat_id in self.blocked:
+            return True
+        return self.blocked_ratio > 0 and random.Random(chat_id).random() < self.blocked_ratio
+
+
+class FakeTelegram:
+    """
+    Bot API stand-in keeping its state in memory: counters, pending updates and the webhook.
+    """
+
+    def __init__(self, faults: Faults = None) -> None:
+        self.faults = faults or Faults()
+        self.calls = Counter()
+        self.errors = Counter()
+
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._updates: deque[dict] = deque()
+        self._new_updates = asyncio.Condition()
+        self._sent: deque[float] = deque()
+        self._client: Optional[ClientSession] = None
+
+        self.methods = {
+            "getMe": self.get_me,
+            "sendMessage": self.send_message,
+            "sendSticker": self.send_sticker,
+            "editMessageText": self.edit_message_text,
+            "editMessageReplyMarkup": self.edit_message_reply_markup,
+            "deleteMessage": self.ok,
+            "answerCallbackQuery": self.ok,
+            "getUpdates": self.get_updates,
+            "setWebhook": self.set_webhook,
+            "deleteWebhook": self.delete_webhook,
+        }
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        app.router.add_get("/bot{token}/{method}", self.handle)
+        app.router.add_post("/fake/updates", self.push_updates)
+        app.router.add_get("/fake/stats", self.stats)
+        app.on_cleanup.append(self._close_client)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+
+        if self.faults.latency or self.faults.jitter:
+            await asyncio.sleep(self.faults.latency + random.uniform(0, self.faults.jitter))
+
+        try:
+            implementation = self.methods.get(method)
+            if implementation is None:
+                raise TelegramError(404, "Not Found: method not found")
+            if method in SENDING_METHODS:
+                self._check_limits(_chat_id(params))
+            result = await implementation(request.match_info["token"], params)
+        except TelegramError as e:
+            self.errors[e.code] += 1
+            body = {"ok": False, "error_code": e.code, "description": e.description}
+            if e.retry_after is not None:
+                body["parameters"] = {"retry_after": e.retry_after}
+            return web.json_response(body, status=e.code)
+
+        return web.json_response({"ok": True, "result": result})
+
+    def _check_limits(self, chat_id: int) -> None:
+        faults = self.faults
+        if faults.is_blocked(chat_id):
+            raise TelegramError(403, "Forbidden: bot was blocked by the user")
+
+        if faults.flood_rate and random.random() < faults.flood_rate:
+            raise TelegramError(
+                429, f"Too Many Requests: retry after {faults.retry_after}", faults.retry_after
+            )
+
+        if faults.rate_limit:
+            now = time.monotonic()
+            while self._sent and self._sent[0] <= now - 1:
+                self._sent.popleft()
+            if len(self._sent) >= faults.rate_limit:
+                raise TelegramError(
+                    429, f"Too Many Requests: retry after {faults.retry_after}", faults.retry_after
+                )
+            self._sent.append(now)
+
+    def _message(self, token: str, chat_id: int, message_id: int = None, **content: Any) -> dict:
+        return {
+            "message_id": message_id or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": _bot_user(token),
+            **content,
+        }
+
+    async def ok(self, token: str, params: dict) -> bool:
+        return True
+
+    async def get_me(self, token: str, params: dict) -> dict:
+        return _bot_user(token)
+
+    async def send_message(self, token: str, params: dict) -> dict:
+        text = params.get("text")
+        if not text:
+            raise TelegramError(400, "Bad Request: message text is empty")
+        return self._message(token, _chat_id(params), text=text)
+
+    async def send_sticker(self, token: str, params: dict) -> dict:
+        file_id = params.get("sticker")
+        if not file_id:
+            raise TelegramError(400, "Bad Request: there is no sticker in the request")
+        sticker = {
+            "file_id": file_id,
+            "file_unique_id": file_id[-16:],
+            "type": "regular",
+            "width": 512,
+            "height": 512,
+            "is_animated": False,
+            "is_video": False,
+        }
+        return self._message(token, _chat_id(params), sticker=sticker)
+
+    async def edit_message_text(self, token: str, params: dict) -> Any:
+        if params.get("inline_message_id"):
+            return True
+        text = params.get("text")
+        if not text:
+            raise TelegramError(400, "Bad Request: message text is empty")
+        return self._message(token, _chat_id(params), int(params["message_id"]), text=text)
+
+    async def edit_message_reply_markup(self, token: str, params: dict) -> Any:
+        if params.get("inline_message_id"):
+            return True
+        return self._message(token, _chat_id(params), int(params["message_id"]), text="")
+
+    async def get_updates(self, token: str, params: dict) -> list[dict]:
+        if self.webhook_url:
+            raise TelegramError(
+                409, "Conflict: can't use getUpdates method while webhook is active; use deleteWebhook to delete the webhook first"
+            )
+
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+
+        if not self._updates and timeout:
+            async with self._new_updates:
+                try:
+                    await asyncio.wait_for(self._new_updates.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+        return list(itertools.islice(self._updates, limit))
+
+    async def set_webhook(self, token: str, params: dict) -> bool:
+        self.webhook_url = params.get("url") or None
+        self.webhook_secret = params.get("secret_token") or None
+        return True
+
+    async def delete_webhook(self, token: str, params: dict) -> bool:
+        self.webhook_url = None
+        self.webhook_secret = None
+        if params.get("drop_pending_updates") in ("true", "True", True):
+            self._updates.clear()
+        return True
+
+    async def push_updates(self, request: web.Request) -> web.Response:
+        """
+        Accept an update or a list of updates, update_id is assigned when missing.
+        """
+        body = await request.json()
+        updates = body if isinstance(body, list) else [body]
+        for update in updates:
+            update.setdefault("update_id", next(self._update_ids))
+
+        if self.webhook_url:
+            statuses = await asyncio.gather(*(self._post_webhook(update) for update in updates))
+            return web.json_response({"delivered": sum(200 <= status < 300 for status in statuses)})
+
+        self._updates.extend(updates)
+        async with self._new_updates:
+            self._new_updates.notify_all()
+        return web.json_response({"queued": len(updates)})
+
+    async def _post_webhook(self, update: dict) -> int:
+        if self._client is None:
+            self._client = ClientSession()
+        headers = {}
+        if self.webhook_secret:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self.webhook_secret
+        try:
+            async with self._client.post(self.webhook_url, json=update, headers=headers) as response:
+                return response.status
+        except OSError:
+            return 0
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "calls": dict(self.calls),
+                "errors": {str(code): count for code, count in self.errors.items()},
+                "pending_updates": len(self._updates),
+                "webhook": self.webhook_url,
+            }
+        )
+
+    async def _close_client(self, app: web.Application) -> None:
+        if self._client is not None:
+            await self._client.close()
+
+
+def _chat_id(params: dict) -> int:
+    try:
+        return int(params["chat_id"])
+    except (KeyError, ValueError):
+        raise TelegramError(400, "Bad Request: chat not found")
+
+
+def _bot_user(token: str) -> dict:
+    bot_id = token.split(":", 1)[0]
+    return {
+        "id": int(bot_id) if bot_id.isdigit() else 1,
+        "is_bot": True,
+        "first_name": "Fake",
+        "username": "fake_bot",
+    }
+
+
+async def start(server: FakeTelegram, host: str, port: int) -> tuple[web.AppRunner, str]:
+    """
+    Serve the fake API, port 0 picks a free port.
+
+    :return: The runner to clean up and the base URL for BOT_API_SERVER.
+    """
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    bound_host, bound_port = runner.addresses[0][:2]
+    return runner, f"http://{bound_host}:{bound_port}"
+
+
+def faults_from_args(args: argparse.Namespace) -> Faults:
+    return Faults(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        flood_rate=args.flood_rate,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+        blocked_ratio=args.blocked_ratio,
+    )
+
+
+async def serve(args: argparse.Namespace) -> None:
+    runner, url = await start(FakeTelegram(faults_from_args(args)), args.host, args.port)
+    print(f"Fake Bot API on {url}, stats on {url}/fake/stats")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_broadcast(args: argparse.Namespace) -> None:
+    """
+    Broadcast through tgbot.services.broadcaster to the fake API and report the outcome.
+    """
+    server = FakeTelegram(faults_from_args(args))
+    runner, url = await start(server, "127.0.0.1", 0)
+    broadcaster.bucket = broadcaster.TokenBucket(rate=args.broadcast_rate)
+    bot = Bot(token="123456:benchmark", session=AiohttpSession(api=TelegramAPIServer.from_base(url)))
+
+    try:
+        started = time.monotonic()
+        result = await broadcaster.broadcast(
+            bot, range(1, args.recipients + 1), "Benchmark broadcast", concurrency=args.concurrency
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        await bot.session.close()
+        await runner.cleanup()
+
+    print(
+        f"{args.recipients} recipients in {elapsed:.1f}s ({args.recipients / elapsed:.1f}/sec): "
+        f"sent {len(result.sent)}, blocked {len(result.blocked)}, failed {len(result.failed)}"
+    )
+    print(f"API calls: {json.dumps(dict(server.calls))}, errors: {json.dumps(dict(server.errors))}")
+
+
+def main() -> None:
+    faults = argparse.ArgumentParser(add_help=False)
+    faults.add_argument("--latency-ms", type=float, default=0.0)
+    faults.add_argument("--jitter-ms", type=float, default=0.0)
+    faults.add_argument("--flood-rate", type=float, default=0.0, help="Share of sends answered with 429")
+    faults.add_argument("--rate-limit", type=float, default=0.0, help="Sends per second before 429, 0 - no limit")
+    faults.add_argument("--retry-after", type=int, default=1)
+    faults.add_argument("--blocked-ratio", type=float, default=0.0, help="Share of chats answering 403")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", parents=[faults], help="Run the fake API until interrupted")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8081)
+
+    broadcast_parser = commands.add_parser("broadcast", parents=[faults], help="Load test the broadcaster")
+    broadcast_parser.add_argument("--recipients", type=int, default=1000)
+    broadcast_parser.add_argument("--concurrency", type=int, default=broadcaster.BROADCAST_CONCURRENCY)
+    broadcast_parser.add_argument("--broadcast-rate", type=float, default=broadcaster.BROADCAST_RATE)
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args) if args.command == "serve" else run_broadcast(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
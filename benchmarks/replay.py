@@ -0,0 +1,456 @@
+"""
+Replay benchmark of the bot flows against a local SQLite stand-in of both databases.
+
+Synthetic (or recorded) updates are fed straight into a Dispatcher with routers_list and
+the global middlewares, exactly like in production. Both databases are SQLite files created
+from the same models and seeded with users, accruals, awards and shift schedules.
+Telegram API calls are answered by a fake session, so only the bot code and the database
+layer are measured. Queries are counted with the same profiler that enforces query budgets.
+
+Flows: start, profile, available awards, award purchase (select, confirm, comment)
+and admin search (menu, FIO message).
+
+Usage:
+    uv run --group dev python -m benchmarks.replay --users 1000 --sessions 500 --concurrency 8
+    uv run --group dev python -m benchmarks.replay --flows profile,award_purchase --strict-budgets
+    uv run --group dev python -m benchmarks.replay --replay updates.jsonl
+
+A replay file holds one update per line, either a raw Telegram update or
+{"flow": "<name>", "update": {...}}. Its user ids must be within the seeded --users range.
+"""
+
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+import typing
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Optional
+
+# Handlers read the configuration at import, the benchmark never connects to the configured databases
+for key, value in {
+    "BOT_TOKEN": "123456:benchmark",
+    "USE_REDIS": "False",
+    "DB_HOST": "localhost",
+    "DB_USER": "benchmark",
+    "DB_PASS": "benchmark",
+    "DB_MAIN_NAME": "STPMain",
+    "DB_ACHIEVER_NAME": "AchieverBot",
+    "WEBAPP_HOST": "localhost",
+    "WEBAPP_PORT": "8080",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "25",
+    "EMAIL_USER": "benchmark",
+    "EMAIL_PASS": "benchmark",
+    "EMAIL_USE_SSL": "False",
+    "NCK_EMAIL_ADDR": "nck@example.com",
+    "NTP_EMAIL_ADDR": "ntp@example.com",
+}.items():
+    os.environ.setdefault(key, value)
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message, Update
+from sqlalchemy import BIGINT
+from sqlalchemy.dialects.mssql import DATETIME2
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+from bot import register_global_middlewares
+from infrastructure.database.cache import leaderboards, user_search
+from infrastructure.database.models import Base, User
+from infrastructure.database.models.accruals import Accrual
+from infrastructure.database.models.awards import Awards
+from infrastructure.database.models.buffer import Buffer
+from infrastructure.database.pool import TimedQueuePool
+from infrastructure.database.profiling import profile_engine, profile_queries
+from infrastructure.database.setup import create_session_pool
+from tgbot.config import load_config
+from tgbot.handlers import routers_list
+from tgbot.keyboards.admin.main import AdminMenu
+from tgbot.keyboards.user.awards import AwardSelect, AwardsMenu
+from tgbot.keyboards.user.main import MainMenu
+from tgbot.middlewares.uow import ReleaseConnectionsMiddleware
+from tgbot.misc.roles import executed_codes
+from tgbot.services.logger import setup_logging
+
+DIVISIONS = ("НЦК", "НТП")
+ADMIN_ROLE = 10
+ADMINS_COUNT = 10
+
+SURNAMES = ("Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Васильев", "Соколов", "Михайлов", "Новиков")
+NAMES = ("Иван", "Пётр", "Алексей", "Дмитрий", "Сергей", "Андрей", "Михаил", "Николай", "Павел", "Егор")
+PATRONYMICS = ("Иванович", "Петрович", "Сергеевич", "Андреевич", "Алексеевич", "Дмитриевич")
+
+
+# SQLite stand-in for the MSSQL column types of the models
+@compiles(DATETIME2, "sqlite")
+def _compile_datetime2(type_, compiler, **kw):
+    return "DATETIME"
+
+
+@compiles(BIGINT, "sqlite")
+def _compile_bigint(type_, compiler, **kw):
+    # Only INTEGER PRIMARY KEY autoincrements in SQLite, it is 64-bit anyway
+    return "INTEGER"
+
+
+class FakeSession(BaseSession):
+    """
+    Bot API session that answers every method locally, counting calls by method name.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: defaultdict[str, int] = defaultdict(int)
+        self._message_ids = itertools.count(1_000_000)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.calls[method.__api_method__] += 1
+
+        returning = method.__returning__
+        if returning is Message or Message in typing.get_args(returning):
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.datetime.now(),
+                chat=Chat(id=chat_id, type="private"),
+            ).as_(bot)
+        return True
+
+    async def stream_content(self, *args, **kwargs) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+@dataclass
+class FlowStats:
+    latencies: list[float] = field(default_factory=list)
+    queries: int = 0
+    unhandled: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def percentile(self, q: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[q - 1]
+
+
+@dataclass
+class Fixture:
+    users: int
+    admins: list[int]
+    awards: list[int]
+    fios: list[str]
+
+
+def fio_for(index: int) -> str:
+    return (
+        f"{SURNAMES[index % len(SURNAMES)]} "
+        f"{NAMES[index // len(SURNAMES) % len(NAMES)]} "
+        f"{PATRONYMICS[index // 100 % len(PATRONYMICS)]} {index}"
+    )
+
+
+async def seed(stp_pool, achiever_pool, users: int, accruals_per_user: int, awards: int) -> Fixture:
+    """
+    Fill both databases with users, admins, accruals, awards and today's shift schedules.
+    """
+    rng = random.Random(42)
+    fios = [fio_for(index) for index in range(users + ADMINS_COUNT)]
+
+    registered = []
+    for index, fio in enumerate(fios):
+        chat_id = index + 1
+        registered.append(
+            User(
+                ChatId=chat_id,
+                Username=f"user{chat_id}",
+                Division=DIVISIONS[index % len(DIVISIONS)],
+                Position="Специалист первой линии",
+                FIO=fio,
+                Boss=fios[0],
+                Email=f"user{chat_id}@example.com",
+                Role=ADMIN_ROLE if index >= users else 1,
+            )
+        )
+
+    async with stp_pool() as session:
+        session.add_all(registered)
+        for division in DIVISIONS:
+            schedule = [user.FIO for user in registered if user.Division == division]
+            session.add(Buffer(DataName=f"Working{division}", Data=json.dumps(schedule, ensure_ascii=False)))
+        await session.commit()
+
+    async with achiever_pool() as session:
+        session.add_all(
+            Accrual(
+                ChatId=user.ChatId,
+                FIO=user.FIO,
+                Name=f"Ачивка {rng.randrange(20)}",
+                TargetKPI=f"{rng.randint(80, 120)}%",
+                Point=rng.choice((50, 100, 200)),
+                Period=f"2026-{rng.randint(1, 12):02d}",
+                Date="2026-10-01",
+            )
+            for user in registered[:users]
+            for _ in range(accruals_per_user)
+        )
+        interactions = list(executed_codes)
+        session.add_all(
+            Awards(
+                Name=f"Награда {index}",
+                Sum=rng.randrange(50, 1000, 50),
+                Interaction=interactions[index % len(interactions)],
+                Count=rng.choice((0, 1, 3)),
+                Description=f"Описание награды {index}",
+                IsShiftDependent=index % 2 == 0,
+            )
+            for index in range(awards)
+        )
+        await session.commit()
+
+    return Fixture(
+        users=users,
+        admins=[user.ChatId for user in registered[users:]],
+        awards=list(range(1, awards + 1)),
+        fios=fios,
+    )
+
+
+class UpdateFactory:
+    def __init__(self) -> None:
+        self._update_ids = itertools.count(1)
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": "Bench", "username": f"user{user_id}"}
+
+    def message(self, user_id: int, text: str) -> dict:
+        update_id = next(self._update_ids)
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": self._user(user_id),
+                "text": text,
+            },
+        }
+
+    def callback(self, user_id: int, data: str) -> dict:
+        update_id = next(self._update_ids)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": update_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": {"id": 123456, "is_bot": True, "first_name": "Achiever"},
+                    "text": "menu",
+                },
+            },
+        }
+
+
+def flow_sessions(fixture: Fixture, factory: UpdateFactory, rng: random.Random) -> dict[str, Callable[[], list[dict]]]:
+    """
+    Every flow produces the ordered updates of one user session.
+    """
+
+    def user() -> int:
+        return rng.randint(1, fixture.users)
+
+    def start() -> list[dict]:
+        return [factory.message(user(), "/start")]
+
+    def profile() -> list[dict]:
+        return [factory.callback(user(), MainMenu(menu="level").pack())]
+
+    def available_awards() -> list[dict]:
+        return [factory.callback(user(), AwardsMenu(menu="available").pack())]
+
+    def award_purchase() -> list[dict]:
+        user_id, award_id = user(), rng.choice(fixture.awards)
+        return [
+            factory.callback(user_id, AwardSelect(award_id=award_id).pack()),
+            factory.callback(user_id, AwardsMenu(menu="confirm", award_id=award_id).pack()),
+            factory.message(user_id, "Комментарий к покупке"),
+        ]
+
+    def admin_search() -> list[dict]:
+        admin_id = rng.choice(fixture.admins)
+        surname, name, *_ = rng.choice(fixture.fios).split()
+        return [
+            factory.callback(admin_id, AdminMenu(menu="search").pack()),
+            factory.message(admin_id, f"{surname} {name}"),
+        ]
+
+    return {
+        "start": start,
+        "profile": profile,
+        "available_awards": available_awards,
+        "award_purchase": award_purchase,
+        "admin_search": admin_search,
+    }
+
+
+async def feed(dp: Dispatcher, bot: Bot, raw_update: dict, stats: FlowStats) -> None:
+    update = Update.model_validate(raw_update, context={"bot": bot})
+    started = time.perf_counter()
+    with profile_queries("benchmark") as profile:
+        try:
+            result = await dp.feed_update(bot, update)
+        except Exception as e:
+            stats.errors += 1
+            logging.getLogger(__name__).error("Update %s failed: %r", update.update_id, e)
+            result = None
+    stats.latencies.append(time.perf_counter() - started)
+    stats.queries += profile.count
+    if result is UNHANDLED:
+        stats.unhandled += 1
+
+
+async def run_sessions(
+    dp: Dispatcher, bot: Bot, sessions: list[list[dict]], concurrency: int, stats: FlowStats
+) -> None:
+    queue: asyncio.Queue[list[dict]] = asyncio.Queue()
+    for session in sessions:
+        queue.put_nowait(session)
+
+    async def worker() -> None:
+        while not queue.empty():
+            for raw_update in queue.get_nowait():
+                await feed(dp, bot, raw_update, stats)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stats.elapsed += time.perf_counter() - started
+
+
+def read_replay(path: Path) -> dict[str, list[list[dict]]]:
+    flows: defaultdict[str, list[list[dict]]] = defaultdict(list)
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "update" in record:
+                flows[record.get("flow", "replay")].append([record["update"]])
+            else:
+                flows["replay"].append([record])
+    return flows
+
+
+def create_engine(path: Path) -> AsyncEngine:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=TimedQueuePool, pool_size=20)
+    profile_engine(engine, slow_query_ms=0)
+    return engine
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--accruals", type=int, default=20, help="Accruals per user")
+    parser.add_argument("--awards", type=int, default=30)
+    parser.add_argument("--sessions", type=int, default=300, help="User sessions per flow")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured sessions per flow, fills the caches")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--flows", default="start,profile,available_awards,award_purchase,admin_search")
+    parser.add_argument("--replay", type=Path, help="JSON lines file with recorded updates")
+    parser.add_argument("--strict-budgets", action="store_true", help="Fail updates exceeding query_budget")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    config = load_config(None)
+    config.db.query_budget_strict = args.strict_budgets
+    setup_logging(args.log_level.upper())
+
+    with tempfile.TemporaryDirectory(prefix="achiever-bench-") as directory:
+        stp_engine = create_engine(Path(directory) / "stp.db")
+        achiever_engine = create_engine(Path(directory) / "achiever.db")
+        for engine in (stp_engine, achiever_engine):
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+        stp_pool = create_session_pool(stp_engine)
+        achiever_pool = create_session_pool(achiever_engine)
+        fixture = await seed(stp_pool, achiever_pool, args.users, args.accruals, args.awards)
+
+        # Background jobs of the bot keep these loaded
+        async with stp_pool() as session:
+            await user_search.refresh(session)
+        await leaderboards.refresh(stp_pool, achiever_pool)
+
+        session = FakeSession()
+        bot = Bot(token="123456:benchmark", session=session, default=DefaultBotProperties(parse_mode="HTML"))
+        if config.db.release_before_io:
+            bot.session.middleware(ReleaseConnectionsMiddleware())
+
+        dp = Dispatcher(storage=MemoryStorage())
+        dp["stp_db"] = stp_pool
+        dp["achiever_db"] = achiever_pool
+        dp.include_routers(*routers_list)
+        register_global_middlewares(dp, config, stp_pool, achiever_pool)
+
+        rng = random.Random(7)
+        factory = UpdateFactory()
+        if args.replay:
+            flows = read_replay(args.replay)
+            warmup = {}
+        else:
+            makers = flow_sessions(fixture, factory, rng)
+            names = [name.strip() for name in args.flows.split(",") if name.strip()]
+            unknown = set(names) - set(makers)
+            if unknown:
+                parser.error(f"unknown flows: {', '.join(sorted(unknown))}")
+            flows = {name: [makers[name]() for _ in range(args.sessions)] for name in names}
+            warmup = {name: [makers[name]() for _ in range(args.warmup)] for name in names}
+
+        print(
+            f"{'flow':<18} {'updates':>8} {'upd/sec':>9} {'p50 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'unhandled':>9} {'errors':>7}"
+        )
+        for name, sessions in flows.items():
+            if warmup.get(name):
+                await run_sessions(dp, bot, warmup[name], args.concurrency, FlowStats())
+
+            stats = FlowStats()
+            await run_sessions(dp, bot, sessions, args.concurrency, stats)
+            updates = len(stats.latencies)
+            print(
+                f"{name:<18} {updates:>8} {updates / stats.elapsed:>9.1f} "
+                f"{stats.percentile(50) * 1000:>8.2f} {stats.percentile(99) * 1000:>8.2f} "
+                f"{stats.queries / updates:>8.2f} {stats.unhandled:>9} {stats.errors:>7}"
+            )
+
+        calls = ", ".join(f"{method} {count}" for method, count in sorted(session.calls.items()))
+        print(f"\nBot API calls: {calls}")
+
+        await stp_engine.dispose()
+        await achiever_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark of update throughput against the number of sharded workers.
+
+Runs the real gateway -> Redis -> UpdateWorker -> Dispatcher path. The handler
+simulates a request with some CPU work and an awaited I/O call, like a DB query.
+
+Usage:
+    python -m benchmarks.sharding --redis redis://localhost:6379/0 --workers 1,2,4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from redis.asyncio import Redis
+
+from tgbot.services.sharding import PROCESSING_KEY, UPDATE_QUEUE_KEY, UpdateGateway, UpdateWorker
+
+PROCESSED_KEY = "achiever:bench:processed"
+READY_KEY = "achiever:bench:ready"
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+            "text": "/start",
+        },
+    }
+
+
+def worker_process(redis_url: str, shard: int, io_ms: float, cpu_us: float) -> None:
+    async def run() -> None:
+        redis = Redis.from_url(redis_url)
+        router = Router()
+
+        @router.message()
+        async def handler(message: Message) -> None:
+            deadline = time.perf_counter() + cpu_us / 1_000_000
+            while time.perf_counter() < deadline:
+                pass
+            await asyncio.sleep(io_ms / 1000)
+            await redis.incr(PROCESSED_KEY)
+
+        dp = Dispatcher()
+        dp.include_router(router)
+        bot = Bot(token="123456:benchmark")
+
+        await redis.incr(READY_KEY)
+        await UpdateWorker(bot=bot, dp=dp, redis=redis, shard=shard).run()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+async def measure(redis_url: str, workers: int, updates: int, users: int, io_ms: float, cpu_us: float) -> float:
+    redis = Redis.from_url(redis_url)
+    await redis.delete(
+        PROCESSED_KEY,
+        READY_KEY,
+        *[key.format(shard=i) for key in (UPDATE_QUEUE_KEY, PROCESSING_KEY) for i in range(workers)],
+    )
+
+    processes = [
+        multiprocessing.Process(target=worker_process, args=(redis_url, shard, io_ms, cpu_us), daemon=True)
+        for shard in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    while int(await redis.get(READY_KEY) or 0) < workers:
+        await asyncio.sleep(0.1)
+
+    gateway = UpdateGateway(redis=redis, shards=workers)
+    started = time.perf_counter()
+    for update_id in range(updates):
+        await gateway.route(make_update(update_id, user_id=update_id % users + 1))
+
+    while int(await redis.get(PROCESSED_KEY) or 0) < updates:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    for process in processes:
+        process.terminate()
+        process.join()
+    await redis.aclose()
+
+    return updates / elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis", default="redis://localhost:6379/0")
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated worker counts")
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--io-ms", type=float, default=5.0, help="Simulated I/O per update")
+    parser.add_argument("--cpu-us", type=float, default=500.0, help="Simulated CPU work per update")
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'workers':>8} {'updates/sec':>12} {'speedup':>8}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        rate = await measure(args.redis, workers, args.updates, args.users, args.io_ms, args.cpu_us)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>12.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,16 +2,48 @@ import asyncio
 import logging
 
 from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from redis.asyncio import Redis
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 
-from infrastructure.database.setup import create_engine, create_session_pool
+from infrastructure.database.cache import (
+    configure_caches,
+    refresh_leaderboards_job,
+    refresh_search_index_job,
+)
+from infrastructure.database.pool import log_pool_stats_job, pool_liveness_job
+from infrastructure.database.routing import configure_replica_routing
+from infrastructure.database.setup import create_engine, create_session_pool, dispose_engine
+from infrastructure.database.timeouts import configure_query_timeouts
 from tgbot.config import Config, load_config
 from tgbot.handlers import routers_list
 from tgbot.middlewares.config import ConfigMiddleware
 from tgbot.middlewares.database import DatabaseMiddleware
+from tgbot.middlewares.deadline import DbDeadlineMiddleware
+from tgbot.middlewares.log_context import LogContextMiddleware
+from tgbot.middlewares.metrics import (
+    HandlerMetricsMiddleware,
+    TelegramMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
+from tgbot.middlewares.profiling import QueryBudgetMiddleware
+from tgbot.middlewares.uow import ReleaseConnectionsMiddleware, UnitOfWorkMiddleware
 from tgbot.services import broadcaster
+from tgbot.services.broadcast_jobs import BroadcastJobs
+from tgbot.services.ledger import reconcile_balances_job
+from tgbot.services.mailing import outbox
+from tgbot.services.metrics import (
+    instrument_email_outbox,
+    instrument_engine,
+    instrument_query_timeouts,
+    setup_metrics_route,
+)
+from tgbot.services.sharding import UpdateGateway, UpdateWorker
 from tgbot.services.logger import setup_logging
 
 bot_config = load_config(".env")
@@ -33,6 +65,9 @@ def register_global_middlewares(
     Register global middlewares for the given dispatcher.
     Global middlewares here are the ones that are applied to all the handlers (you specify the type of update)
 
+    The database middleware is registered as an inner middleware: it runs after filters,
+    when the handler is resolved, so it only prepares the dependencies the handler asks for.
+
     :param bot: Bot object.
     :param dp: The dispatcher instance.
     :type dp: Dispatcher
@@ -41,8 +76,12 @@ def register_global_middlewares(
     :param achiever_session_pool: Optional session pool object for the database using SQLAlchemy.
     :return: None
     """
-    middleware_types = [
+    outer_middleware_types = [
         ConfigMiddleware(config),
+    ]
+    inner_middleware_types = [
+        QueryBudgetMiddleware(strict=config.db.query_budget_strict),
+        DbDeadlineMiddleware(),
         DatabaseMiddleware(
             config=config,
             main_session_pool=main_session_pool,
@@ -50,11 +89,26 @@ def register_global_middlewares(
         ),
     ]
 
-    for middleware_type in middleware_types:
-        dp.message.outer_middleware(middleware_type)
-        dp.callback_query.outer_middleware(middleware_type)
-        dp.edited_message.outer_middleware(middleware_type)
-        dp.chat_member.outer_middleware(middleware_type)
+    dp.update.outer_middleware(LogContextMiddleware())
+
+    if config.metrics.enabled:
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+        inner_middleware_types.insert(0, HandlerMetricsMiddleware())
+
+    # Сессии, открытые при обработке обновления, отслеживаются для возврата соединений в пул
+    dp.update.outer_middleware(UnitOfWorkMiddleware())
+
+    for observer in (
+        dp.message,
+        dp.callback_query,
+        dp.edited_message,
+        dp.chat_member,
+        dp.inline_query,
+    ):
+        for middleware_type in outer_middleware_types:
+            observer.outer_middleware(middleware_type)
+        for middleware_type in inner_middleware_types:
+            observer.middleware(middleware_type)
 
 
 def get_storage(config):
@@ -77,38 +131,305 @@ def get_storage(config):
         return MemoryStorage()
 
 
-async def main():
-    setup_logging()
+async def run_polling(bot: Bot, dp: Dispatcher) -> None:
+    """
+    Receive updates with long polling.
+
+    :param bot: Bot object.
+    :param dp: The dispatcher instance.
+    :return: None
+    """
+    # Telegram refuses getUpdates while a webhook is registered
+    await bot.delete_webhook()
+    await dp.start_polling(bot)
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, config: Config) -> None:
+    """
+    Receive updates with a webhook served by an aiohttp app.
+
+    The app validates the secret token of every request and feeds updates into the same dispatcher.
+
+    :param bot: Bot object.
+    :param dp: The dispatcher instance.
+    :param config: The configuration object from the loaded configuration.
+    :return: None
+    """
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=config.webapp.webhook_secret,
+    ).register(app, path=config.webapp.webhook_path)
+    setup_application(app, dp, bot=bot)
+    if metrics_on_webapp(config):
+        setup_metrics_route(app, config.metrics.path)
+
+    await bot.set_webhook(
+        url=config.webapp.webhook_endpoint(),
+        secret_token=config.webapp.webhook_secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info("Webhook registered on %s", config.webapp.webhook_endpoint())
+
+    await serve_app(app, config)
+
+
+async def run_gateway(bot: Bot, dp: Dispatcher, config: Config, redis: Redis) -> None:
+    """
+    Receive updates with a webhook and route them to worker queues in Redis.
+
+    Updates are sharded by user id, so all updates of one user are handled by the same worker.
+
+    :param bot: Bot object.
+    :param dp: The dispatcher instance, used to resolve the update types to subscribe to.
+    :param config: The configuration object from the loaded configuration.
+    :param redis: Redis client shared with the workers.
+    :return: None
+    """
+    app = web.Application()
+    UpdateGateway(
+        redis=redis,
+        shards=config.scaling.workers,
+        secret_token=config.webapp.webhook_secret,
+    ).register(app, path=config.webapp.webhook_path)
+    if metrics_on_webapp(config):
+        setup_metrics_route(app, config.metrics.path)
+
+    await bot.set_webhook(
+        url=config.webapp.webhook_endpoint(),
+        secret_token=config.webapp.webhook_secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    logger.info(
+        "Gateway registered on %s, workers: %s",
+        config.webapp.webhook_endpoint(),
+        config.scaling.workers,
+    )
+
+    try:
+        await serve_app(app, config)
+    finally:
+        await bot.session.close()
+
+
+async def run_worker(bot: Bot, dp: Dispatcher, config: Config, redis: Redis) -> None:
+    """
+    Handle updates routed by the gateway to this worker's shard.
+
+    :param bot: Bot object.
+    :param dp: The dispatcher instance.
+    :param config: The configuration object from the loaded configuration.
+    :param redis: Redis client shared with the gateway.
+    :return: None
+    """
+    worker = UpdateWorker(
+        bot=bot,
+        dp=dp,
+        redis=redis,
+        shard=config.scaling.worker_id,
+        concurrency=config.scaling.worker_concurrency,
+    )
+    try:
+        await worker.run()
+    finally:
+        await bot.session.close()
 
+
+def metrics_on_webapp(config: Config) -> bool:
+    """
+    Metrics are served by the webhook app when it listens on the metrics port.
+
+    :param config: The configuration object from the loaded configuration.
+    :return: True if the metrics route is added to the webhook app.
+    """
+    receives_webhook = config.scaling.role == "gateway" or (
+        config.scaling.role == "standalone" and config.webapp.use_webhook
+    )
+    return config.metrics.enabled and receives_webhook and config.metrics.port == config.webapp.port
+
+
+async def start_metrics_server(config: Config) -> web.AppRunner:
+    """
+    Serve the metrics endpoint on its own port.
+
+    Workers share a host, so each one listens on the metrics port shifted by its worker id.
+
+    :param config: The configuration object from the loaded configuration.
+    :return: The runner to clean up on shutdown.
+    """
+    port = config.metrics.port
+    if config.scaling.role == "worker":
+        port += config.scaling.worker_id
+
+    app = web.Application()
+    setup_metrics_route(app, config.metrics.path)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=config.metrics.host, port=port)
+    await site.start()
+    logger.info("Metrics served on %s:%s%s", config.metrics.host, port, config.metrics.path)
+    return runner
+
+
+async def serve_app(app: web.Application, config: Config) -> None:
+    """
+    Serve the aiohttp app on the WebApp host and port until cancelled.
+
+    :param app: The aiohttp application.
+    :param config: The configuration object from the loaded configuration.
+    :return: None
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=config.webapp.host, port=config.webapp.port)
+    await site.start()
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def create_bot(config: Config) -> Bot:
+    """
+    Bot talking to api.telegram.org or to the Bot API server from the config.
+
+    :param config: The configuration object loaded from env.
+    """
+    session = None
+    if config.tg_bot.api_server:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(config.tg_bot.api_server))
+    return Bot(
+        token=config.tg_bot.token,
+        session=session,
+        default=DefaultBotProperties(parse_mode="HTML"),
+    )
+
+
+async def main():
     config = load_config(".env")
+    setup_logging(config.log.level, json_format=config.log.json, sampling=config.log.sampling)
     storage = get_storage(config)
+    configure_caches(config.cache)
 
-    bot = Bot(
-        token=config.tg_bot.token, default=DefaultBotProperties(parse_mode="HTML")
-    )
+    bot = create_bot(config)
     dp = Dispatcher(storage=storage)
 
+    if config.db.release_before_io:
+        bot.session.middleware(ReleaseConnectionsMiddleware())
+
+    # Бюджет методов репозиториев: зависший запрос отменяется, а не держит соединение пула
+    configure_query_timeouts(config.db.query_timeout)
+
     # Create engines for different databases
-    stp_db = create_engine(config.db, db_name=config.db.main_db)
-    achiever_db = create_engine(config.db, db_name=config.db.achiever_db)
+    stp_engine = create_engine(config.db, db_name=config.db.main_db)
+    achiever_engine = create_engine(config.db, db_name=config.db.achiever_db)
+
+    # Отдельный движок для массовой загрузки начислений, соединения открываются только при загрузке
+    ingest_engine = create_engine(
+        config.db, db_name=config.db.achiever_db, fast_executemany=True
+    )
 
-    stp_db = create_session_pool(stp_db)
-    achiever_db = create_session_pool(achiever_db)
+    # Реплики для чтения, если настроены: в них уходят SELECT, записи остаются в основной БД
+    configure_replica_routing(config.db.replica_sticky_seconds)
+    stp_replica = achiever_replica = None
+    if config.db.main_replica_host:
+        stp_replica = create_engine(config.db, db_name=config.db.main_db, replica=True)
+    if config.db.achiever_replica_host:
+        achiever_replica = create_engine(config.db, db_name=config.db.achiever_db, replica=True)
+
+    # Пулы соединений процесса для команды /pool
+    engines = {"stp": stp_engine, "achiever": achiever_engine, "ingest": ingest_engine}
+    if stp_replica:
+        engines["stp_replica"] = stp_replica
+    if achiever_replica:
+        engines["achiever_replica"] = achiever_replica
+    dp["db_engines"] = engines
+
+    if config.metrics.enabled:
+        bot.session.middleware(TelegramMetricsMiddleware())
+        for name, engine in engines.items():
+            instrument_engine(name, engine)
+        instrument_query_timeouts()
+        instrument_email_outbox(outbox)
+
+    stp_db = create_session_pool(stp_engine, stp_replica)
+    achiever_db = create_session_pool(achiever_engine, achiever_replica)
 
     # Store session pools in dispatcher
     dp["stp_db"] = stp_db
     dp["achiever_db"] = achiever_db
+    dp["ingest_db"] = create_session_pool(ingest_engine)
+
+    # Задачи рассылки доступны хендлерам как аргумент broadcasts
+    # Рассылки выполняет только процесс фоновых задач, остальные лишь создают задачи и меняют их статус
+    broadcasts = BroadcastJobs(bot, stp_db, achiever_db, runs_jobs=config.scaling.runs_background_jobs)
+    dp["broadcasts"] = broadcasts
 
     dp.include_routers(*routers_list)
 
     register_global_middlewares(dp, bot_config, stp_db, achiever_db)
 
+    redis = Redis.from_url(config.redis.dsn()) if config.redis else None
+
+    background_tasks = [
+        asyncio.create_task(log_pool_stats_job(engines)),
+    ]
+    if config.db.pool_liveness_interval:
+        background_tasks.append(
+            asyncio.create_task(
+                pool_liveness_job(engines, config.db.pool_liveness_interval)
+            )
+        )
+    if config.scaling.role != "gateway":
+        await outbox.start()
+        # Индекс поиска сотрудников и рейтинги свои у каждого процесса, обрабатывающего обновления
+        background_tasks.append(
+            asyncio.create_task(
+                refresh_search_index_job(stp_db, config.cache.search_refresh)
+            )
+        )
+        background_tasks.append(
+            asyncio.create_task(
+                refresh_leaderboards_job(stp_db, achiever_db, config.cache.leaderboard_refresh)
+            )
+        )
+    if config.scaling.runs_background_jobs:
+        background_tasks.append(
+            asyncio.create_task(
+                reconcile_balances_job(achiever_db, config.ledger.reconcile_interval)
+            )
+        )
+        background_tasks.append(asyncio.create_task(broadcasts.watch()))
+
+    metrics_runner = None
+    if config.metrics.enabled and not metrics_on_webapp(config):
+        metrics_runner = await start_metrics_server(config)
+
     # await on_startup(bot, config.tg_bot.admin_ids)
     try:
-        await dp.start_polling(bot)
+        match config.scaling.role:
+            case "gateway":
+                await run_gateway(bot, dp, config, redis)
+            case "worker":
+                await run_worker(bot, dp, config, redis)
+            case _ if config.webapp.use_webhook:
+                await run_webhook(bot, dp, config)
+            case _:
+                await run_polling(bot, dp)
     finally:
-        await stp_db.dispose()
-        await achiever_db.dispose()
+        for task in background_tasks:
+            task.cancel()
+        await broadcasts.stop()
+        await outbox.stop()
+        if metrics_runner:
+            await metrics_runner.cleanup()
+        if redis:
+            await redis.aclose()
+        for engine in engines.values():
+            await dispose_engine(engine)
 
 
 if __name__ == "__main__":
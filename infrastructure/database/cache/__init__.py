@@ -0,0 +1,20 @@
+from .awards import AwardsCatalog, awards_catalog
+from .leaderboard import Leaderboards, leaderboards, refresh_leaderboards_job
+from .schedule import ScheduleIndex, schedule_index
+from .search import UserSearchIndex, refresh_search_index_job, user_search
+from .users import UserCache, user_cache
+
+
+def configure_caches(config) -> None:
+    """
+    Применение настроек кэшей из конфигурации
+
+    :param config: Объект CacheConfig
+    """
+    awards_catalog.ttl = config.awards_ttl
+    schedule_index.max_age = config.schedule_ttl
+    user_cache.ttl = config.users_ttl
+    user_cache.max_size = config.users_size
+    user_search.max_age = config.search_max_age
+    leaderboards.top_size = config.leaderboard_top
+    leaderboards.max_age = config.leaderboard_max_age
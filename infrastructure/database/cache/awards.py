@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_right
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.database.models.awards import Awards
+
+logger = logging.getLogger(__name__)
+
+
+class AwardsCatalog:
+    """
+    Общий для процесса каталог наград.
+
+    Таблица Awards маленькая и меняется редко, поэтому загружается целиком раз в ttl секунд.
+    Награды хранятся отсортированными по стоимости, чтобы список доступных
+    для баланса наград находился бинарным поиском, а награда по id - по словарю.
+    """
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        self.ttl = ttl
+
+        self._by_id: dict[int, Awards] = {}
+        self._ordered: list[Awards] = []
+        self._by_sum: list[Awards] = []
+        self._sums: list[int] = []
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def invalidate(self) -> None:
+        """
+        Принудительное обновление каталога при следующем обращении.
+        Вызывается после изменения таблицы Awards
+        """
+        self._loaded_at = None
+        logger.info("[Кэш] Каталог наград сброшен")
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        """
+        Загрузка каталога, если он ещё не загружен или устарел.
+        Параллельные запросы ждут одну загрузку
+
+        :param session: Сессия БД AchieverBot
+        """
+        if not self.is_stale:
+            return
+
+        async with self._lock:
+            if self.is_stale:
+                await self._load(session)
+
+    def all(self) -> list[Awards]:
+        """
+        Полный список наград в порядке идентификаторов
+        """
+        return list(self._ordered)
+
+    def available(self, balance: int) -> list[Awards]:
+        """
+        Список наград с названием, стоимость которых не превышает баланс
+
+        :param balance: Баланс пользователя
+        """
+        return self._by_sum[: bisect_right(self._sums, balance)]
+
+    def get(self, award_id: int) -> Optional[Awards]:
+        """
+        Награда по идентификатору
+
+        :param award_id: Уникальный идентификатор награды в таблице Awards
+        """
+        return self._by_id.get(award_id)
+
+    async def _load(self, session: AsyncSession) -> None:
+        result = await session.execute(select(Awards).order_by(Awards.Id))
+        awards = list(result.scalars().all())
+
+        by_sum = sorted((award for award in awards if award.Name is not None), key=lambda award: award.Sum)
+
+        self._by_id = {award.Id: award for award in awards}
+        self._ordered = awards
+        self._by_sum = by_sum
+        self._sums = [award.Sum for award in by_sum]
+        self._loaded_at = time.monotonic()
+        logger.info("[Кэш] Каталог наград загружен, наград: %s", len(awards))
+
+
+awards_catalog = AwardsCatalog()
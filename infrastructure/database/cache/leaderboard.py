@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from infrastructure.database.models import User
+from infrastructure.database.models.accruals import Accrual
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Rank:
+    """
+    Место пользователя в рейтинге
+
+    Attributes:
+        place: Место, при равенстве баллов место общее
+        points: Сумма баллов
+        total: Кол-во участников рейтинга
+    """
+
+    place: int
+    points: int
+    total: int
+
+
+@dataclass(frozen=True, slots=True)
+class LeaderboardEntry:
+    chat_id: int
+    fio: str
+    place: int
+    points: int
+
+
+@dataclass(slots=True)
+class _Board:
+    top: list[LeaderboardEntry]
+    # Место и сумма баллов по ChatId, Rank собирается при чтении
+    ranks: dict[int, tuple[int, int]]
+
+
+class Leaderboards:
+    """
+    Рейтинги по сумме начисленных баллов в памяти процесса.
+
+    Фоновая задача раз в интервал агрегирует accurals одним запросом по (ChatId, Period),
+    раскладывает суммы по направлениям из RegisteredUsers и строит для каждого рейтинга
+    топ и словарь мест. Обработчики читают место пользователя и топ без обращения к БД.
+    Рейтинги строятся общий и по направлению, за всё время и за каждый период.
+    Устаревшие рейтинги не отдаются.
+    """
+
+    def __init__(self, top_size: int = 10, max_age: float = 3600.0) -> None:
+        self.top_size = top_size
+        self.max_age = max_age
+        self.loaded_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+        self.refresh_seconds: float = 0.0
+
+        self._boards: dict[tuple[Optional[str], Optional[str]], _Board] = {}
+        self._divisions: dict[int, Optional[str]] = {}
+        self._periods: list[str] = []
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.max_age
+
+    @property
+    def age(self) -> Optional[float]:
+        """
+        Возраст рейтингов в секундах или None, если они ещё не построены
+        """
+        return time.monotonic() - self.loaded_at if self.loaded_at is not None else None
+
+    @property
+    def periods(self) -> list[str]:
+        """
+        Периоды начислений, по которым построены рейтинги, по возрастанию
+        """
+        return self._periods
+
+    def load(self, totals: list[tuple[int, str, int]], users: dict[int, tuple[str, Optional[str]]]) -> None:
+        """
+        Полная замена рейтингов
+
+        :param totals: Суммы баллов (ChatId, Period, Point)
+        :param users: ФИО и направление по ChatId
+        """
+        groups: defaultdict[tuple[Optional[str], Optional[str]], defaultdict[int, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        for chat_id, period, points in totals:
+            # Начисления удалённых пользователей в рейтинги не попадают
+            user = users.get(chat_id)
+            if user is None:
+                continue
+            division = user[1]
+            groups[None, None][chat_id] += points
+            groups[None, period][chat_id] += points
+            # Ключ с division=None занят общими рейтингами
+            if division is not None:
+                groups[division, None][chat_id] += points
+                groups[division, period][chat_id] += points
+
+        self._boards = {key: self._build(points, users) for key, points in groups.items()}
+        self._divisions = {chat_id: division for chat_id, (_, division) in users.items()}
+        self._periods = sorted({period for _, period in groups if period is not None})
+        self.loaded_at = time.monotonic()
+
+    async def refresh(self, main_session_pool, achiever_session_pool) -> None:
+        """
+        Перестроение рейтингов из БД
+
+        :param main_session_pool: Пул сессий БД STPMain
+        :param achiever_session_pool: Пул сессий БД AchieverBot
+        """
+        started = time.perf_counter()
+
+        async with achiever_session_pool() as session:
+            result = await session.execute(
+                select(Accrual.ChatId, Accrual.Period, func.sum(Accrual.Point)).group_by(
+                    Accrual.ChatId, Accrual.Period
+                )
+            )
+            totals = list(result.tuples().all())
+
+        async with main_session_pool() as session:
+            result = await session.execute(
+                select(User.ChatId, User.FIO, User.Division).where(User.ChatId.is_not(None))
+            )
+            users = {chat_id: (fio, division) for chat_id, fio, division in result.tuples().all()}
+
+        # Построение рейтингов в отдельном потоке, чтобы не останавливать обработку обновлений
+        await asyncio.to_thread(self.load, totals, users)
+        self.refresh_seconds = time.perf_counter() - started
+        self.refreshed_at = time.time()
+        logger.info(
+            "[Кэш] Рейтинги перестроены за %.2f сек: рейтингов %s, сумм %s",
+            self.refresh_seconds,
+            len(self._boards),
+            len(totals),
+        )
+
+    def rank(self, chat_id: int, by_division: bool = False, period: Optional[str] = None) -> Optional[Rank]:
+        """
+        Место пользователя в рейтинге
+
+        :param chat_id: Идентификатор пользователя в Telegram
+        :param by_division: Рейтинг внутри направления пользователя вместо общего
+        :param period: Период начислений, None - за всё время
+        :return: Место или None, если рейтинги устарели или у пользователя нет начислений
+        """
+        board = self._board(chat_id, by_division, period)
+        if board is None or chat_id not in board.ranks:
+            return None
+
+        place, points = board.ranks[chat_id]
+        return Rank(place=place, points=points, total=len(board.ranks))
+
+    def top(self, chat_id: int, by_division: bool = False, period: Optional[str] = None) -> Optional[list[LeaderboardEntry]]:
+        """
+        Топ рейтинга для пользователя
+
+        :param chat_id: Идентификатор пользователя в Telegram, по нему определяется направление
+        :param by_division: Рейтинг внутри направления пользователя вместо общего
+        :param period: Период начислений, None - за всё время
+        :return: Лучшие участники или None, если рейтинги устарели
+        """
+        if not self.is_fresh:
+            return None
+        board = self._board(chat_id, by_division, period)
+        return board.top if board is not None else []
+
+    def _board(self, chat_id: int, by_division: bool, period: Optional[str]) -> Optional[_Board]:
+        if not self.is_fresh:
+            return None
+        division = self._divisions.get(chat_id) if by_division else None
+        if by_division and division is None:
+            return None
+        return self._boards.get((division, period))
+
+    def _build(self, points: dict[int, int], users: dict[int, tuple[str, Optional[str]]]) -> _Board:
+        ordered = sorted(points, key=points.__getitem__, reverse=True)
+
+        ranks = {}
+        place, previous = 0, None
+        for position, chat_id in enumerate(ordered, start=1):
+            total = points[chat_id]
+            if total != previous:
+                place, previous = position, total
+            ranks[chat_id] = (place, total)
+
+        top = [
+            LeaderboardEntry(chat_id=chat_id, fio=users[chat_id][0], place=ranks[chat_id][0], points=points[chat_id])
+            for chat_id in ordered[:self.top_size]
+        ]
+        return _Board(top=top, ranks=ranks)
+
+
+leaderboards = Leaderboards()
+
+
+async def refresh_leaderboards_job(main_session_pool, achiever_session_pool, interval: int) -> None:
+    """
+    Фоновая задача периодического перестроения рейтингов
+
+    :param main_session_pool: Пул сессий БД STPMain
+    :param achiever_session_pool: Пул сессий БД AchieverBot
+    :param interval: Интервал между перестроениями в секундах
+    """
+    while True:
+        try:
+            await leaderboards.refresh(main_session_pool, achiever_session_pool)
+        except Exception as e:
+            logger.error("[Кэш] Ошибка перестроения рейтингов: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.database.models.buffer import Buffer
+
+logger = logging.getLogger(__name__)
+
+# Разделители записей в текстовом буфере графика
+SEPARATORS = re.compile(r"[\r\n;,|\t]+")
+SPACES = re.compile(r"\s+")
+# Слово ФИО: буквы, допускаются дефис, точка и апостроф внутри (Петрова-Водкина, И.И.)
+NAME_TOKEN = re.compile(r"[^\W\d_]+(?:[-.'][^\W\d_]*)*")
+# Обрамление записи: кавычки и скобки JSON, двоеточие после ключа
+FRAMING = "\"'[]{}()«»:"
+
+
+def normalize_fio(fio: str) -> str:
+    """
+    Приведение ФИО к виду для сравнения: без лишних пробелов и регистра
+    """
+    return SPACES.sub(" ", fio).strip().casefold()
+
+
+def parse_fio(entry: str) -> str:
+    """
+    Выделение ФИО из записи графика: ведущие слова до первого не-имени,
+    например времени смены или номера. Обрамление кавычками и скобками отбрасывается
+
+    :param entry: Запись графика, например "Иванов Иван Иванович 08:00-17:00"
+    :return: Нормализованное ФИО или пустая строка
+    """
+    names = []
+    for token in normalize_fio(entry).split(" "):
+        token = token.strip(FRAMING)
+        if not token:
+            if names:
+                break
+            continue
+        if not NAME_TOKEN.fullmatch(token):
+            break
+        names.append(token)
+    return " ".join(names)
+
+
+def parse_schedule(buffer_data: Optional[str]) -> frozenset[str]:
+    """
+    Разбор буфера Working{division} в множество ФИО работающих сегодня.
+
+    Буфер - записи через разделители SEPARATORS (перевод строки, ";", ",", "|", табуляция),
+    в каждой записи ФИО идёт первым, после него может быть текст смены. Так же разбирается
+    JSON-список ФИО или словарь с ФИО в ключах
+
+    :param buffer_data: Содержимое BufferForBot.Data
+    :return: Множество нормализованных ФИО
+    """
+    if not buffer_data:
+        return frozenset()
+
+    return frozenset(fio for fio in map(parse_fio, SEPARATORS.split(buffer_data)) if fio)
+
+
+class ScheduleIndex:
+    """
+    Кэш графика работы по направлениям.
+
+    Буфер Working{division} загружается не чаще раза в max_age секунд на направление
+    и разбирается в множество ФИО, проверка смены - точное совпадение ФИО в множестве.
+    """
+
+    def __init__(self, max_age: float = 300.0) -> None:
+        self.max_age = max_age
+
+        self._schedules: dict[str, tuple[float, frozenset[str]]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def is_stale(self, division: str) -> bool:
+        entry = self._schedules.get(division)
+        return entry is None or time.monotonic() - entry[0] > self.max_age
+
+    def invalidate(self, division: Optional[str] = None) -> None:
+        """
+        Принудительное обновление графика при следующем обращении.
+        Вызывается после перезаписи буфера внешней задачей
+
+        :param division: Направление, если не указано - сбрасываются все
+        """
+        if division is None:
+            self._schedules.clear()
+        else:
+            self._schedules.pop(division, None)
+        logger.info("[Кэш] График сброшен: %s", division or "все направления")
+
+    async def is_working(self, session: AsyncSession, fio: str, division: str) -> bool:
+        """
+        Проверка наличия пользователя в графике направления на сегодня
+
+        :param session: Сессия БД STPMain
+        :param fio: ФИО пользователя
+        :param division: Направление пользователя
+        """
+        schedule = await self._get(session, division)
+        # ФИО пользователя разбирается так же, как записи графика
+        return parse_fio(fio) in schedule
+
+    async def _get(self, session: AsyncSession, division: str) -> frozenset[str]:
+        if self.is_stale(division):
+            lock = self._locks.setdefault(division, asyncio.Lock())
+            async with lock:
+                if self.is_stale(division):
+                    await self._load(session, division)
+        return self._schedules[division][1]
+
+    async def _load(self, session: AsyncSession, division: str) -> None:
+        query = select(Buffer.Data).where(Buffer.DataName == f"Working{division}")
+        result = await session.execute(query)
+
+        schedule = parse_schedule(result.scalar_one_or_none())
+        self._schedules[division] = (time.monotonic(), schedule)
+        logger.info("[Кэш] График %s загружен, сотрудников: %s", division, len(schedule))
+
+
+schedule_index = ScheduleIndex()
@@ -0,0 +1,255 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.database.cache.schedule import normalize_fio
+from infrastructure.database.models import User
+
+logger = logging.getLogger(__name__)
+
+# Веса совпадения слова запроса со словом ФИО
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+SUBSTRING_SCORE = 1.5
+
+
+def tokenize(fio: Optional[str]) -> tuple[str, ...]:
+    """
+    Разбиение ФИО на нормализованные слова, ё приравнивается к е
+    """
+    if not fio:
+        return ()
+    return tuple(normalize_fio(fio).replace("ё", "е").split())
+
+
+@lru_cache(maxsize=65536)
+def trigrams(token: str) -> frozenset[str]:
+    """
+    Триграммы слова с отступами, как в pg_trgm: "  и", " ив", "ив ", ...
+    """
+    padded = f"  {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def inner_trigrams(token: str) -> frozenset[str]:
+    """
+    Триграммы без отступов, которые есть у любого слова, содержащего token
+    """
+    return frozenset(token[i:i + 3] for i in range(len(token) - 2))
+
+
+@lru_cache(maxsize=262144)
+def match_score(token: str, user_token: str, min_similarity: float) -> float:
+    """
+    Вес совпадения слова запроса со словом ФИО, 0 - нет совпадения
+    """
+    if token == user_token:
+        return EXACT_SCORE
+    if user_token.startswith(token):
+        return PREFIX_SCORE
+    if len(token) < 3:
+        return 0.0
+    if token in user_token:
+        return SUBSTRING_SCORE
+
+    query_trigrams = trigrams(token)
+    similarity = len(query_trigrams & trigrams(user_token)) / len(query_trigrams)
+    return similarity if similarity >= min_similarity else 0.0
+
+
+class UserSearchIndex:
+    """
+    Индекс поиска сотрудников по ФИО в памяти процесса.
+
+    Поддерживает префиксный поиск по отсортированному списку слов и поиск по подстроке
+    и с опечатками по триграммам. Все слова запроса должны совпасть с разными словами ФИО,
+    результаты ранжируются по качеству совпадения.
+    Индекс перезагружается целиком фоновой задачей и обновляется точечно при чтении пользователей из БД.
+    Устаревший индекс не отвечает на запросы, поиск при этом идёт в БД.
+    """
+
+    def __init__(self, max_age: float = 1800.0, min_similarity: float = 0.5) -> None:
+        self.max_age = max_age
+        self.min_similarity = min_similarity
+        self.loaded_at: Optional[float] = None
+
+        self._users: dict[int, User] = {}
+        self._tokens: dict[int, tuple[str, ...]] = {}
+        self._trigrams: defaultdict[str, set[int]] = defaultdict(set)
+        self._prefix: list[tuple[str, int]] = []
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.max_age
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def load(self, users: Iterable[User]) -> None:
+        """
+        Полная замена содержимого индекса снимком пользователей
+        """
+        index = UserSearchIndex(self.max_age, self.min_similarity)
+        for user in users:
+            index._add(user)
+        index._prefix = sorted(
+            (token, user_id) for user_id, tokens in index._tokens.items() for token in tokens
+        )
+
+        self._users = index._users
+        self._tokens = index._tokens
+        self._trigrams = index._trigrams
+        self._prefix = index._prefix
+        self.loaded_at = time.monotonic()
+
+    async def refresh(self, session: AsyncSession) -> int:
+        """
+        Перезагрузка индекса из RegisteredUsers
+
+        :param session: Сессия БД STPMain
+        :return: Кол-во пользователей в индексе
+        """
+        result = await session.execute(select(User).where(User.FIO.is_not(None)))
+        self.load(result.scalars().all())
+
+        logger.info("[Кэш] Индекс поиска сотрудников перезагружен: %s пользователей", len(self))
+        return len(self)
+
+    def upsert(self, user: User) -> None:
+        """
+        Точечное обновление пользователя в индексе
+        """
+        self.remove(user.id)
+        for token in self._add(user):
+            bisect.insort(self._prefix, (token, user.id))
+
+    def remove(self, user_id: int) -> None:
+        """
+        Удаление пользователя из индекса
+        """
+        self._users.pop(user_id, None)
+        for token in self._tokens.pop(user_id, ()):
+            position = bisect.bisect_left(self._prefix, (token, user_id))
+            if position < len(self._prefix) and self._prefix[position] == (token, user_id):
+                del self._prefix[position]
+            for trigram in trigrams(token):
+                postings = self._trigrams.get(trigram)
+                if postings is not None:
+                    postings.discard(user_id)
+                    if not postings:
+                        del self._trigrams[trigram]
+
+    def search(self, query: str, limit: int = 10) -> Optional[list[User]]:
+        """
+        Поиск сотрудников по частям ФИО
+
+        :param query: Частичное или полное ФИО, возможно с опечатками
+        :param limit: Максимальное количество результатов
+        :return: Пользователи по убыванию релевантности или None, если индекс устарел
+        """
+        if not self.is_fresh:
+            return None
+
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        candidates: Optional[set[int]] = None
+        for token in sorted(query_tokens, key=len, reverse=True):
+            token_candidates = self._candidates(token)
+            candidates = token_candidates if candidates is None else candidates & token_candidates
+            if not candidates:
+                return []
+
+        scored = []
+        for user_id in candidates:
+            score = self._score(query_tokens, self._tokens[user_id])
+            if score is not None:
+                scored.append((-score, self._users[user_id].FIO, user_id))
+
+        return [self._users[user_id] for _, _, user_id in heapq.nsmallest(limit, scored)]
+
+    def _add(self, user: User) -> tuple[str, ...]:
+        tokens = tokenize(user.FIO)
+        if not tokens:
+            return ()
+
+        self._users[user.id] = user
+        self._tokens[user.id] = tokens
+        for token in tokens:
+            for trigram in trigrams(token):
+                self._trigrams[trigram].add(user.id)
+        return tokens
+
+    def _candidates(self, token: str) -> set[int]:
+        candidates = set()
+
+        position = bisect.bisect_left(self._prefix, (token,))
+        while position < len(self._prefix) and self._prefix[position][0].startswith(token):
+            candidates.add(self._prefix[position][1])
+            position += 1
+
+        # Подстроки и опечатки ищутся только для слов от трёх букв
+        if len(token) < 3:
+            return candidates
+
+        # Подстрока: у пользователя есть все внутренние триграммы слова
+        postings = sorted((self._trigrams.get(t, set()) for t in inner_trigrams(token)), key=len)
+        candidates |= postings[0].intersection(*postings[1:])
+
+        # Опечатка: при required общих триграммах из n хотя бы одна найдётся среди n - required + 1 самых редких
+        query_trigrams = trigrams(token)
+        required = math.ceil(self.min_similarity * len(query_trigrams))
+        postings = sorted((self._trigrams.get(t, set()) for t in query_trigrams), key=len)
+        for user_id in set().union(*postings[:len(postings) - required + 1]) - candidates:
+            hits = sum(user_id in self._trigrams.get(t, ()) for t in query_trigrams)
+            if hits >= required:
+                candidates.add(user_id)
+        return candidates
+
+    def _score(self, query_tokens: tuple[str, ...], user_tokens: tuple[str, ...]) -> Optional[float]:
+        """
+        Суммарный вес лучших совпадений слов запроса с разными словами ФИО или None
+        """
+        available = list(user_tokens)
+        total = 0.0
+        for token in sorted(query_tokens, key=len, reverse=True):
+            best, best_index = 0.0, None
+            for index, user_token in enumerate(available):
+                score = match_score(token, user_token, self.min_similarity)
+                if score > best:
+                    best, best_index = score, index
+            if best_index is None:
+                return None
+
+            total += best
+            del available[best_index]
+        return total
+
+
+user_search = UserSearchIndex()
+
+
+async def refresh_search_index_job(session_pool, interval: int) -> None:
+    """
+    Фоновая задача периодической перезагрузки индекса поиска сотрудников
+
+    :param session_pool: Пул сессий БД STPMain
+    :param interval: Интервал между перезагрузками в секундах
+    """
+    while True:
+        try:
+            async with session_pool() as session:
+                await user_search.refresh(session)
+        except Exception as e:
+            logger.error("[Кэш] Ошибка перезагрузки индекса поиска сотрудников: %s", e)
+        await asyncio.sleep(interval)
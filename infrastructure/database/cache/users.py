@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, Optional
+
+from infrastructure.database.models import User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UserCacheStats:
+    """
+    Счётчики кэша пользователей
+
+    Attributes:
+        hits: Кол-во ответов из кэша
+        misses: Кол-во запросов в БД
+        coalesced: Кол-во промахов, дождавшихся уже идущего запроса в БД
+        evictions: Кол-во вытесненных записей
+    """
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+
+class UserCache:
+    """
+    Ограниченный по размеру TTL/LRU кэш пользователей RegisteredUsers.
+
+    Пользователь доступен по ChatId, ФИО и username. Одновременные промахи по одному ключу
+    ждут один запрос в БД. Изменения ролей и новые регистрации видны не позже чем через ttl секунд.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 10000) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stats = UserCacheStats()
+
+        self._entries: OrderedDict[Hashable, tuple[float, Optional[User]]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    @staticmethod
+    def key(
+        user_id: Optional[int] = None,
+        username: Optional[str] = None,
+        fullname: Optional[str] = None,
+    ) -> Optional[Hashable]:
+        """
+        Ключ кэша для поиска ровно по одному полю, иначе None
+        """
+        keys = [
+            ("id", user_id) if user_id else None,
+            ("username", username) if username else None,
+            ("fio", fullname) if fullname else None,
+        ]
+        keys = [key for key in keys if key]
+        return keys[0] if len(keys) == 1 else None
+
+    async def get(
+        self, key: Hashable, loader: Callable[[], Awaitable[Optional[User]]]
+    ) -> Optional[User]:
+        """
+        Пользователь из кэша или из loader при промахе
+
+        :param key: Ключ кэша, см. UserCache.key
+        :param loader: Корутина-фабрика запроса пользователя из БД
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Запрос-лидер был отменён - идём в БД сами
+                return await loader()
+
+        self.stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            user = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Ошибку получат ожидающие, если они есть
+            raise
+        else:
+            self._store(key, user)
+            future.set_result(user)
+            return user
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(
+        self,
+        user_id: Optional[int] = None,
+        username: Optional[str] = None,
+        fullname: Optional[str] = None,
+    ) -> None:
+        """
+        Удаление пользователя из кэша по всем его ключам
+        """
+        keys = {("id", user_id), ("username", username), ("fio", fullname)}
+        for key in list(keys):
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None:
+                keys |= set(self._user_keys(entry[1]))
+
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _store(self, key: Hashable, user: Optional[User]) -> None:
+        expires_at = time.monotonic() + self.ttl
+
+        keys = [key] if user is None else [key, *self._user_keys(user)]
+        for user_key in keys:
+            self._entries[user_key] = (expires_at, user)
+            self._entries.move_to_end(user_key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    @staticmethod
+    def _user_keys(user: User) -> list[Hashable]:
+        keys = []
+        if user.ChatId:
+            keys.append(("id", user.ChatId))
+        if user.Username:
+            keys.append(("username", user.Username))
+        if user.FIO:
+            keys.append(("fio", user.FIO))
+        return keys
+
+
+user_cache = UserCache()
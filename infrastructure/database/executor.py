@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class DriverStats:
+    """
+    Счётчики вызовов драйвера в пуле потоков движка
+
+    Attributes:
+        calls: Кол-во завершённых вызовов
+        total_wait: Суммарное ожидание свободного потока (сек)
+        max_wait: Максимальное ожидание свободного потока (сек)
+        total_call: Суммарное время работы драйвера (сек)
+        queued: Вызовы, ждущие свободного потока
+        busy: Потоки, занятые вызовом драйвера
+    """
+
+    calls: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    total_call: float = 0.0
+    queued: int = 0
+    busy: int = 0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.calls if self.calls else 0.0
+
+    @property
+    def avg_call(self) -> float:
+        return self.total_call / self.calls if self.calls else 0.0
+
+
+class DriverExecutor(ThreadPoolExecutor):
+    """
+    Пул потоков для блокирующих вызовов pyodbc одного движка вместо общего executor цикла событий.
+
+    Разделяет время каждого вызова на ожидание свободного потока и работу драйвера:
+    рост первого - нехватка потоков в боте, рост второго - медленный ответ MSSQL
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "") -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.stats = DriverStats()
+        # Получатели (ожидание, работа драйвера) каждого вызова, вызываются в потоке пула
+        self.observers: list[Callable[[float, float], None]] = []
+        self._stats_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        submitted = time.perf_counter()
+        with self._stats_lock:
+            self.stats.queued += 1
+
+        def timed_call():
+            started = time.perf_counter()
+            with self._stats_lock:
+                self.stats.queued -= 1
+                self.stats.busy += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._record(started - submitted, time.perf_counter() - started)
+
+        return super().submit(timed_call)
+
+    def _record(self, wait: float, call: float) -> None:
+        with self._stats_lock:
+            stats = self.stats
+            stats.busy -= 1
+            stats.calls += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            stats.total_call += call
+
+        for observer in self.observers:
+            observer(wait, call)
+
+
+def create_driver_executor(name: str, max_workers: int) -> DriverExecutor:
+    """
+    Пул потоков драйвера для движка
+
+    :param name: Название для имён потоков, например имя БД
+    :param max_workers: Кол-во потоков: по одному на каждое соединение пула
+    """
+    return DriverExecutor(max_workers=max_workers, thread_name_prefix=f"odbc-{name}")
+
@@ -33,6 +33,8 @@ class Accrual(Base, TableNameMixin):
     """
     # TODO заменить название таблицы в БД на accruals
     __tablename__ = 'accurals'
+    # На таблице триггер снимков балансов, а OUTPUT без INTO с триггерами в MSSQL запрещён
+    __table_args__ = {"implicit_returning": False}
 
     Id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
     ChatId: Mapped[int] = mapped_column(BIGINT, nullable=False)
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from sqlalchemy import BIGINT
+from sqlalchemy.dialects.mssql import DATETIME2
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, TableNameMixin
+
+
+class Balance(Base, TableNameMixin):
+    """
+    Класс, представляющий снимок баланса пользователя в БД.
+
+    Снимок обновляется инкрементально при каждом начислении и покупке награды
+    и периодически сверяется с таблицами accurals и Executed.
+
+    Attributes:
+        ChatId (Mapped[int]): Идентификатор чата с пользователем в Telegram.
+        Accrued (Mapped[int]): Сумма баллов всех полученных достижений.
+        Spent (Mapped[int]): Сумма баллов, потраченных на награды.
+        UpdatedAt (Mapped[datetime]): Дата последнего изменения снимка.
+
+    Methods:
+        __repr__(): Returns a string representation of the Balance object.
+
+    Inherited Attributes:
+        Inherits from Base and TableNameMixin classes, which provide additional attributes and functionality.
+
+    Inherited Methods:
+        Inherits methods from Base and TableNameMixin classes, which provide additional functionality.
+
+    """
+    __tablename__ = "Balances"
+
+    ChatId: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=False)
+    Accrued: Mapped[int] = mapped_column(BIGINT, nullable=False, default=0)
+    Spent: Mapped[int] = mapped_column(BIGINT, nullable=False, default=0)
+    UpdatedAt: Mapped[datetime] = mapped_column(DATETIME2, nullable=False)
+
+    @property
+    def Current(self) -> int:
+        """
+        Текущее кол-во баллов пользователя
+        """
+        return self.Accrued - self.Spent
+
+    def __repr__(self):
+        return f"<Balance {self.ChatId} {self.Accrued} {self.Spent} {self.UpdatedAt}>"
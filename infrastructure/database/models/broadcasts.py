@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BIGINT, Integer, Unicode
+from sqlalchemy.dialects.mssql import DATETIME2
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, TableNameMixin
+
+
+class BroadcastJob(Base, TableNameMixin):
+    """
+    Класс, представляющий задачу рассылки в БД.
+
+    Получатели выбираются из RegisteredUsers по возрастанию id,
+    поэтому прогресс задачи хранится как id последнего обработанного получателя.
+
+    Attributes:
+        Id (Mapped[int]): Уникальный идентификатор задачи.
+        Text (Mapped[str]): Текст рассылки.
+        Division (Mapped[Optional[str]]): Фильтр по направлению.
+        Role (Mapped[Optional[int]]): Фильтр по роли.
+        Position (Mapped[Optional[str]]): Фильтр по должности.
+        Status (Mapped[str]): Статус задачи (running/paused/done).
+        LastUserId (Mapped[int]): id последнего обработанного получателя в RegisteredUsers.
+        Total (Mapped[int]): Кол-во получателей на момент создания задачи.
+        Sent (Mapped[int]): Кол-во доставленных сообщений.
+        Blocked (Mapped[int]): Кол-во получателей, заблокировавших бота.
+        Failed (Mapped[int]): Кол-во неудачных отправок.
+        CreatedBy (Mapped[int]): Идентификатор создателя задачи в Telegram.
+        CreatedAt (Mapped[datetime]): Дата создания задачи.
+        UpdatedAt (Mapped[datetime]): Дата последнего изменения задачи.
+        OwnerId (Mapped[Optional[str]]): Процесс, выполняющий задачу.
+        LeaseUntil (Mapped[Optional[datetime]]): До какого момента задача закреплена за OwnerId.
+
+    Methods:
+        __repr__(): Returns a string representation of the BroadcastJob object.
+
+    Inherited Attributes:
+        Inherits from Base and TableNameMixin classes, which provide additional attributes and functionality.
+
+    Inherited Methods:
+        Inherits methods from Base and TableNameMixin classes, which provide additional functionality.
+
+    """
+    __tablename__ = "BroadcastJobs"
+
+    Id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    Text: Mapped[str] = mapped_column(Unicode, nullable=False)
+    Division: Mapped[Optional[str]] = mapped_column(Unicode(255), nullable=True)
+    Role: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    Position: Mapped[Optional[str]] = mapped_column(Unicode(255), nullable=True)
+    Status: Mapped[str] = mapped_column(Unicode(32), nullable=False, default="running")
+    LastUserId: Mapped[int] = mapped_column(BIGINT, nullable=False, default=0)
+    Total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    Sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    Blocked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    Failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    CreatedBy: Mapped[int] = mapped_column(BIGINT, nullable=False)
+    CreatedAt: Mapped[datetime] = mapped_column(DATETIME2, nullable=False)
+    UpdatedAt: Mapped[datetime] = mapped_column(DATETIME2, nullable=False)
+    OwnerId: Mapped[Optional[str]] = mapped_column(Unicode(128), nullable=True)
+    LeaseUntil: Mapped[Optional[datetime]] = mapped_column(DATETIME2, nullable=True)
+
+    @property
+    def Processed(self) -> int:
+        """
+        Кол-во обработанных получателей
+        """
+        return self.Sent + self.Blocked + self.Failed
+
+    def __repr__(self):
+        return f"<BroadcastJob {self.Id} {self.Status} {self.LastUserId} {self.Processed}/{self.Total}>"
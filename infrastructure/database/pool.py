@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+
+from infrastructure.database.executor import DriverExecutor, DriverStats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    """
+    Счётчики ожидания соединений в пуле
+
+    Attributes:
+        checkouts: Кол-во выданных соединений
+        total_wait: Суммарное время ожидания соединения (сек)
+        max_wait: Максимальное время ожидания соединения (сек)
+        timeouts: Кол-во запросов, не дождавшихся соединения
+        liveness_checks: Кол-во проверок простаивающих соединений
+        liveness_failures: Кол-во проверок, нашедших разорванное соединение
+    """
+
+    checkouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    timeouts: int = 0
+    liveness_checks: int = 0
+    liveness_failures: int = 0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.checkouts if self.checkouts else 0.0
+
+
+class _TimedQueue(AsyncAdaptedQueue):
+    """
+    Очередь свободных соединений пула, сообщающая время ожидания в ней
+    """
+
+    on_wait: Optional[Callable[[float], None]] = None
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            if self.on_wait is not None:
+                self.on_wait(time.perf_counter() - started)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий время ожидания свободного соединения.
+    Учитывается только ожидание в очереди пула: открытие нового соединения в него не входит
+    """
+
+    _queue_class = _TimedQueue
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._pool.on_wait = self._record_wait
+        self.max_overflow = kwargs.get("max_overflow", 10)
+        self.stats = PoolStats()
+        # Получатели времени ожидания каждого соединения, например гистограмма метрик
+        self.wait_observers: list[Callable[[float], None]] = []
+        # Свой пул потоков драйвера движка, если задан в create_engine
+        self.executor: Optional[DriverExecutor] = None
+
+    def recreate(self) -> "TimedQueuePool":
+        # dispose() движка пересоздаёт пул, счётчики и подписчики переходят в новый
+        pool = super().recreate()
+        pool.stats = self.stats
+        pool.wait_observers = self.wait_observers
+        pool.executor = self.executor
+        return pool
+
+    def _do_get(self):
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            # Ошибки открытия соединения - не таймаут пула
+            self.stats.timeouts += 1
+            raise
+
+        self.stats.checkouts += 1
+        return connection
+
+    def _record_wait(self, wait: float) -> None:
+        self.stats.total_wait += wait
+        self.stats.max_wait = max(self.stats.max_wait, wait)
+        for observer in self.wait_observers:
+            observer(wait)
+
+
+@dataclass
+class PoolState:
+    """
+    Снимок состояния пула соединений
+
+    Attributes:
+        size: Постоянный размер пула
+        max_overflow: Сколько соединений можно открыть сверх размера
+        checked_out: Выданные соединения
+        idle: Свободные соединения в пуле
+        overflow: Открытые сверх размера соединения
+        stats: Счётчики ожидания и проверок, если пул их ведёт
+        threads: Потоки драйвера движка, 0 - общий executor цикла событий
+        driver: Счётчики вызовов драйвера в потоках движка
+    """
+
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    stats: Optional[PoolStats] = None
+    threads: int = 0
+    driver: Optional[DriverStats] = None
+
+
+def pool_state(engine: AsyncEngine) -> PoolState:
+    """
+    Состояние пула соединений движка
+
+    :param engine: Асинхронный движок SQLAlchemy
+    """
+    pool = engine.sync_engine.pool
+    executor = getattr(pool, "executor", None)
+    return PoolState(
+        size=pool.size(),
+        max_overflow=getattr(pool, "max_overflow", 0),
+        checked_out=pool.checkedout(),
+        idle=pool.checkedin(),
+        # До заполнения пула overflow() отрицательный
+        overflow=max(pool.overflow(), 0),
+        stats=getattr(pool, "stats", None),
+        threads=executor._max_workers if executor else 0,
+        driver=executor.stats if executor else None,
+    )
+
+
+def pool_report(name: str, engine: AsyncEngine) -> str:
+    """
+    Текстовый отчёт о состоянии пула соединений движка
+
+    :param name: Название движка для отчёта
+    :param engine: Асинхронный движок SQLAlchemy
+    """
+    state = pool_state(engine)
+    report = (
+        f"{name}: занято {state.checked_out} из {state.size}+{state.max_overflow}, "
+        f"свободно {state.idle}, переполнение {state.overflow}"
+    )
+
+    stats = state.stats
+    if stats is not None:
+        report += (
+            f", выдано {stats.checkouts}, ожидание avg {stats.avg_wait * 1000:.1f} мс"
+            f" / max {stats.max_wait * 1000:.1f} мс, таймаутов {stats.timeouts}"
+            f", проверок {stats.liveness_checks}, разрывов {stats.liveness_failures}"
+        )
+
+    driver = state.driver
+    if driver is not None:
+        report += (
+            f"\nпотоки драйвера: занято {driver.busy} из {state.threads}, в очереди {driver.queued}"
+            f", вызовов {driver.calls}, ожидание потока avg {driver.avg_wait * 1000:.1f} мс"
+            f" / max {driver.max_wait * 1000:.1f} мс, драйвер avg {driver.avg_call * 1000:.1f} мс"
+        )
+    return report
+
+
+async def check_liveness(name: str, engine: AsyncEngine) -> bool:
+    """
+    Проверка простаивающих соединений пула запросом SELECT 1 вместо pool_pre_ping на каждой выдаче.
+
+    Очередь пула FIFO, поэтому последовательные выдачи проходят по всем свободным соединениям.
+    На разорванном соединении SQLAlchemy помечает недействительными и все более старые соединения пула,
+    они переоткрываются при следующей выдаче
+
+    :param name: Название движка для лога
+    :param engine: Асинхронный движок SQLAlchemy
+    :return: Все проверенные соединения живы
+    """
+    pool = engine.sync_engine.pool
+    for _ in range(pool.checkedin()):
+        # Соединения разобрали хендлеры - новые ради проверки не открываем
+        if not pool.checkedin():
+            break
+
+        pool.stats.liveness_checks += 1
+        try:
+            async with engine.connect() as connection:
+                await connection.exec_driver_sql("SELECT 1")
+        except DBAPIError as e:
+            pool.stats.liveness_failures += 1
+            logger.warning("[БД] Пул %s: соединение не прошло проверку: %s", name, e)
+            return False
+    return True
+
+
+async def pool_liveness_job(engines: dict[str, AsyncEngine], interval: int) -> None:
+    """
+    Фоновая задача периодической проверки простаивающих соединений
+
+    :param engines: Движки по названиям
+    :param interval: Интервал между проверками в секундах
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for name, engine in engines.items():
+            try:
+                await check_liveness(name, engine)
+            except Exception as e:
+                logger.error("[БД] Пул %s: ошибка проверки соединений: %s", name, e)
+
+
+async def log_pool_stats_job(engines: dict[str, AsyncEngine], interval: int = 60) -> None:
+    """
+    Фоновая задача периодического логирования состояния пулов
+
+    :param engines: Движки по названиям
+    :param interval: Интервал между отчётами в секундах
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for name, engine in engines.items():
+            logger.info("[БД] Пул %s", pool_report(name, engine))
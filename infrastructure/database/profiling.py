@@ -0,0 +1,126 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclass
+class QueryProfile:
+    """
+    Запросы к БД, выполненные при обработке одного обновления
+
+    Attributes:
+        handler: Хендлер, обрабатывающий обновление
+        count: Кол-во запросов
+        elapsed: Суммарное время запросов (сек)
+        fingerprints: Кол-во запросов по отпечатку
+        parent: Внешний учёт, например бенчмарка, в который запросы тоже попадают
+    """
+
+    handler: str
+    count: int = 0
+    elapsed: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+    parent: Optional["QueryProfile"] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        profile = self
+        while profile is not None:
+            profile.count += 1
+            profile.elapsed += elapsed
+            profile.fingerprints[statement] += 1
+            profile = profile.parent
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Отпечатки, выполненные не меньше threshold раз - признак N+1
+        """
+        return [(fingerprint, count) for fingerprint, count in self.fingerprints.items() if count >= threshold]
+
+
+_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Отпечаток запроса: литералы заменены на ?, списки параметров IN свёрнуты, пробелы нормализованы.
+    Запросы, отличающиеся только значениями, получают одинаковый отпечаток
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDERS_LIST.sub("(?...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+@contextmanager
+def profile_queries(handler: str) -> Iterator[QueryProfile]:
+    """
+    Учёт запросов, выполненных внутри блока, например при обработке обновления.
+    Вложенный учёт передаёт запросы и во внешний
+
+    :param handler: Название хендлера для логов медленных запросов
+    """
+    profile = QueryProfile(handler=handler, parent=_profile.get())
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+def profile_engine(engine: AsyncEngine, slow_query_ms: float) -> None:
+    """
+    Подключение учёта запросов и лога медленных запросов к движку
+
+    :param engine: Асинхронный движок SQLAlchemy
+    :param slow_query_ms: Порог медленного запроса в миллисекундах, 0 - лог выключен
+    """
+    sync_engine = engine.sync_engine
+    slow_query_seconds = slow_query_ms / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profile_started"].pop()
+
+        profile = _profile.get()
+        if profile is not None:
+            profile.record(fingerprint(statement), elapsed)
+
+        if slow_query_seconds and elapsed >= slow_query_seconds:
+            handler = profile.handler if profile is not None else "вне обновления"
+            logger.warning(
+                "[БД] Медленный запрос %.0f мс в %s: %s",
+                elapsed * 1000,
+                handler,
+                fingerprint(statement),
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("profile_started"):
+            connection.info["profile_started"].pop()
@@ -1,16 +1,44 @@
 import logging
-from typing import Sequence, Optional
+from typing import Any, Sequence, Optional
 
-from sqlalchemy import select, func, or_
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import (
+    BIGINT,
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Unicode,
+    func,
+    insert,
+    or_,
+    select,
+)
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from infrastructure.database.models.accruals import Accrual
 from infrastructure.database.repo.base import BaseRepo
-from tgbot.services.logger import setup_logging
+from infrastructure.database.timeouts import query_timeout
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
+# Сколько раз повторять пакет, пересёкшийся по ключу с параллельной загрузкой
+INGEST_ATTEMPTS = 3
+
+# Временная таблица сессии для пакетной загрузки начислений
+accruals_staging = Table(
+    "#AccrualsStaging",
+    MetaData(),
+    Column("ChatId", BIGINT, nullable=False),
+    Column("FIO", Unicode(255), nullable=False),
+    Column("Name", String(255), nullable=False),
+    Column("TargetKPI", String(255), nullable=False),
+    Column("Point", Integer, nullable=False),
+    Column("Period", String(255), nullable=False),
+    Column("Date", String(255), nullable=False),
+)
+
 
 class AccrualRepo(BaseRepo):
     async def accruals_sum(self, user_id: int) -> int:
@@ -28,6 +56,126 @@ class AccrualRepo(BaseRepo):
 
         return total or 0
 
+    @query_timeout(writes=True)
+    async def add_accrual(self, accrual: Accrual) -> Accrual:
+        """
+        Добавление начисления. Снимок баланса увеличивает триггер TR_accurals_Balances
+
+        Args:
+            accrual: Объект модели Accrual
+
+        Returns:
+            Добавленный объект Accrual
+        """
+        self.session.add(accrual)
+        await self.session.commit()
+        await self.session.refresh(accrual)
+        return accrual
+
+    async def accrual_history(
+            self,
+            user_id: int,
+            before_id: Optional[int] = None,
+            after_id: Optional[int] = None,
+            limit: int = 5,
+    ) -> tuple[list[Row], bool]:
+        """
+        Страница истории начислений пользователя от новых к старым с keyset-пагинацией по Id.
+        Стоимость любой страницы одинакова - поиск по индексу (ChatId, Id) без OFFSET
+
+        Args:
+            user_id: Идентификатор пользователя в Telegram
+            before_id: Id последнего начисления предыдущей страницы, для перехода к более старым
+            after_id: Id первого начисления текущей страницы, для возврата к более новым
+            limit: Размер страницы
+
+        Returns:
+            Начисления страницы (Id, Name, TargetKPI, Point, Period, Date) от новых к старым
+            и признак наличия следующей страницы в направлении перехода
+        """
+        query = select(
+            Accrual.Id,
+            Accrual.Name,
+            Accrual.TargetKPI,
+            Accrual.Point,
+            Accrual.Period,
+            Accrual.Date,
+        ).where(Accrual.ChatId == user_id)
+
+        if after_id:
+            query = query.where(Accrual.Id > after_id).order_by(Accrual.Id.asc())
+        else:
+            if before_id:
+                query = query.where(Accrual.Id < before_id)
+            query = query.order_by(Accrual.Id.desc())
+
+        try:
+            result = await self.session.execute(query.limit(limit + 1))
+            rows = list(result.all())
+        except SQLAlchemyError as e:
+            logger.error("[БД] Ошибка получения истории начислений: %s", e)
+            return [], False
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if after_id:
+            rows.reverse()
+        return rows, has_more
+
+    # Пакет выгрузки вставляется и проверяется на дубли целиком
+    @query_timeout(120, writes=True)
+    async def ingest_accruals(self, rows: Sequence[dict[str, Any]]) -> int:
+        """
+        Пакетная загрузка начислений без дублей по ключу (ChatId, Name, Period)
+        Пакет вставляется во временную таблицу одним executemany, в accurals переносятся только новые строки,
+        снимки балансов увеличивает триггер TR_accurals_Balances.
+        Нарушение уникального ключа значит, что параллельная загрузка уже вставила часть строк:
+        пакет повторяется, и NOT EXISTS пропускает их как загруженные
+
+        Args:
+            rows: Строки начислений с ключами ChatId, FIO, Name, TargetKPI, Point, Period, Date,
+                без повторов ключа внутри пакета
+
+        Returns:
+            Кол-во вставленных начислений
+        """
+        for attempt in range(1, INGEST_ATTEMPTS + 1):
+            try:
+                return await self._ingest_batch(rows)
+            except IntegrityError as e:
+                await self.session.rollback()
+                if attempt == INGEST_ATTEMPTS:
+                    raise
+                logger.info("[Загрузка] Пакет пересёкся с параллельной загрузкой, повтор %s: %s", attempt, e)
+
+    async def _ingest_batch(self, rows: Sequence[dict[str, Any]]) -> int:
+        connection = await self.session.connection()
+        # Таблица могла остаться на соединении после прерванной загрузки
+        await connection.run_sync(accruals_staging.drop, checkfirst=True)
+        await connection.run_sync(accruals_staging.create)
+
+        staged = accruals_staging.c
+        columns = ["ChatId", "FIO", "Name", "TargetKPI", "Point", "Period", "Date"]
+        duplicate = (
+            select(Accrual.Id)
+            .where(
+                Accrual.ChatId == staged.ChatId,
+                Accrual.Name == staged.Name,
+                Accrual.Period == staged.Period,
+            )
+            .exists()
+        )
+        insert_stmt = insert(Accrual.__table__).from_select(
+            columns, select(*(staged[column] for column in columns)).where(~duplicate)
+        )
+
+        await self.session.execute(insert(accruals_staging), list(rows))
+        inserted = (await self.session.execute(insert_stmt)).rowcount
+
+        await connection.run_sync(accruals_staging.drop)
+        await self.session.commit()
+        return inserted
+
     async def user_accruals(
             self,
             user_id: Optional[int] = None,
@@ -60,5 +208,5 @@ class AccrualRepo(BaseRepo):
             result = await self.session.execute(query)
             return result.scalars().all()
         except SQLAlchemyError as e:
-            logger.error(f"[БД] Ошибка получения начислений пользователя: {e}")
+            logger.error("[БД] Ошибка получения начислений пользователя: %s", e)
             return []
@@ -1,42 +1,33 @@
-from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import select, and_, extract
-
+from infrastructure.database.cache import awards_catalog
 from infrastructure.database.models.awards import Awards
-from infrastructure.database.models.executes import Execute
 from infrastructure.database.repo.base import BaseRepo
 
 
 class AwardsRepo(BaseRepo):
     async def get_awards(self):
         """
-        Получаем полный список наград
+        Получаем полный список наград из каталога
         """
+        await awards_catalog.ensure_fresh(self.session)
 
-        select_stmt = select(Awards)
-
-        result = await self.session.execute(select_stmt)
-        awards = result.scalars().all()
-
-        return list(awards)
+        return awards_catalog.all()
 
     async def get_award(self, award_id: int) -> Optional[Awards]:
         """
-        Получение информации о награде по ее идентификатору
+        Получение информации о награде по ее идентификатору из каталога
 
         Args:
             award_id: Уникальный идентификатор награды в таблице Awards
         """
+        await awards_catalog.ensure_fresh(self.session)
 
-        select_stmt = select(Awards).where(Awards.Id == award_id)
-        result = await self.session.execute(select_stmt)
-
-        return result.scalar_one()
+        return awards_catalog.get(award_id)
 
     async def get_available_awards(self, user_id: int, user_balance: int) -> List[Awards]:
         """
-        Получаем список наград, которые:
+        Получаем список наград из каталога, которые:
         1. Имеют название
         2. Стоимость награды меньше или равна кол-ву очков пользователя
         """
@@ -56,19 +47,6 @@ class AwardsRepo(BaseRepo):
         #     )
         # )
 
-        # Получаем список наград, подходящих под критерии
-        select_stmt = (
-            select(Awards)
-            .where(
-                and_(
-                    Awards.Name.isnot(None),
-                    Awards.Sum <= user_balance,
-                    # Awards.Name.notin_(executed_awards_subquery)
-                )
-            )
-        )
-
-        result = await self.session.execute(select_stmt)
-        awards = result.scalars().all()
+        await awards_catalog.ensure_fresh(self.session)
 
-        return list(awards)
+        return awards_catalog.available(user_balance)
@@ -0,0 +1,148 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import BIGINT, insert, literal, select, update, func, or_
+from sqlalchemy.dialects.mssql import DATETIME2
+from sqlalchemy.exc import IntegrityError
+
+from infrastructure.database.models.accruals import Accrual
+from infrastructure.database.models.balances import Balance
+from infrastructure.database.models.executes import Execute
+from infrastructure.database.repo.base import BaseRepo
+from infrastructure.database.routing import use_primary
+from infrastructure.database.timeouts import query_timeout
+
+logger = logging.getLogger(__name__)
+
+
+class BalanceRepo(BaseRepo):
+    @query_timeout(writes=True)
+    async def get_balance(self, user_id: int) -> Balance:
+        """
+        Получение баланса пользователя из снимка по первичному ключу.
+        Если снимка ещё нет - он однократно строится по таблицам начислений и наград
+
+        :param user_id: Идентификатор пользователя в Telegram
+        :return: Объект Balance
+        """
+        select_stmt = (
+            select(Balance)
+            .where(Balance.ChatId == user_id)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(select_stmt)
+        balance = result.scalar_one_or_none()
+
+        if balance is None:
+            balance = await self._build_balance(user_id)
+
+        return balance
+
+    @query_timeout(writes=True)
+    async def add_spent(self, user_id: int, points: int) -> None:
+        """
+        Инкрементальное увеличение суммы потраченных баллов в снимке.
+        Коммит остаётся за вызывающим кодом, чтобы снимок менялся в одной транзакции с покупкой
+
+        :param user_id: Идентификатор пользователя в Telegram
+        :param points: Кол-во потраченных баллов
+        """
+        await self._increment(user_id, spent=points)
+
+    # Полная сверка по агрегатам всех начислений, выполняется фоновой задачей
+    @query_timeout(300, writes=True)
+    async def reconcile(self) -> int:
+        """
+        Сверка снимков балансов с таблицами accurals и Executed.
+        Расхождения логируются и исправляются на разницу, а не абсолютным значением:
+        начисления и покупки, пришедшие после чтения сумм, не затираются
+
+        :return: Кол-во исправленных снимков
+        """
+        # Сверка по отстающей реплике "исправила" бы свежие снимки
+        use_primary(self.session)
+
+        accrued = (
+            select(Accrual.ChatId, func.sum(Accrual.Point).label("total"))
+            .group_by(Accrual.ChatId)
+            .subquery()
+        )
+        spent = (
+            select(Execute.ChatId, func.sum(Execute.Executing).label("total"))
+            .group_by(Execute.ChatId)
+            .subquery()
+        )
+        accrued_total = func.coalesce(accrued.c.total, 0)
+        spent_total = func.coalesce(spent.c.total, 0)
+
+        select_stmt = (
+            select(Balance.ChatId, Balance.Accrued, Balance.Spent, accrued_total, spent_total)
+            .outerjoin(accrued, accrued.c.ChatId == Balance.ChatId)
+            .outerjoin(spent, spent.c.ChatId == Balance.ChatId)
+            .where(or_(Balance.Accrued != accrued_total, Balance.Spent != spent_total))
+        )
+        result = await self.session.execute(select_stmt)
+        drifts = result.all()
+
+        for chat_id, snapshot_accrued, snapshot_spent, actual_accrued, actual_spent in drifts:
+            logger.warning(
+                "[Баланс] Расхождение снимка %s: начислено %s -> %s, потрачено %s -> %s",
+                chat_id,
+                snapshot_accrued,
+                actual_accrued,
+                snapshot_spent,
+                actual_spent,
+            )
+            await self.session.execute(
+                update(Balance)
+                .where(Balance.ChatId == chat_id)
+                .values(
+                    Accrued=Balance.Accrued + (actual_accrued - snapshot_accrued),
+                    Spent=Balance.Spent + (actual_spent - snapshot_spent),
+                    UpdatedAt=datetime.now(),
+                )
+            )
+
+        await self.session.commit()
+        return len(drifts)
+
+    async def _increment(self, user_id: int, spent: int = 0) -> None:
+        # Если снимка ещё нет, он будет построен при первом чтении уже с учётом новой записи
+        await self.session.execute(
+            update(Balance)
+            .where(Balance.ChatId == user_id)
+            .values(Spent=Balance.Spent + spent, UpdatedAt=datetime.now())
+        )
+
+    async def _build_balance(self, user_id: int) -> Balance:
+        # Снимок записывается в основную БД, поэтому и суммы читаются из неё
+        use_primary(self.session)
+
+        # Суммы и вставка снимка - один запрос. HOLDLOCK держит диапазон ключей пользователя до коммита,
+        # поэтому параллельные начисление или покупка ждут снимка и увеличивают уже его, а не пропадают
+        accrued = (
+            select(func.coalesce(func.sum(Accrual.Point), 0))
+            .where(Accrual.ChatId == user_id)
+            .with_hint(Accrual, "WITH (HOLDLOCK)", "mssql")
+            .scalar_subquery()
+        )
+        spent = (
+            select(func.coalesce(func.sum(Execute.Executing), 0))
+            .where(Execute.ChatId == user_id)
+            .with_hint(Execute, "WITH (HOLDLOCK)", "mssql")
+            .scalar_subquery()
+        )
+        insert_stmt = insert(Balance).from_select(
+            ["ChatId", "Accrued", "Spent", "UpdatedAt"],
+            select(literal(user_id, BIGINT), accrued, spent, literal(datetime.now(), DATETIME2)),
+        )
+
+        try:
+            await self.session.execute(insert_stmt)
+            await self.session.commit()
+        except IntegrityError:
+            # Снимок уже построен параллельным запросом
+            await self.session.rollback()
+
+        result = await self.session.execute(select(Balance).where(Balance.ChatId == user_id))
+        return result.scalar_one()
@@ -1,10 +1,18 @@
+import inspect
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from infrastructure.database.timeouts import query_timeout
+
 
 class BaseRepo:
     """
     A class representing a base repository for handling database operations.
 
+    Public coroutine methods without their own query_timeout are treated as reads and get
+    the default timeout budget, capped by the handler deadline. Methods that write or commit
+    must declare ``query_timeout(writes=True)`` so a cancel never lands on a COMMIT.
+
     Attributes:
         session (AsyncSession): The database session used by the repository.
 
@@ -12,3 +20,10 @@ class BaseRepo:
 
     def __init__(self, session):
         self.session: AsyncSession = session
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for name, attr in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.iscoroutinefunction(attr) or hasattr(attr, "query_timeout"):
+                continue
+            setattr(cls, name, query_timeout()(attr))
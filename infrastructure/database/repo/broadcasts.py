@@ -0,0 +1,222 @@
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import func, literal_column, or_, select, update
+
+from infrastructure.database.models.broadcasts import BroadcastJob
+from infrastructure.database.repo.base import BaseRepo
+from infrastructure.database.timeouts import query_timeout
+
+
+def _lease_until(seconds: int):
+    # Время сервера БД, чтобы аренда не зависела от расхождения часов процессов
+    return func.dateadd(literal_column("second"), seconds, func.sysdatetime())
+
+
+class BroadcastJobRepo(BaseRepo):
+    @query_timeout(writes=True)
+    async def create_job(
+        self,
+        text: str,
+        created_by: int,
+        total: int,
+        division: Optional[str] = None,
+        role: Optional[int] = None,
+        position: Optional[str] = None,
+    ) -> BroadcastJob:
+        """
+        Создание задачи рассылки
+
+        Args:
+            text: Текст рассылки
+            created_by: Идентификатор создателя задачи в Telegram
+            total: Кол-во получателей
+            division: Фильтр по направлению
+            role: Фильтр по роли
+            position: Фильтр по должности
+        """
+        now = datetime.now()
+        job = BroadcastJob(
+            Text=text,
+            Division=division,
+            Role=role,
+            Position=position,
+            Status="running",
+            LastUserId=0,
+            Total=total,
+            Sent=0,
+            Blocked=0,
+            Failed=0,
+            CreatedBy=created_by,
+            CreatedAt=now,
+            UpdatedAt=now,
+        )
+
+        self.session.add(job)
+        await self.session.commit()
+        await self.session.refresh(job)
+        return job
+
+    async def get_job(self, job_id: int) -> Optional[BroadcastJob]:
+        """
+        Получение задачи рассылки по идентификатору
+
+        Args:
+            job_id: Уникальный идентификатор задачи
+        """
+        select_stmt = (
+            select(BroadcastJob)
+            .where(BroadcastJob.Id == job_id)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(select_stmt)
+        return result.scalar_one_or_none()
+
+    async def get_jobs(self, status: Optional[str] = None, limit: int = 10) -> Sequence[BroadcastJob]:
+        """
+        Получение последних задач рассылки
+
+        Args:
+            status: Фильтр по статусу
+            limit: Максимальное количество результатов
+        """
+        select_stmt = select(BroadcastJob).order_by(BroadcastJob.Id.desc()).limit(limit)
+        if status:
+            select_stmt = select_stmt.where(BroadcastJob.Status == status)
+
+        result = await self.session.execute(select_stmt)
+        return result.scalars().all()
+
+    async def get_unclaimed_jobs(self, limit: int = 100) -> Sequence[BroadcastJob]:
+        """
+        Выполняющиеся задачи рассылки без живой аренды: новые, продолженные или брошенные упавшим процессом
+
+        Args:
+            limit: Максимальное количество результатов
+        """
+        select_stmt = (
+            select(BroadcastJob)
+            .where(
+                BroadcastJob.Status == "running",
+                or_(BroadcastJob.LeaseUntil.is_(None), BroadcastJob.LeaseUntil < func.sysdatetime()),
+            )
+            .order_by(BroadcastJob.Id)
+            .limit(limit)
+        )
+        result = await self.session.execute(select_stmt)
+        return result.scalars().all()
+
+    @query_timeout(writes=True)
+    async def claim_job(self, job_id: int, owner: str, lease_seconds: int) -> bool:
+        """
+        Атомарный захват задачи рассылки процессом.
+        Удаётся, только если задача выполняется, а её аренда свободна, истекла или уже принадлежит процессу
+
+        Args:
+            job_id: Уникальный идентификатор задачи
+            owner: Идентификатор процесса
+            lease_seconds: Срок аренды в секундах
+
+        Returns:
+            True, если задача закреплена за процессом
+        """
+        result = await self.session.execute(
+            update(BroadcastJob)
+            .where(
+                BroadcastJob.Id == job_id,
+                BroadcastJob.Status == "running",
+                or_(
+                    BroadcastJob.LeaseUntil.is_(None),
+                    BroadcastJob.LeaseUntil < func.sysdatetime(),
+                    BroadcastJob.OwnerId == owner,
+                ),
+            )
+            .values(OwnerId=owner, LeaseUntil=_lease_until(lease_seconds))
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    @query_timeout(writes=True)
+    async def renew_lease(self, job_id: int, owner: str, lease_seconds: int) -> bool:
+        """
+        Продление аренды выполняющейся задачи её процессом
+
+        Args:
+            job_id: Уникальный идентификатор задачи
+            owner: Идентификатор процесса
+            lease_seconds: Срок аренды в секундах
+
+        Returns:
+            False, если задачу поставили на паузу или её захватил другой процесс
+        """
+        result = await self.session.execute(
+            update(BroadcastJob)
+            .where(
+                BroadcastJob.Id == job_id,
+                BroadcastJob.Status == "running",
+                BroadcastJob.OwnerId == owner,
+            )
+            .values(LeaseUntil=_lease_until(lease_seconds))
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    @query_timeout(writes=True)
+    async def release_lease(self, job_id: int, owner: str) -> None:
+        """
+        Освобождение аренды задачи, например при остановке процесса, чтобы её сразу подхватил следующий
+
+        Args:
+            job_id: Уникальный идентификатор задачи
+            owner: Идентификатор процесса
+        """
+        await self.session.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.Id == job_id, BroadcastJob.OwnerId == owner)
+            .values(OwnerId=None, LeaseUntil=None)
+        )
+        await self.session.commit()
+
+    @query_timeout(writes=True)
+    async def set_status(self, job_id: int, status: str) -> None:
+        """
+        Изменение статуса задачи рассылки
+
+        Args:
+            job_id: Уникальный идентификатор задачи
+            status: Новый статус (running/paused/done)
+        """
+        await self.session.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.Id == job_id)
+            .values(Status=status, UpdatedAt=datetime.now())
+        )
+        await self.session.commit()
+
+    @query_timeout(writes=True)
+    async def save_checkpoint(
+        self, job_id: int, owner: str, last_user_id: int, sent: int, blocked: int, failed: int
+    ) -> None:
+        """
+        Сохранение прогресса задачи рассылки процессом, за которым она закреплена
+
+        Args:
+            job_id: Уникальный идентификатор задачи
+            owner: Идентификатор процесса
+            last_user_id: id последнего обработанного получателя, все получатели до него обработаны
+            sent: Кол-во доставленных сообщений
+            blocked: Кол-во получателей, заблокировавших бота
+            failed: Кол-во неудачных отправок
+        """
+        await self.session.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.Id == job_id, BroadcastJob.OwnerId == owner)
+            .values(
+                LastUserId=last_user_id,
+                Sent=sent,
+                Blocked=blocked,
+                Failed=failed,
+                UpdatedAt=datetime.now(),
+            )
+        )
+        await self.session.commit()
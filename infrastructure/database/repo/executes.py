@@ -6,7 +6,9 @@ from infrastructure.database.models import User
 from infrastructure.database.models.awards import Awards
 from infrastructure.database.models.executes import Execute
 from infrastructure.database.repo.awards import AwardsRepo
+from infrastructure.database.repo.balances import BalanceRepo
 from infrastructure.database.repo.base import BaseRepo
+from infrastructure.database.timeouts import query_timeout
 from tgbot.misc.roles import executed_codes
 
 
@@ -27,6 +29,7 @@ class ExecutesRepo(BaseRepo):
         return total or 0
 
 
+    @query_timeout(writes=True)
     async def add_pending_award(self, award: Awards, user: User, comment: str) -> Execute:
         """
         Добавление награды, запись в таблицу Executes
@@ -50,6 +53,9 @@ class ExecutesRepo(BaseRepo):
         )
 
         self.session.add(insert_stmt)
+        await BalanceRepo(self.session).add_spent(
+            user_id=user.ChatId, points=insert_stmt.Executing
+        )
         await self.session.commit()
         await self.session.refresh(insert_stmt)
         return insert_stmt
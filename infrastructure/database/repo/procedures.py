@@ -4,9 +4,11 @@ from sqlalchemy import select
 
 from infrastructure.database.models import User
 from infrastructure.database.repo.base import BaseRepo
+from infrastructure.database.timeouts import query_timeout
 
 
 class ProceduresRepo(BaseRepo):
+    @query_timeout(writes=True)
     async def run_procedure(self, proc_name):
         proc_stmt = (
             f"EXEC {proc_name}"
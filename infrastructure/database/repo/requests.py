@@ -4,6 +4,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from infrastructure.database.repo.accruals import AccrualRepo
 from infrastructure.database.repo.awards import AwardsRepo
+from infrastructure.database.repo.balances import BalanceRepo
+from infrastructure.database.repo.broadcasts import BroadcastJobRepo
 from infrastructure.database.repo.buffer import BufferRepo
 from infrastructure.database.repo.executes import ExecutesRepo
 from infrastructure.database.repo.users import UserRepo
@@ -40,6 +42,20 @@ class RequestsRepo:
         """
         return AwardsRepo(self.session)
 
+    @property
+    def balances(self) -> BalanceRepo:
+        """
+        The Balance repository sessions are required to manage balance snapshot operations.
+        """
+        return BalanceRepo(self.session)
+
+    @property
+    def broadcasts(self) -> BroadcastJobRepo:
+        """
+        The BroadcastJob repository sessions are required to manage broadcast job operations.
+        """
+        return BroadcastJobRepo(self.session)
+
     @property
     def executes(self) -> ExecutesRepo:
         """
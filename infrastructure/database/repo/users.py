@@ -1,14 +1,14 @@
 import logging
 from typing import Optional, List, Sequence
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func
 from sqlalchemy.exc import SQLAlchemyError
 
+from infrastructure.database.cache import user_cache, user_search
 from infrastructure.database.models import User
 from infrastructure.database.repo.base import BaseRepo
-from tgbot.services.logger import setup_logging
+from infrastructure.database.timeouts import query_timeout
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
 class UserRepo(BaseRepo):
@@ -21,6 +21,7 @@ class UserRepo(BaseRepo):
     ) -> Optional[User]:
         """
         Поиск пользователя в БД по фильтрам
+        Поиск ровно по одному из полей ChatId, ФИО или username обслуживается кэшем пользователей
 
         Args:
             user_id: Уникальный идентификатор пользователя Telegram
@@ -48,13 +49,24 @@ class UserRepo(BaseRepo):
         # Combine all filters using OR
         query = select(User).where(*filters)
 
-        try:
+        async def load() -> Optional[User]:
             result = await self.session.execute(query)
-            return result.scalar_one_or_none()
+            user = result.scalar_one_or_none()
+            if user is not None:
+                user_search.upsert(user)
+            return user
+
+        try:
+            cache_key = None if email else user_cache.key(user_id, username, fullname)
+            if cache_key is None:
+                return await load()
+            return await user_cache.get(cache_key, load)
         except SQLAlchemyError as e:
-            logger.error(f"[БД] Ошибка получения пользователя: {e}")
+            logger.error("[БД] Ошибка получения пользователя: %s", e)
             return None
 
+    # ILIKE '%...%' сканирует всю таблицу - не держим соединение, пока пользователь ждёт
+    @query_timeout(3)
     async def get_users_by_fio_parts(
             self,
             fullname: str,
@@ -63,6 +75,7 @@ class UserRepo(BaseRepo):
         """
         Поиск пользователей по частичному совпадению ФИО
         Возвращает список пользователей для случаев, когда найдено несколько совпадений
+        Поиск идёт по индексу в памяти с учётом опечаток, в БД - только если индекс устарел
 
         Args:
             fullname: Частичное или полное ФИО для поиска
@@ -75,6 +88,10 @@ class UserRepo(BaseRepo):
         if not name_parts:
             return []
 
+        users = user_search.search(fullname, limit)
+        if users is not None:
+            return users
+
         # Создаём условия для каждой части имени
         like_conditions = []
         for part in name_parts:
@@ -87,5 +104,76 @@ class UserRepo(BaseRepo):
             result = await self.session.execute(query)
             return result.scalars().all()
         except SQLAlchemyError as e:
-            logger.error(f"[БД] Ошибка получения пользователей по ФИО: {e}")
-            return []
\ No newline at end of file
+            logger.error("[БД] Ошибка получения пользователей по ФИО: %s", e)
+            return []
+
+    @staticmethod
+    def _recipient_filters(
+            division: Optional[str] = None,
+            role: Optional[int] = None,
+            position: Optional[str] = None
+    ) -> list:
+        filters = [User.ChatId.is_not(None)]
+        if division:
+            filters.append(User.Division == division)
+        if role is not None:
+            filters.append(User.Role == role)
+        if position:
+            filters.append(User.Position == position)
+        return filters
+
+    async def count_recipients(
+            self,
+            division: Optional[str] = None,
+            role: Optional[int] = None,
+            position: Optional[str] = None
+    ) -> int:
+        """
+        Подсчёт получателей рассылки по фильтрам
+
+        Args:
+            division: Направление пользователя
+            role: Роль пользователя
+            position: Должность пользователя
+
+        Returns:
+            Кол-во пользователей с ChatId, подходящих под фильтры
+        """
+        query = select(func.count()).select_from(User).where(
+            *self._recipient_filters(division, role, position)
+        )
+
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    async def get_recipients_batch(
+            self,
+            after_id: int = 0,
+            limit: int = 500,
+            division: Optional[str] = None,
+            role: Optional[int] = None,
+            position: Optional[str] = None
+    ) -> Sequence[tuple[int, int]]:
+        """
+        Порция получателей рассылки с keyset-пагинацией по id
+        Выбираются только id и ChatId, следующая порция запрашивается с after_id = id последнего получателя
+
+        Args:
+            after_id: id последнего получателя предыдущей порции
+            limit: Размер порции
+            division: Направление пользователя
+            role: Роль пользователя
+            position: Должность пользователя
+
+        Returns:
+            Список пар (id, ChatId) по возрастанию id
+        """
+        query = (
+            select(User.id, User.ChatId)
+            .where(User.id > after_id, *self._recipient_filters(division, role, position))
+            .order_by(User.id)
+            .limit(limit)
+        )
+
+        result = await self.session.execute(query)
+        return [(row.id, row.ChatId) for row in result]
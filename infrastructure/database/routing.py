@@ -0,0 +1,93 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Union
+
+from sqlalchemy import CompoundSelect, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from infrastructure.database.uow import TrackedSyncSession
+
+# Пользователь, обновление которого обрабатывается. Заполняет UnitOfWorkMiddleware
+_reader: ContextVar[Optional[int]] = ContextVar("db_reader", default=None)
+
+# До какого момента (time.monotonic) чтения недавно писавшего пользователя идут в основную БД
+_recent_writers: dict[int, float] = {}
+# Больше записей - чистим истёкшие
+_RECENT_WRITERS_PRUNE = 10000
+
+sticky_seconds: float = 30
+
+
+def configure_replica_routing(sticky: float) -> None:
+    """
+    Настройка маршрутизации чтений в реплики
+
+    :param sticky: Сколько секунд после записи чтения пользователя идут в основную БД, покрывая отставание реплики
+    """
+    global sticky_seconds
+    sticky_seconds = sticky
+
+
+@contextmanager
+def reader_scope(user_id: Optional[int]) -> Iterator[None]:
+    """
+    Область обработки обновления пользователя: его записи и чтения учитываются для read-your-writes
+    """
+    token = _reader.set(user_id)
+    try:
+        yield
+    finally:
+        _reader.reset(token)
+
+
+def use_primary(session: Union[Session, AsyncSession]) -> None:
+    """
+    Закрепление сессии за основной БД до её закрытия,
+    например когда прочитанные данные сразу записываются обратно
+    """
+    session.info["primary"] = True
+
+
+def _mark_writer() -> None:
+    user_id = _reader.get()
+    if user_id is None:
+        return
+
+    now = time.monotonic()
+    if len(_recent_writers) > _RECENT_WRITERS_PRUNE:
+        for expired in [user for user, until in _recent_writers.items() if until <= now]:
+            del _recent_writers[expired]
+    _recent_writers[user_id] = now + sticky_seconds
+
+
+def _replica_allowed() -> bool:
+    user_id = _reader.get()
+    if user_id is None:
+        return True
+
+    until = _recent_writers.get(user_id)
+    return until is None or until <= time.monotonic()
+
+
+class RoutingSession(TrackedSyncSession):
+    """
+    Сессия, отправляющая SELECT в реплику из info["replica"], а записи и прочие запросы - в основную БД.
+    Записи отмечаются как в TrackedSyncSession, чтобы release_connections не закоммитил их за хендлер.
+
+    После первой записи сессия остаётся на основной БД, а пользователь обновления читает из неё
+    ещё sticky_seconds - так он сразу видит, например, только что купленную награду
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self.info.get("primary"):
+            is_read = isinstance(clause, (Select, CompoundSelect)) and clause._for_update_arg is None
+            if self._flushing or (clause is not None and not is_read):
+                use_primary(self)
+                _mark_writer()
+            elif is_read and _replica_allowed():
+                return replica
+
+        return super().get_bind(mapper, clause=clause, **kw)
@@ -1,31 +1,92 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 
+from infrastructure.database.executor import create_driver_executor
+from infrastructure.database.pool import TimedQueuePool
+from infrastructure.database.profiling import profile_engine
+from infrastructure.database.routing import RoutingSession
+from infrastructure.database.timeouts import enable_statement_timeouts
+from infrastructure.database.uow import TrackedSession
 from tgbot.config import DbConfig
 
 
-def create_engine(db: DbConfig, db_name: str, echo=False):
+def create_engine(db: DbConfig, db_name: str, echo=False, fast_executemany=False, replica=False):
+    # aioodbc выполняет каждый вызов pyodbc в потоке: свой пул потоков на каждое соединение движка,
+    # чтобы не делить общий executor цикла событий с остальным кодом
+    executor = create_driver_executor(
+        f"{db_name}-replica" if replica else db_name, db.pool_size + db.pool_max_overflow
+    )
     engine = create_async_engine(
-        db.construct_sqlalchemy_url(db_name),
+        db.construct_sqlalchemy_url(db_name, replica=replica),
         query_cache_size=1200,
-        pool_size=20,
-        max_overflow=200,
+        poolclass=TimedQueuePool,
+        pool_size=db.pool_size,
+        max_overflow=db.pool_max_overflow,
+        pool_timeout=db.pool_timeout,
         future=True,
         echo=echo,
         connect_args={
             "autocommit": False,
             "isolation_level": None,
+            "executor": executor,
         },
-        pool_pre_ping=True,
-        pool_recycle=3600,
+        # Без фоновой проверки соединений проверяем каждое при выдаче
+        pool_pre_ping=not db.pool_liveness_interval,
+        pool_recycle=db.pool_recycle,
     )
+    # Соединения пулит SQLAlchemy, пул драйвера ODBC поверх него только держит лишние соединения
+    engine.dialect.dbapi.pyodbc.pooling = False
+    engine.sync_engine.pool.executor = executor
+    profile_engine(engine, slow_query_ms=db.slow_query_ms)
+    enable_statement_timeouts(engine, statement_timeout=db.statement_timeout)
+    if fast_executemany:
+        enable_fast_executemany(engine)
     return engine
 
 
-def create_session_pool(engine):
+def enable_fast_executemany(engine: AsyncEngine) -> None:
+    """
+    Массовые вставки и обновления (executemany) одним пакетом параметров pyodbc.
+
+    Флаг диалекта fast_executemany ставится на курсор-обёртку aioodbc, у которой нет такого атрибута,
+    поэтому он выставляется на курсор pyodbc перед каждым executemany.
+
+    Без флага диалект mssql отправляет INSERT без RETURNING многострочным VALUES через execute
+    (insertmanyvalues), и executemany не вызывается - поэтому такая отправка отключается
+    """
+    engine.sync_engine.dialect.use_insertmanyvalues_wo_returning = False
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def set_fast_executemany(conn, cursor, statement, parameters, context, executemany):
+        # AsyncAdapt_aioodbc_cursor -> aioodbc.Cursor -> pyodbc.Cursor
+        driver_cursor = getattr(getattr(cursor, "_cursor", None), "_impl", None)
+        if executemany and driver_cursor is not None:
+            driver_cursor.fast_executemany = True
+
+
+async def dispose_engine(engine):
+    """
+    Закрытие соединений движка и остановка его пула потоков драйвера
+    """
+    await engine.dispose()
+    executor = getattr(engine.sync_engine.pool, "executor", None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def create_session_pool(engine, replica_engine=None):
+    if replica_engine is None:
+        routing = {}
+    else:
+        # SELECT уходят в реплику, записи и всё после них в сессии - в основную БД
+        routing = {"sync_session_class": RoutingSession, "info": {"replica": replica_engine.sync_engine}}
+
     session_pool = async_sessionmaker(
         bind=engine,
+        class_=TrackedSession,
         expire_on_commit=False,
         autoflush=False,
         autocommit=False,
+        **routing,
     )
     return session_pool
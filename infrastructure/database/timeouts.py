@@ -0,0 +1,223 @@
+import asyncio
+import functools
+import logging
+import math
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Крайний срок (loop.time()) запросов к БД: хендлера или внешнего метода репозитория
+_deadline: ContextVar[Optional[float]] = ContextVar("db_deadline", default=None)
+# Курсоры pyodbc, выполняющие запросы текущего метода репозитория
+_statements: ContextVar[Optional[set]] = ContextVar("db_statements", default=None)
+
+default_timeout: float = 10
+# Бюджет методов, которые пишут и коммитят, без своего срока
+WRITE_TIMEOUT: float = 60
+# Получатели названия метода каждого таймаута, например счётчик метрик
+timeout_observers: list[Callable[[str], None]] = []
+
+
+class QueryTimeout(TimeoutError):
+    pass
+
+
+def configure_query_timeouts(default: float) -> None:
+    """
+    Настройка таймаутов запросов
+
+    :param default: Бюджет в секундах методов репозиториев без своего query_timeout
+    """
+    global default_timeout
+    default_timeout = default
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[None]:
+    """
+    Крайний срок для всех запросов к БД внутри блока, например на обработку обновления.
+    Вложенная область не продлевает внешний срок
+    """
+    deadline = asyncio.get_running_loop().time() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _cancel_cursors(cursors: list) -> None:
+    for cursor in cursors:
+        try:
+            cursor.cancel()
+        except Exception as e:
+            logger.warning("[БД] Не удалось отменить запрос: %s", e)
+
+
+class _Expiry:
+    """
+    Истечение бюджета метода репозитория.
+
+    Если на соединении выполняется запрос, он отменяется драйвером (SQLCancel), а корутина метода
+    не прерывается: поток драйвера сам вернётся с ошибкой отмены, и только после этого соединение
+    можно закрыть. Прерванная посреди вызова драйвера корутина заставила бы SQLAlchemy закрывать
+    соединение, пока поток драйвера ещё выполняет на нём запрос. Если SQLCancel не дошёл,
+    запрос прервёт таймаут драйвера (SQL_ATTR_QUERY_TIMEOUT), выставленный на тот же срок.
+    Если запросов нет (метод ждёт пул, коммит или не обращается к БД) - отменяется сама корутина
+    """
+
+    def __init__(self, statements: set) -> None:
+        self.statements = statements
+        self.task = asyncio.current_task()
+        self.expired = False
+        self._cancelled_task = False
+        self._cancelling = self.task.cancelling()
+
+    def __call__(self) -> None:
+        self.expired = True
+        if self.statements:
+            # SQLCancel сетевой, поэтому не в цикле событий. И не в потоках драйвера: они могут быть все заняты
+            asyncio.get_running_loop().run_in_executor(None, _cancel_cursors, list(self.statements))
+        else:
+            self._cancelled_task = True
+            self.task.cancel()
+
+    def owns(self) -> bool:
+        """Отмена корутины вызвана истечением бюджета, а не внешней отменой задачи"""
+        return self._cancelled_task and self.task.uncancel() <= self._cancelling
+
+
+def query_timeout(seconds: Optional[float] = None, writes: bool = False):
+    """
+    Бюджет времени метода репозитория, не больше крайнего срока хендлера.
+
+    По истечении запрос отменяется драйвером (SQLCancel), после возврата вызова драйвера
+    соединение сессии закрывается вместо возврата в пул, а вызывающий получает QueryTimeout
+
+    :param seconds: Бюджет в секундах, None - бюджет по умолчанию (DB_QUERY_TIMEOUT или WRITE_TIMEOUT)
+    :param writes: Метод пишет и коммитит: срок хендлера бюджет не сокращает,
+        чтобы отмена не пришлась на уже начатую запись или COMMIT
+    """
+
+    def decorator(method):
+        name = method.__qualname__
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            if seconds is not None:
+                deadline = started + seconds
+            else:
+                deadline = started + (WRITE_TIMEOUT if writes else default_timeout)
+            outer = _deadline.get()
+            if outer is not None and not writes:
+                deadline = min(deadline, outer)
+            if deadline <= started:
+                _record_timeout(name, 0)
+                raise QueryTimeout(f"{name}: крайний срок хендлера истёк до запроса")
+
+            # Вложенные методы отменяют запросы вместе с внешним
+            statements = _statements.get()
+            if statements is None:
+                statements = set()
+            deadline_token = _deadline.set(deadline)
+            statements_token = _statements.set(statements)
+            expiry = _Expiry(statements)
+            expire = loop.call_at(deadline, expiry)
+            try:
+                result = await method(self, *args, **kwargs)
+            except QueryTimeout:
+                # Таймаут вложенного метода уже обработан и учтён
+                raise
+            except asyncio.CancelledError:
+                if not expiry.owns():
+                    raise
+            except Exception:
+                # После SQLCancel драйвер возвращает ошибку отмены запроса
+                if not expiry.expired:
+                    raise
+            finally:
+                expire.cancel()
+                _statements.reset(statements_token)
+                _deadline.reset(deadline_token)
+
+            if not expiry.expired:
+                return result
+            # Вызов драйвера уже вернулся, но транзакция могла остаться незавершённой -
+            # закрываем соединение, а не возвращаем в пул
+            try:
+                await self.session.invalidate()
+            except Exception as e:
+                logger.warning("[БД] Ошибка закрытия соединения после таймаута %s: %s", name, e)
+            _record_timeout(name, deadline - started)
+            raise QueryTimeout(f"{name}: {deadline - started:.1f} с")
+
+        wrapper.query_timeout = seconds
+        return wrapper
+
+    return decorator
+
+
+def _record_timeout(name: str, budget: float) -> None:
+    logger.warning("[БД] Таймаут %s (%.1f с), запрос отменён", name, budget)
+    for observer in timeout_observers:
+        observer(name)
+
+
+def _driver_cursor(cursor):
+    # AsyncAdapt_aioodbc_cursor -> aioodbc.Cursor -> pyodbc.Cursor
+    return getattr(getattr(cursor, "_cursor", None), "_impl", None)
+
+
+def _driver_connection(conn):
+    # AsyncAdapt_aioodbc_connection -> aioodbc.Connection -> pyodbc.Connection
+    return getattr(conn.connection.driver_connection, "_conn", None)
+
+
+def enable_statement_timeouts(engine: AsyncEngine, statement_timeout: int) -> None:
+    """
+    Ограничение времени запросов на стороне драйвера и отмена запросов по таймауту метода репозитория
+
+    :param engine: Асинхронный движок SQLAlchemy с aioodbc
+    :param statement_timeout: Таймаут запроса в секундах вне бюджетов методов, 0 - без ограничения
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_execute")
+    def set_query_timeout(conn, clauseelement, multiparams, params, execution_options):
+        # Атрибут timeout pyodbc - SQL_ATTR_QUERY_TIMEOUT курсоров, создаваемых после его установки
+        driver_connection = _driver_connection(conn)
+        if not hasattr(driver_connection, "timeout"):
+            return
+        timeout = statement_timeout
+        deadline = _deadline.get()
+        if deadline is not None:
+            remaining = math.ceil(deadline - asyncio.get_running_loop().time())
+            timeout = max(min(timeout, remaining) if timeout else remaining, 1)
+        driver_connection.timeout = timeout
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def track_statement(conn, cursor, statement, parameters, context, executemany):
+        statements = _statements.get()
+        driver_cursor = _driver_cursor(cursor)
+        if statements is not None and driver_cursor is not None:
+            statements.add(driver_cursor)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def untrack_statement(conn, cursor, statement, parameters, context, executemany):
+        statements = _statements.get()
+        if statements is not None:
+            statements.discard(_driver_cursor(cursor))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def untrack_failed_statement(exception_context):
+        statements = _statements.get()
+        if statements is not None and exception_context.cursor is not None:
+            statements.discard(_driver_cursor(exception_context.cursor))
@@ -0,0 +1,99 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from weakref import WeakSet
+
+from sqlalchemy import TextClause, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Сессии, открытые при обработке текущего обновления
+_update_sessions: ContextVar[Optional[WeakSet]] = ContextVar("update_sessions", default=None)
+
+
+class TrackedSyncSession(Session):
+    """
+    Синхронная сессия, отмечающая в info записи текущей транзакции
+    """
+
+
+@event.listens_for(TrackedSyncSession, "after_flush")
+def _mark_flush(session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(TrackedSyncSession, "do_orm_execute")
+def _mark_statement(orm_execute_state) -> None:
+    # INSERT/UPDATE/DELETE и текстовые запросы, кроме SELECT (например EXEC процедуры), считаются записью
+    statement = orm_execute_state.statement
+    if isinstance(statement, TextClause):
+        reads = statement.text.lstrip().upper().startswith("SELECT")
+    else:
+        reads = orm_execute_state.is_select
+    if not reads:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(TrackedSyncSession, "after_transaction_end")
+def _reset_writes(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
+
+
+class TrackedSession(AsyncSession):
+    """
+    Сессия, регистрирующаяся в единице работы текущего обновления.
+    Это позволяет вернуть её соединение в пул перед сетевыми вызовами
+    """
+
+    sync_session_class = TrackedSyncSession
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        scope = _update_sessions.get()
+        if scope is not None:
+            scope.add(self)
+
+    @property
+    def has_writes(self) -> bool:
+        """В текущей транзакции есть незакоммиченные изменения"""
+        return bool(self.info.get("wrote") or self.new or self.dirty or self.deleted)
+
+
+@contextmanager
+def unit_of_work_scope():
+    """
+    Область единицы работы: все сессии, созданные внутри, отслеживаются до её окончания
+    """
+    token = _update_sessions.set(WeakSet())
+    try:
+        yield
+    finally:
+        _update_sessions.reset(token)
+
+
+async def release_connections() -> int:
+    """
+    Завершение открытых читающих транзакций сессий текущей единицы работы.
+    Соединения возвращаются в пул, сессии остаются пригодными для дальнейших запросов.
+
+    Сессии с незакоммиченными изменениями не трогаются: коммит остаётся за хендлером,
+    а соединение удерживается до него
+
+    :return: Кол-во сессий, вернувших соединение
+    """
+    scope = _update_sessions.get()
+    if not scope:
+        return 0
+
+    released = 0
+    for session in list(scope):
+        if not session.in_transaction() or session.has_writes:
+            continue
+        # В транзакции только чтение, поэтому COMMIT ничего не записывает и равносилен откату.
+        # В отличие от rollback() он не сбрасывает загруженные объекты (expire_on_commit=False),
+        # и хендлер может читать их атрибуты после запроса к Telegram
+        await session.commit()
+        released += 1
+    return released
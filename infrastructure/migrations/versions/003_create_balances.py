@@ -0,0 +1,56 @@
+"""Create balances table and accrual trigger
+
+Revision ID: 003_create_balances
+Revises: 002_create_awards
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mssql
+
+# revision identifiers, used by Alembic.
+revision: str = "003_create_balances"
+down_revision: Union[str, None] = "002_create_awards"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create balances table, one snapshot row per user
+    op.create_table(
+        "Balances",
+        sa.Column(
+            "ChatId",
+            sa.BIGINT(),
+            nullable=False,
+            autoincrement=False,
+            primary_key=True,
+        ),
+        sa.Column("Accrued", sa.BIGINT(), nullable=False, server_default="0"),
+        sa.Column("Spent", sa.BIGINT(), nullable=False, server_default="0"),
+        sa.Column("UpdatedAt", mssql.DATETIME2(), nullable=False),
+    )
+
+    # Accruals are also written outside the bot, so the snapshot follows every insert in the database
+    op.execute(
+        """
+        CREATE TRIGGER TR_accurals_Balances ON accurals AFTER INSERT AS
+        BEGIN
+            SET NOCOUNT ON;
+            UPDATE b
+            SET Accrued = b.Accrued + i.Points, UpdatedAt = SYSDATETIME()
+            FROM Balances AS b
+            JOIN (SELECT ChatId, SUM(Point) AS Points FROM inserted GROUP BY ChatId) AS i
+                ON i.ChatId = b.ChatId;
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER TR_accurals_Balances")
+    op.drop_table("Balances")
@@ -0,0 +1,49 @@
+"""Create broadcast jobs table
+
+Revision ID: 004_create_broadcast_jobs
+Revises: 003_create_balances
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mssql
+
+# revision identifiers, used by Alembic.
+revision: str = "004_create_broadcast_jobs"
+down_revision: Union[str, None] = "003_create_balances"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create broadcast jobs table, progress is checkpointed as the last processed RegisteredUsers.id
+    op.create_table(
+        "BroadcastJobs",
+        sa.Column("Id", sa.Integer(), nullable=False, autoincrement=True, primary_key=True),
+        sa.Column("Text", sa.Unicode(), nullable=False),
+        sa.Column("Division", sa.Unicode(length=255), nullable=True),
+        sa.Column("Role", sa.Integer(), nullable=True),
+        sa.Column("Position", sa.Unicode(length=255), nullable=True),
+        sa.Column("Status", sa.Unicode(length=32), nullable=False, server_default="running"),
+        sa.Column("LastUserId", sa.BIGINT(), nullable=False, server_default="0"),
+        sa.Column("Total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("Sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("Blocked", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("Failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("CreatedBy", sa.BIGINT(), nullable=False),
+        sa.Column("CreatedAt", mssql.DATETIME2(), nullable=False),
+        sa.Column("UpdatedAt", mssql.DATETIME2(), nullable=False),
+        # The process sending the job renews its lease; an expired lease lets another process take over
+        sa.Column("OwnerId", sa.Unicode(length=128), nullable=True),
+        sa.Column("LeaseUntil", mssql.DATETIME2(), nullable=True),
+    )
+    op.create_index("IX_BroadcastJobs_Status", "BroadcastJobs", ["Status"])
+
+
+def downgrade() -> None:
+    op.drop_index("IX_BroadcastJobs_Status", table_name="BroadcastJobs")
+    op.drop_table("BroadcastJobs")
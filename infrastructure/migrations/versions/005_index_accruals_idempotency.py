@@ -0,0 +1,75 @@
+"""Unique index on accruals idempotency key
+
+Revision ID: 005_index_accruals_idempotency
+Revises: 004_create_broadcast_jobs
+Create Date: 2026-10-18 15:00:00.000000
+
+Existing rows that repeat (ChatId, Name, Period) would make CREATE UNIQUE INDEX fail,
+so the upgrade checks for them first and stops before changing anything.
+Offline (--sql) scripts cannot run the check; run the review query below before applying them.
+
+Manual step when duplicates are reported:
+    1. Review them:
+           SELECT ChatId, Name, Period, COUNT(*) FROM accurals
+           GROUP BY ChatId, Name, Period HAVING COUNT(*) > 1
+    2. Either remove the extra rows yourself, or let the migration keep the oldest row
+       (lowest Id) of each key:
+           alembic -x dedupe_accruals=true upgrade head
+    3. Deletes do not fire TR_accurals_Balances, so balance snapshots keep the removed
+       points until the next reconcile run corrects them.
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "005_index_accruals_idempotency"
+down_revision: Union[str, None] = "004_create_broadcast_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_DUPLICATE_KEYS = """
+SELECT COUNT(*) FROM (
+    SELECT ChatId FROM accurals GROUP BY ChatId, Name, Period HAVING COUNT(*) > 1
+) AS duplicates
+"""
+
+# Keeps the oldest accrual of every key
+DELETE_DUPLICATES = """
+DELETE FROM accurals WHERE Id NOT IN (
+    SELECT MIN(Id) FROM accurals GROUP BY ChatId, Name, Period
+)
+"""
+
+
+def upgrade() -> None:
+    dedupe = context.get_x_argument(as_dictionary=True).get("dedupe_accruals") == "true"
+    if context.is_offline_mode():
+        # No connection to check against; the generated script deduplicates only on request
+        if dedupe:
+            op.execute(DELETE_DUPLICATES)
+    else:
+        duplicate_keys = op.get_bind().execute(sa.text(COUNT_DUPLICATE_KEYS)).scalar()
+        if duplicate_keys and not dedupe:
+            raise RuntimeError(
+                f"accurals has {duplicate_keys} repeated (ChatId, Name, Period) keys, "
+                "the unique index cannot be created. Remove the duplicates or rerun with "
+                "'alembic -x dedupe_accruals=true upgrade head', see this migration's docstring"
+            )
+        if duplicate_keys:
+            op.execute(DELETE_DUPLICATES)
+
+    # Bulk ingestion skips rows already loaded by (ChatId, Name, Period);
+    # the unique index keeps concurrent imports of the same file from both inserting
+    op.create_index(
+        "IX_accurals_ChatId_Name_Period",
+        "accurals",
+        ["ChatId", "Name", "Period"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("IX_accurals_ChatId_Name_Period", table_name="accurals")
@@ -0,0 +1,31 @@
+"""Index accruals for keyset-paginated history
+
+Revision ID: 006_index_accruals_history
+Revises: 005_index_accruals_idempotency
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "006_index_accruals_history"
+down_revision: Union[str, None] = "005_index_accruals_idempotency"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # History pages seek by (ChatId, Id) and read the projected columns from the index only
+    op.create_index(
+        "IX_accurals_ChatId_Id",
+        "accurals",
+        ["ChatId", "Id"],
+        mssql_include=["Name", "TargetKPI", "Point", "Period", "Date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("IX_accurals_ChatId_Id", table_name="accurals")
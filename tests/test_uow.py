@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import Integer, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from infrastructure.database.setup import create_session_pool
+from infrastructure.database.uow import release_connections, unit_of_work_scope
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Row(Base):
+    __tablename__ = "rows"
+
+    Id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+
+class ReleaseConnectionsTest(unittest.IsolatedAsyncioTestCase):
+    """
+    release_connections не должен завершать транзакции с записями - ни с репликой, ни без неё
+    """
+
+    async def asyncSetUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engines = []
+        for name in ("primary", "replica"):
+            engine = create_async_engine(f"sqlite+aiosqlite:///{Path(self.tmp.name) / name}.db")
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            self.engines.append(engine)
+
+    async def asyncTearDown(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+        self.tmp.cleanup()
+
+    def session_pools(self):
+        primary, replica = self.engines
+        return {
+            "без реплики": create_session_pool(primary),
+            "с репликой": create_session_pool(primary, replica_engine=replica),
+        }
+
+    async def test_orm_flush_is_write(self) -> None:
+        for name, session_pool in self.session_pools().items():
+            with self.subTest(name), unit_of_work_scope():
+                async with session_pool() as session:
+                    session.add(Row(Id=1))
+                    await session.flush()
+
+                    self.assertTrue(session.has_writes)
+                    self.assertEqual(await release_connections(), 0)
+
+                    await session.rollback()
+                    count = await session.scalar(text("SELECT COUNT(*) FROM rows"))
+                    self.assertEqual(count, 0)
+
+    async def test_text_dml_is_write(self) -> None:
+        for name, session_pool in self.session_pools().items():
+            with self.subTest(name), unit_of_work_scope():
+                async with session_pool() as session:
+                    await session.execute(text("INSERT INTO rows (Id) VALUES (1)"))
+
+                    self.assertTrue(session.has_writes)
+                    self.assertEqual(await release_connections(), 0)
+
+                    await session.rollback()
+                    count = await session.scalar(text("SELECT COUNT(*) FROM rows"))
+                    self.assertEqual(count, 0)
+
+    async def test_read_only_session_is_released(self) -> None:
+        for name, session_pool in self.session_pools().items():
+            with self.subTest(name), unit_of_work_scope():
+                async with session_pool() as session:
+                    await session.execute(text("SELECT 1"))
+
+                    self.assertFalse(session.has_writes)
+                    self.assertEqual(await release_connections(), 1)
+                    self.assertFalse(session.in_transaction())
+
+
+if __name__ == "__main__":
+    unittest.main()
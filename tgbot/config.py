@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
 from environs import Env
@@ -18,10 +18,14 @@ class TgBot:
         If we need to use redis.
     division : str
         Division where bot will run.
+    api_server : Optional[str]
+        Base URL of a Bot API server used instead of api.telegram.org,
+        e.g. a local Bot API server or the fake server from benchmarks.
     """
 
     token: str
     use_redis: bool
+    api_server: Optional[str] = None
 
     @staticmethod
     def from_env(env: Env):
@@ -34,8 +38,9 @@ class TgBot:
         # admin_ids = env.list("ADMINS", subcast=int)
 
         use_redis = env.bool("USE_REDIS")
+        api_server = env.str("BOT_API_SERVER", None)
 
-        return TgBot(token=token, use_redis=use_redis)
+        return TgBot(token=token, use_redis=use_redis, api_server=api_server)
 
 
 @dataclass
@@ -58,6 +63,33 @@ class DbConfig:
         The name of the ntp achievements database.
     nck_achievements_db : str
         The name of the nck achievements database.
+    release_before_io : bool
+        Unit-of-work mode: end read-only transactions and return their connections to the pool
+        before every Telegram API call. Sessions with uncommitted writes are left to the handler.
+    slow_query_ms : int
+        Queries running at least this many milliseconds are logged with their handler, 0 disables the log.
+    query_budget_strict : bool
+        Raise instead of logging when a handler exceeds its query_budget flag, for tests.
+    pool_size : int
+        Connections kept open in the pool of each engine.
+    pool_max_overflow : int
+        Connections opened above pool_size under load and closed when returned.
+    pool_timeout : int
+        Seconds to wait for a free connection before failing.
+    pool_recycle : int
+        Seconds after which a connection is reopened on checkout.
+    pool_liveness_interval : int
+        Seconds between liveness checks of idle connections, 0 checks every checkout (pool_pre_ping).
+    main_replica_host : Optional[str]
+        Read replica of the main database, SELECT statements are routed to it when set.
+    achiever_replica_host : Optional[str]
+        Read replica of the achievements database.
+    replica_sticky_seconds : int
+        Seconds a user who just wrote keeps reading from the primary, to cover the replica lag.
+    query_timeout : float
+        Seconds a repository method without its own budget may take before its query is cancelled.
+    statement_timeout : int
+        Driver-level timeout in seconds for statements outside repository budgets, 0 disables it.
     """
 
     host: str
@@ -67,28 +99,56 @@ class DbConfig:
     main_db: str
     achiever_db: str
 
+    release_before_io: bool = True
+    slow_query_ms: int = 500
+    query_budget_strict: bool = False
+
+    pool_size: int = 20
+    pool_max_overflow: int = 20
+    pool_timeout: int = 30
+    pool_recycle: int = 3600
+    pool_liveness_interval: int = 60
+
+    main_replica_host: Optional[str] = None
+    achiever_replica_host: Optional[str] = None
+    replica_sticky_seconds: int = 30
+
+    query_timeout: float = 10
+    statement_timeout: int = 60
+
+    def replica_host(self, db_name: str) -> Optional[str]:
+        """
+        Хост реплики для чтения базы данных, если она настроена
+        """
+        if db_name == self.main_db:
+            return self.main_replica_host
+        if db_name == self.achiever_db:
+            return self.achiever_replica_host
+        return None
+
     def construct_sqlalchemy_url(
         self,
         db_name=None,
         driver="aioodbc",
+        replica=False,
     ) -> URL:
         """
-        Конструирует и возвращает SQLAlchemy-ссылку для подключения к базе данных
+        Конструирует и возвращает SQLAlchemy-ссылку для подключения к базе данных или к её реплике
         """
+        db_name = db_name if db_name else self.achiever_db
         connection_string = (
             f"DRIVER={{ODBC Driver 18 for SQL Server}};"
-            f"SERVER={self.host};"
-            f"DATABASE={db_name if db_name else self.achiever_db};"
+            f"SERVER={self.replica_host(db_name) if replica else self.host};"
+            f"DATABASE={db_name};"
             f"UID={self.user};"
             f"PWD={self.password};"
             f"TrustServerCertificate=yes;"
             f"MultipleActiveResultSets=yes;"
             f"Connection Timeout=30;"
-            f"Command Timeout=60;"
-            f"Pooling=yes;"
-            f"Max Pool Size=100;"
-            f"Min Pool Size=5;"
         )
+        if replica:
+            # Слушатель Always On направляет такие подключения на читаемую вторичную реплику
+            connection_string += "ApplicationIntent=ReadOnly;"
         connection_url = URL.create(
             f"mssql+{driver}", query={"odbc_connect": connection_string}
         )
@@ -107,12 +167,42 @@ class DbConfig:
         main_db = env.str("DB_MAIN_NAME")
         achiever_db = env.str("DB_ACHIEVER_NAME")
 
+        release_before_io = env.bool("DB_RELEASE_BEFORE_IO", True)
+        slow_query_ms = env.int("DB_SLOW_QUERY_MS", 500)
+        query_budget_strict = env.bool("DB_QUERY_BUDGET_STRICT", False)
+
+        pool_size = env.int("DB_POOL_SIZE", 20)
+        pool_max_overflow = env.int("DB_POOL_MAX_OVERFLOW", 20)
+        pool_timeout = env.int("DB_POOL_TIMEOUT", 30)
+        pool_recycle = env.int("DB_POOL_RECYCLE", 3600)
+        pool_liveness_interval = env.int("DB_POOL_LIVENESS_INTERVAL", 60)
+
+        main_replica_host = env.str("DB_MAIN_REPLICA_HOST", None) or None
+        achiever_replica_host = env.str("DB_ACHIEVER_REPLICA_HOST", None) or None
+        replica_sticky_seconds = env.int("DB_REPLICA_STICKY_SECONDS", 30)
+
+        query_timeout = env.float("DB_QUERY_TIMEOUT", 10)
+        statement_timeout = env.int("DB_STATEMENT_TIMEOUT", 60)
+
         return DbConfig(
             host=host,
             user=user,
             password=password,
             main_db=main_db,
             achiever_db=achiever_db,
+            release_before_io=release_before_io,
+            slow_query_ms=slow_query_ms,
+            query_budget_strict=query_budget_strict,
+            pool_size=pool_size,
+            pool_max_overflow=pool_max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_liveness_interval=pool_liveness_interval,
+            main_replica_host=main_replica_host,
+            achiever_replica_host=achiever_replica_host,
+            replica_sticky_seconds=replica_sticky_seconds,
+            query_timeout=query_timeout,
+            statement_timeout=statement_timeout,
         )
 
 
@@ -180,10 +270,28 @@ class WebApp:
         The host where the web app server is located.
     port : int
         The port which used to connect to the web app server.
+    use_webhook : bool
+        If the bot receives updates through a webhook instead of long polling.
+    webhook_url : Optional[str]
+        Public base URL that Telegram sends updates to.
+    webhook_path : str
+        Path of the webhook endpoint on the web app server.
+    webhook_secret : Optional[str]
+        Secret token Telegram sends in the X-Telegram-Bot-Api-Secret-Token header.
     """
 
     host: str
     port: int
+    use_webhook: bool = False
+    webhook_url: Optional[str] = None
+    webhook_path: str = "/webhook"
+    webhook_secret: Optional[str] = None
+
+    def webhook_endpoint(self) -> str:
+        """
+        Constructs and returns the full webhook URL registered in Telegram.
+        """
+        return f"{self.webhook_url.rstrip('/')}{self.webhook_path}"
 
     @staticmethod
     def from_env(env: Env):
@@ -193,7 +301,230 @@ class WebApp:
         host = env.str("WEBAPP_HOST")
         port = env.int("WEBAPP_PORT")
 
-        return WebApp(host=host, port=port)
+        use_webhook = env.bool("USE_WEBHOOK", False)
+        webhook_url = env.str("WEBHOOK_URL", None)
+        webhook_path = env.str("WEBHOOK_PATH", "/webhook")
+        webhook_secret = env.str("WEBHOOK_SECRET", None)
+
+        if use_webhook and not webhook_url:
+            raise ValueError("WEBHOOK_URL must be set when USE_WEBHOOK is enabled")
+
+        return WebApp(
+            host=host,
+            port=port,
+            use_webhook=use_webhook,
+            webhook_url=webhook_url,
+            webhook_path=webhook_path,
+            webhook_secret=webhook_secret,
+        )
+
+
+@dataclass
+class Ledger:
+    """
+    Creates the Ledger object from environment variables.
+
+    Attributes
+    ----------
+    reconcile_interval : int
+        Interval in seconds between balance snapshot reconciliations.
+    """
+
+    reconcile_interval: int
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates the Ledger object from environment variables.
+        """
+        reconcile_interval = env.int("LEDGER_RECONCILE_INTERVAL", 3600)
+
+        return Ledger(reconcile_interval=reconcile_interval)
+
+
+@dataclass
+class CacheConfig:
+    """
+    In-process cache configuration class.
+
+    Attributes
+    ----------
+    awards_ttl : int
+        Seconds the awards catalog is served from memory before it is reloaded.
+    schedule_ttl : int
+        Maximum age in seconds of the parsed shift schedule of a division.
+    users_ttl : int
+        Staleness window in seconds of cached RegisteredUsers lookups.
+    users_size : int
+        Maximum number of cached user lookups.
+    search_refresh : int
+        Seconds between full reloads of the employee search index.
+    search_max_age : int
+        Age in seconds after which employee search falls back to SQL.
+    leaderboard_refresh : int
+        Seconds between rebuilds of the leaderboards.
+    leaderboard_top : int
+        Number of leaders shown on a leaderboard.
+    leaderboard_max_age : int
+        Age in seconds after which leaderboards are no longer shown.
+    """
+
+    awards_ttl: int
+    schedule_ttl: int
+    users_ttl: int
+    users_size: int
+    search_refresh: int = 600
+    search_max_age: int = 1800
+    leaderboard_refresh: int = 600
+    leaderboard_top: int = 10
+    leaderboard_max_age: int = 3600
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates the CacheConfig object from environment variables.
+        """
+        awards_ttl = env.int("AWARDS_CACHE_TTL", 300)
+        schedule_ttl = env.int("SCHEDULE_CACHE_TTL", 300)
+        users_ttl = env.int("USERS_CACHE_TTL", 60)
+        users_size = env.int("USERS_CACHE_SIZE", 10000)
+        search_refresh = env.int("SEARCH_INDEX_REFRESH", 600)
+        search_max_age = env.int("SEARCH_INDEX_MAX_AGE", 1800)
+        leaderboard_refresh = env.int("LEADERBOARD_REFRESH", 600)
+        leaderboard_top = env.int("LEADERBOARD_TOP", 10)
+        leaderboard_max_age = env.int("LEADERBOARD_MAX_AGE", 3600)
+
+        return CacheConfig(
+            awards_ttl=awards_ttl,
+            schedule_ttl=schedule_ttl,
+            users_ttl=users_ttl,
+            users_size=users_size,
+            search_refresh=search_refresh,
+            search_max_age=search_max_age,
+            leaderboard_refresh=leaderboard_refresh,
+            leaderboard_top=leaderboard_top,
+            leaderboard_max_age=leaderboard_max_age,
+        )
+
+
+@dataclass
+class Scaling:
+    """
+    Creates the Scaling object from environment variables.
+
+    Attributes
+    ----------
+    role : str
+        Process role: standalone (single process), gateway (webhook intake) or worker.
+    workers : int
+        Number of worker processes, updates are sharded between them by user id.
+    worker_id : int
+        Shard served by this worker process.
+    worker_concurrency : int
+        Maximum number of updates processed concurrently by one worker.
+    """
+
+    role: str
+    workers: int
+    worker_id: int
+    worker_concurrency: int
+
+    @property
+    def runs_background_jobs(self) -> bool:
+        """
+        Only one process of the deployment runs periodic background jobs.
+        """
+        return self.role == "standalone" or (self.role == "worker" and self.worker_id == 0)
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates the Scaling object from environment variables.
+        """
+        role = env.str("BOT_ROLE", "standalone")
+        workers = env.int("WORKERS_COUNT", 1)
+        worker_id = env.int("WORKER_ID", 0)
+        worker_concurrency = env.int("WORKER_CONCURRENCY", 64)
+
+        if role not in ("standalone", "gateway", "worker"):
+            raise ValueError(f"Unknown BOT_ROLE: {role}")
+        if not 0 <= worker_id < workers:
+            raise ValueError("WORKER_ID must be in range [0, WORKERS_COUNT)")
+
+        return Scaling(
+            role=role,
+            workers=workers,
+            worker_id=worker_id,
+            worker_concurrency=worker_concurrency,
+        )
+
+
+@dataclass
+class Metrics:
+    """
+    Creates the Metrics object from environment variables.
+
+    Attributes
+    ----------
+    enabled : bool
+        If the Prometheus metrics endpoint is served.
+    host : str
+        Host of the standalone metrics server.
+    port : int
+        Port of the metrics endpoint. When it equals the web app port in webhook mode,
+        metrics are served by the webhook app. Workers add their WORKER_ID to it.
+    path : str
+        Path of the metrics endpoint.
+    """
+
+    enabled: bool = False
+    host: str = "0.0.0.0"
+    port: int = 9090
+    path: str = "/metrics"
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates the Metrics object from environment variables.
+        """
+        enabled = env.bool("METRICS_ENABLED", False)
+        host = env.str("METRICS_HOST", "0.0.0.0")
+        port = env.int("METRICS_PORT", 9090)
+        path = env.str("METRICS_PATH", "/metrics")
+
+        return Metrics(enabled=enabled, host=host, port=port, path=path)
+
+
+@dataclass
+class LogConfig:
+    """
+    Creates the LogConfig object from environment variables.
+
+    Attributes
+    ----------
+    level : str
+        Level of the root logger.
+    json : bool
+        Write JSON lines with update and user ids instead of colorized text.
+    sampling : dict[str, float]
+        Share of INFO and DEBUG records kept per category or logger name,
+        e.g. LOG_SAMPLING=menu=0.1,aiogram.event=0.05.
+    """
+
+    level: str = "INFO"
+    json: bool = False
+    sampling: dict[str, float] = field(default_factory=dict)
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates the LogConfig object from environment variables.
+        """
+        level = env.str("LOG_LEVEL", "INFO").upper()
+        json = env.bool("LOG_JSON", False)
+        sampling = env.dict("LOG_SAMPLING", {}, subcast_values=float)
+
+        return LogConfig(level=level, json=json, sampling=sampling)
 
 
 @dataclass
@@ -229,7 +560,7 @@ class RedisConfig:
         """
         Creates the RedisConfig object from environment variables.
         """
-        redis_pass = env.str("REDIS_PASSWORD")
+        redis_pass = env.str("REDIS_PASSWORD", None)
         redis_port = env.int("REDIS_PORT")
         redis_host = env.str("REDIS_HOST")
 
@@ -253,6 +584,16 @@ class Config:
         Holds the values for miscellaneous settings.
     db : Optional[DbConfig]
         Holds the settings specific to the database (default is None).
+    ledger : Ledger
+        Holds the settings of the balance ledger.
+    scaling : Scaling
+        Holds the settings of the multi-process deployment.
+    cache : CacheConfig
+        Holds the settings of the in-process caches.
+    metrics : Metrics
+        Holds the settings of the Prometheus metrics endpoint.
+    log : LogConfig
+        Holds the settings of the process logging.
     redis : Optional[RedisConfig]
         Holds the settings specific to Redis (default is None).
     """
@@ -261,6 +602,11 @@ class Config:
     db: DbConfig
     email: Email
     webapp: WebApp
+    ledger: Ledger
+    scaling: Scaling
+    cache: CacheConfig
+    metrics: Metrics
+    log: LogConfig
     redis: Optional[RedisConfig] = None
 
 
@@ -277,10 +623,21 @@ def load_config(path: str = None) -> Config:
     env = Env()
     env.read_env(path)
 
+    tg_bot = TgBot.from_env(env)
+    scaling = Scaling.from_env(env)
+
+    if scaling.role != "standalone" and not tg_bot.use_redis:
+        raise ValueError("USE_REDIS must be enabled for gateway and worker roles")
+
     return Config(
-        tg_bot=TgBot.from_env(env),
+        tg_bot=tg_bot,
         email=Email.from_env(env),
         db=DbConfig.from_env(env),
         webapp=WebApp.from_env(env),
-        # redis=RedisConfig.from_env(env),
+        ledger=Ledger.from_env(env),
+        scaling=scaling,
+        cache=CacheConfig.from_env(env),
+        metrics=Metrics.from_env(env),
+        log=LogConfig.from_env(env),
+        redis=RedisConfig.from_env(env) if tg_bot.use_redis else None,
     )
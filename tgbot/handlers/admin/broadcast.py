@@ -0,0 +1,179 @@
+import logging
+import re
+from typing import Optional
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+
+from infrastructure.database.models.broadcasts import BroadcastJob
+from tgbot.filters.admin import AdminFilter
+from tgbot.services.broadcast_jobs import BroadcastJobs
+
+broadcast_router = Router()
+broadcast_router.message.filter(AdminFilter())
+
+logger = logging.getLogger(__name__)
+
+FILTER_PATTERN = re.compile(r'(division|role|position)=("[^"]*"|\S+)')
+
+status_names = {
+    "running": "▶️ Выполняется",
+    "paused": "⏸ На паузе",
+    "done": "✅ Завершена",
+}
+
+BROADCAST_HELP = """<b>📢 Рассылка</b>
+
+Первая строка - команда и фильтры, со второй строки - текст рассылки:
+<code>/broadcast division=НЦК role=1 position="Специалист"
+Текст рассылки</code>
+
+Фильтры необязательны. Управление задачами:
+/broadcast_status [id] - прогресс задачи или список последних задач
+/broadcast_pause id - пауза
+/broadcast_resume id - продолжение"""
+
+
+def job_card(job: BroadcastJob) -> str:
+    filters = ", ".join(
+        f"{name}: {value}"
+        for name, value in (
+            ("направление", job.Division),
+            ("роль", job.Role),
+            ("должность", job.Position),
+        )
+        if value is not None
+    )
+    percent = job.Processed / job.Total * 100 if job.Total else 100
+
+    return f"""<b>📢 Рассылка #{job.Id}</b> - {status_names.get(job.Status, job.Status)}
+
+<b>Получатели:</b> {filters or "все"}
+<b>Прогресс:</b> {job.Processed}/{job.Total} ({percent:.0f}%)
+<b>Доставлено:</b> {job.Sent}
+<b>Заблокировали бота:</b> {job.Blocked}
+<b>Ошибок:</b> {job.Failed}
+<b>Обновлено:</b> {job.UpdatedAt.strftime("%d.%m.%Y %H:%M:%S")}"""
+
+
+def parse_job_id(command: CommandObject) -> Optional[int]:
+    if command.args and command.args.strip().isdigit():
+        return int(command.args.strip())
+    return None
+
+
+@broadcast_router.message(Command("broadcast"))
+async def broadcast_start(
+    message: Message, command: CommandObject, broadcasts: BroadcastJobs
+) -> None:
+    """
+    Создание задачи рассылки по RegisteredUsers
+    """
+    header, _, text = (command.args or "").partition("\n")
+    text = text.strip()
+    if not text:
+        await message.answer(BROADCAST_HELP)
+        return
+
+    filters = {name: value.strip('"') for name, value in FILTER_PATTERN.findall(header)}
+    role = filters.get("role")
+    if role is not None and not role.isdigit():
+        await message.answer("Роль должна быть числом")
+        return
+
+    job = await broadcasts.create(
+        text=text,
+        created_by=message.from_user.id,
+        division=filters.get("division"),
+        role=int(role) if role is not None else None,
+        position=filters.get("position"),
+    )
+
+    logging.info(
+        "[Админ] %s (%s): Запущена рассылка %s",
+        message.from_user.username,
+        message.from_user.id,
+        job.Id,
+    )
+    await message.answer(job_card(job))
+
+
+@broadcast_router.message(Command("broadcast_status"))
+async def broadcast_status(
+    message: Message, command: CommandObject, broadcasts: BroadcastJobs
+) -> None:
+    """
+    Прогресс задачи рассылки или список последних задач
+    """
+    job_id = parse_job_id(command)
+    if job_id is None:
+        jobs = await broadcasts.recent()
+        if not jobs:
+            await message.answer("Задач рассылки пока нет")
+            return
+
+        lines = [
+            f"#{job.Id} {status_names.get(job.Status, job.Status)} - {job.Processed}/{job.Total}"
+            for job in jobs
+        ]
+        await message.answer("<b>📢 Последние рассылки</b>\n\n" + "\n".join(lines))
+        return
+
+    job = await broadcasts.get(job_id)
+    if job is None:
+        await message.answer(f"Рассылка #{job_id} не найдена")
+        return
+    await message.answer(job_card(job))
+
+
+@broadcast_router.message(Command("broadcast_pause"))
+async def broadcast_pause(
+    message: Message, command: CommandObject, broadcasts: BroadcastJobs
+) -> None:
+    """
+    Пауза задачи рассылки, прогресс сохраняется
+    """
+    job_id = parse_job_id(command)
+    if job_id is None:
+        await message.answer(BROADCAST_HELP)
+        return
+
+    job = await broadcasts.pause(job_id)
+    if job is None:
+        await message.answer(f"Рассылка #{job_id} не найдена")
+        return
+
+    logging.info(
+        "[Админ] %s (%s): Рассылка %s поставлена на паузу",
+        message.from_user.username,
+        message.from_user.id,
+        job_id,
+    )
+    await message.answer(job_card(job))
+
+
+@broadcast_router.message(Command("broadcast_resume"))
+async def broadcast_resume(
+    message: Message, command: CommandObject, broadcasts: BroadcastJobs
+) -> None:
+    """
+    Продолжение задачи рассылки с сохранённого прогресса
+    """
+    job_id = parse_job_id(command)
+    if job_id is None:
+        await message.answer(BROADCAST_HELP)
+        return
+
+    job = await broadcasts.resume(job_id)
+    if job is None:
+        await message.answer(f"Рассылка #{job_id} не найдена")
+        return
+
+    logging.info(
+        "[Админ] %s (%s): Рассылка %s продолжена",
+        message.from_user.username,
+        message.from_user.id,
+        job_id,
+    )
+    await message.answer(job_card(job))
@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import html
+import logging
+import tempfile
+from pathlib import Path
+
+from aiogram import Bot, F, Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from tgbot.filters.admin import AdminFilter
+from tgbot.services.ingest import IngestError, ingest_accruals
+
+ingest_router = Router()
+ingest_router.message.filter(AdminFilter())
+
+logger = logging.getLogger(__name__)
+
+# Загрузки идут в фоне, ссылки держатся до завершения
+ingest_tasks: set[asyncio.Task] = set()
+
+
+@ingest_router.message(Command("import_accruals"), F.document)
+async def import_accruals(message: Message, bot: Bot, ingest_db) -> None:
+    """
+    Загрузка начислений из CSV/XLSX, отправленного документом с подписью /import_accruals
+    """
+    document = message.document
+    suffix = Path(document.file_name or "").suffix.lower()
+    if suffix not in (".csv", ".txt", ".xlsx", ".xlsm"):
+        await message.answer("Пришли файл CSV или XLSX с колонками ChatId, FIO, Name, TargetKPI, Point, Period, Date")
+        return
+
+    workdir = tempfile.TemporaryDirectory(prefix="accruals_")
+    path = Path(workdir.name) / f"accruals{suffix}"
+    await bot.download(document, destination=path)
+
+    logging.info(
+        "[Админ] %s (%s): Запущена загрузка начислений %s",
+        message.from_user.username,
+        message.from_user.id,
+        document.file_name,
+    )
+    # Имя файла и ошибки содержат данные из файла, а ответы размечены HTML
+    file_name = html.escape(document.file_name or "")
+    await message.answer(f"⏳ Загрузка <b>{file_name}</b> запущена, пришлю отчёт по завершении")
+
+    async def run() -> None:
+        try:
+            report = await ingest_accruals(path, ingest_db)
+        except IngestError as e:
+            await message.answer(f"❌ {html.escape(str(e))}")
+            return
+        except Exception as e:
+            logger.error("[Загрузка] Ошибка загрузки %s: %s", document.file_name, e)
+            await message.answer(f"❌ Загрузка {file_name} прервана: {html.escape(str(e))}")
+            return
+        finally:
+            workdir.cleanup()
+
+        errors = "\n".join(html.escape(error) for error in report.errors)
+        await message.answer(
+            f"✅ <b>{file_name}</b>: {report.summary()}"
+            + (f"\n\n<blockquote expandable>{errors}</blockquote>" if errors else "")
+        )
+
+    # Пустой контекст: загрузка переживает обновление и не должна наследовать его единицу работы,
+    # привязку к пользователю, учёт запросов и крайний срок БД
+    task = asyncio.create_task(run(), context=contextvars.Context())
+    ingest_tasks.add(task)
+    task.add_done_callback(ingest_tasks.discard)
+
+
+@ingest_router.message(Command("import_accruals"))
+async def import_accruals_help(message: Message) -> None:
+    await message.answer(
+        "Пришли файл CSV или XLSX документом с подписью /import_accruals\n"
+        "Колонки: ChatId, FIO, Name, TargetKPI, Point, Period, Date\n"
+        "Уже загруженные начисления (ChatId, Name, Period) пропускаются"
+    )
@@ -4,8 +4,11 @@ from aiogram import F, Router
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncEngine
 
+from infrastructure.database.cache import awards_catalog, schedule_index, user_cache
 from infrastructure.database.models import User
+from infrastructure.database.pool import pool_report
 from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.config import load_config
 from tgbot.filters.admin import AdminFilter
@@ -13,14 +16,13 @@ from tgbot.handlers.user.main import main_cb
 from tgbot.keyboards.admin.main import AdminMenu, ChangeRole, admin_kb
 from tgbot.keyboards.user.main import user_kb
 from tgbot.misc.roles import role_names
-from tgbot.services.logger import setup_logging
+from tgbot.services.logger import MENU_EVENT
 
 admin_router = Router()
 admin_router.message.filter(AdminFilter())
 
 config = load_config(".env")
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -30,7 +32,10 @@ async def admin_start(message: Message, user: User, state: FSMContext):
 
     if "role" in state_data:
         logging.info(
-            f"[Админ] {message.from_user.username} ({message.from_user.id}): Открыто меню пользователя"
+            "[Админ] %s (%s): Открыто меню пользователя",
+            message.from_user.username,
+            message.from_user.id,
+            extra=MENU_EVENT,
         )
         await message.answer(
             f"""Привет, <b>{user.FIO}</b>!
@@ -49,7 +54,10 @@ async def admin_start(message: Message, user: User, state: FSMContext):
         return
 
     logging.info(
-        f"[Админ] {message.from_user.username} ({message.from_user.id}): Открыто админ-меню"
+        "[Админ] %s (%s): Открыто админ-меню",
+        message.from_user.username,
+        message.from_user.id,
+        extra=MENU_EVENT,
     )
     await message.answer(
         f"""Привет, <b>{user.FIO}</b>!
@@ -71,22 +79,34 @@ async def change_role(
         case "mip":
             await state.update_data(role=6)  # Мониторинг и прогнозирование (МИП)
             logging.info(
-                f"[Админ] {callback.from_user.username} ({callback.from_user.id}): Роль изменена с {user.Role} на 6"
+                "[Админ] %s (%s): Роль изменена с %s на 6",
+                callback.from_user.username,
+                callback.from_user.id,
+                user.Role,
             )
         case "gok":
             await state.update_data(role=5)  # Группа оценки качества
             logging.info(
-                f"[Админ] {callback.from_user.username} ({callback.from_user.id}): Роль изменена с {user.Role} на 5"
+                "[Админ] %s (%s): Роль изменена с %s на 5",
+                callback.from_user.username,
+                callback.from_user.id,
+                user.Role,
             )
         case "duty":
             await state.update_data(role=3)  # Старший (не руководитель группы)
             logging.info(
-                f"[Админ] {callback.from_user.username} ({callback.from_user.id}): Роль изменена с {user.Role} на 3"
+                "[Админ] %s (%s): Роль изменена с %s на 3",
+                callback.from_user.username,
+                callback.from_user.id,
+                user.Role,
             )
         case "spec":
             await state.update_data(role=1)  # Специалист
             logging.info(
-                f"[Админ] {callback.from_user.username} ({callback.from_user.id}): Роль изменена с {user.Role} на 1"
+                "[Админ] %s (%s): Роль изменена с %s на 1",
+                callback.from_user.username,
+                callback.from_user.id,
+                user.Role,
             )
 
     await main_cb(callback, user, state)
@@ -100,12 +120,18 @@ async def reset_role(callback: CallbackQuery, state: FSMContext, stp_db):
     state_data = await state.get_data()
     await state.clear()
 
+    # Сбрасываем кэш, чтобы показать актуальную роль из БД
+    user_cache.invalidate(user_id=callback.from_user.id)
     async with stp_db() as session:
         repo = RequestsRepo(session)
         user: User = await repo.users.get_user(user_id=callback.from_user.id)
 
     logging.info(
-        f"[Админ] Пользователь {callback.from_user.username} ({callback.from_user.id}): Роль изменена с {state_data.get('role')} на {user.Role} кнопкой"
+        "[Админ] Пользователь %s (%s): Роль изменена с %s на %s кнопкой",
+        callback.from_user.username,
+        callback.from_user.id,
+        state_data.get("role"),
+        user.Role,
     )
 
     await callback.message.edit_text(
@@ -126,12 +152,18 @@ async def reset_role(message: Message, state: FSMContext, stp_db) -> None:
     state_data = await state.get_data()
     await state.clear()
 
+    # Сбрасываем кэш, чтобы показать актуальную роль из БД
+    user_cache.invalidate(user_id=message.from_user.id)
     async with stp_db() as session:
         repo = RequestsRepo(session)
         user: User = await repo.users.get_user(user_id=message.from_user.id)
 
     logging.info(
-        f"[Админ] {message.from_user.username} ({message.from_user.id}): Роль изменена с {state_data.get('role')} на {user.Role} командой"
+        "[Админ] %s (%s): Роль изменена с %s на %s командой",
+        message.from_user.username,
+        message.from_user.id,
+        state_data.get("role"),
+        user.Role,
     )
 
     await message.answer(
@@ -142,3 +174,48 @@ async def reset_role(message: Message, state: FSMContext, stp_db) -> None:
 <i>Используй меню для управления ботом</i>""",
         reply_markup=admin_kb(),
     )
+
+
+@admin_router.message(Command("refresh_schedule"))
+async def refresh_schedule(message: Message) -> None:
+    """
+    Принудительное обновление графика смен после перезаписи буфера
+    """
+    schedule_index.invalidate()
+
+    logging.info(
+        "[Админ] %s (%s): Сброшен кэш графика смен",
+        message.from_user.username,
+        message.from_user.id,
+    )
+    await message.answer("♻️ График смен будет перечитан при следующей проверке")
+
+
+@admin_router.message(Command("refresh_awards"))
+async def refresh_awards(message: Message) -> None:
+    """
+    Принудительное обновление каталога наград после изменения таблицы Awards
+    """
+    awards_catalog.invalidate()
+
+    logging.info(
+        "[Админ] %s (%s): Сброшен кэш каталога наград",
+        message.from_user.username,
+        message.from_user.id,
+    )
+    await message.answer("♻️ Каталог наград будет перечитан при следующем обращении")
+
+
+@admin_router.message(Command("pool"))
+async def pool_status(message: Message, db_engines: dict[str, AsyncEngine]) -> None:
+    """
+    Состояние пулов соединений БД текущего процесса
+    """
+    reports = "\n\n".join(pool_report(name, engine) for name, engine in db_engines.items())
+
+    logging.info(
+        "[Админ] %s (%s): Запрошено состояние пулов БД",
+        message.from_user.username,
+        message.from_user.id,
+    )
+    await message.answer(f"<b>🔌 Пулы соединений БД</b>\n\n{reports}")
@@ -10,7 +10,6 @@ from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.config import load_config
 from tgbot.filters.admin import AdminFilter
 from tgbot.keyboards.admin.main import AdminMenu
-from tgbot.services.logger import setup_logging
 from aiogram.fsm.context import FSMContext
 
 search_router = Router()
@@ -18,7 +17,6 @@ search_router.message.filter(AdminFilter())
 
 config = load_config(".env")
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -34,7 +32,7 @@ async def admin_search(callback: CallbackQuery, state: FSMContext):
     await state.set_state(SearchState.fio)
 
 
-@search_router.message(SearchState.fio)
+@search_router.message(SearchState.fio, flags={"db_deadline": 5})
 async def search_message(message: Message, state: FSMContext, stp_db):
     fio = message.text.strip()
     await state.clear()
@@ -52,7 +50,7 @@ async def search_message(message: Message, state: FSMContext, stp_db):
 
     if user:
         # Найден точный match
-        logger.info(f"[Админ] - [Поиск пользователя] {user.FIO}")
+        logger.info("[Админ] - [Поиск пользователя] %s", user.FIO)
         await message.answer(f"Пользователь найден: {user.FIO}")
         # TODO добавить обработку найденного пользователя
         return
@@ -21,14 +21,13 @@ from tgbot.keyboards.user.awards import (
 )
 from tgbot.keyboards.user.main import MainMenu
 from tgbot.misc.states import AwardBuy
-from tgbot.services.logger import setup_logging
+from tgbot.services.logger import MENU_EVENT
 from tgbot.services.mailing import new_award_email
 
 awards_router = Router()
 
 config = load_config(".env")
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -51,7 +50,10 @@ async def awards(callback: CallbackQuery):
         reply_markup=awards_kb(),
     )
     logging.info(
-        f"[Пользователь] - [Меню] {callback.from_user.username} ({callback.from_user.id}): Открыто меню наград"
+        "[Пользователь] - [Меню] %s (%s): Открыто меню наград",
+        callback.from_user.username,
+        callback.from_user.id,
+        extra=MENU_EVENT,
     )
 
 
@@ -75,7 +77,8 @@ async def awards_available_page_handler(
     await show_available_awards_page(callback, achiever_db, page=callback_data.page)
 
 
-@awards_router.callback_query(AwardSelect.filter())
+# Баланс (до 5 запросов при построении снимка), каталог наград, пользователь и график смен
+@awards_router.callback_query(AwardSelect.filter(), flags={"query_budget": 8})
 async def award_select_handler(
     callback: CallbackQuery, callback_data: AwardSelect, achiever_db, stp_db
 ):
@@ -85,36 +88,24 @@ async def award_select_handler(
     await callback.answer()
     async with achiever_db() as session:
         repo = RequestsRepo(session)
-        total_points = await repo.accruals.accruals_sum(user_id=callback.from_user.id)
-        wasted_points = await repo.executes.executes_sum(user_id=callback.from_user.id)
-        user_balance = total_points - wasted_points
+        balance = await repo.balances.get_balance(user_id=callback.from_user.id)
+        user_balance = balance.Current
 
-        available_awards = await repo.awards.get_available_awards(
-            user_id=callback.from_user.id, user_balance=user_balance
+        db_selected_award: Awards = await repo.awards.get_award(
+            award_id=callback_data.award_id
         )
 
     # Валидация выбора награды
-    selected_award = next(
-        (award for award in available_awards if award.Id == callback_data.award_id),
-        None,
-    )
-
-    if not selected_award:
+    if not db_selected_award or db_selected_award.Name is None:
         await callback.answer("❌ Награда не найдена или больше недоступна")
         return
 
-    if selected_award.Sum > user_balance:
+    if db_selected_award.Sum > user_balance:
         await callback.answer(
-            f"❌ Недостаточно очков! Нужно: {selected_award.Sum}, у вас: {user_balance}"
+            f"❌ Недостаточно очков! Нужно: {db_selected_award.Sum}, у вас: {user_balance}"
         )
         return
 
-    async with achiever_db() as achiever_session:
-        repo = RequestsRepo(achiever_session)
-        db_selected_award: Awards = await repo.awards.get_award(
-            award_id=selected_award.Id
-        )
-
     if db_selected_award.IsShiftDependent:
         async with stp_db() as stp_session:
             repo = RequestsRepo(stp_session)
@@ -143,7 +134,10 @@ async def award_select_handler(
         reply_markup=confirm_award_kb(award_id=db_selected_award.Id),
     )
     logging.info(
-        f"[Пользователь] {callback.from_user.username} ({callback.from_user.id}): Выбрана награда {db_selected_award.Name}, ждем подтверждение"
+        "[Пользователь] %s (%s): Выбрана награда %s, ждем подтверждение",
+        callback.from_user.username,
+        callback.from_user.id,
+        db_selected_award.Name,
     )
 
 
@@ -158,6 +152,12 @@ async def confirm_award(
             award_id=callback_data.award_id
         )
 
+    if not db_selected_award:
+        await callback.message.edit_text(
+            "❌ Награда не найдена или больше недоступна", reply_markup=awards_back()
+        )
+        return
+
     await callback.message.edit_text(
         f"""<b>👏 Подтверждение покупки</b>
 
@@ -172,7 +172,10 @@ async def confirm_award(
     await state.update_data(award_id=db_selected_award.Id)
     await state.set_state(AwardBuy.comment)
     logging.info(
-        f"[Пользователь] - [Покупка награды] {callback.from_user.username} ({callback.from_user.id}): Подтвержден выбор награды {db_selected_award.Name}, ждем комментарий"
+        "[Пользователь] - [Покупка награды] %s (%s): Подтвержден выбор награды %s, ждем комментарий",
+        callback.from_user.username,
+        callback.from_user.id,
+        db_selected_award.Name,
     )
 
 
@@ -190,13 +193,12 @@ async def comment_award(message: Message, state: FSMContext, achiever_db, stp_db
         repo = RequestsRepo(achiever_session)
         award: Awards = await repo.awards.get_award(award_id=state_data["award_id"])
 
-        user_accruals = await repo.accruals.accruals_sum(user_id=message.from_user.id)
-        user_executes = await repo.executes.executes_sum(user_id=message.from_user.id)
-        user_balance = user_accruals - user_executes  # before current execute
+        balance = await repo.balances.get_balance(user_id=message.from_user.id)
+        user_balance = balance.Current  # before current execute
 
-    execute = await repo.executes.add_pending_award(
-        award=award, user=user, comment=message.text
-    )
+        execute = await repo.executes.add_pending_award(
+            award=award, user=user, comment=message.text
+        )
     await new_award_email(execute=execute, award=award, user=user, boss=boss)
     await message.bot.send_sticker(
         chat_id=message.from_user.id,
@@ -221,9 +223,12 @@ async def comment_award(message: Message, state: FSMContext, achiever_db, stp_db
     )
 
     logging.info(
-        f"[Пользователь] - [Покупка награды] {message.from_user.username} ({message.from_user.id}): Приобретена награда {award.Name}"
+        "[Пользователь] - [Покупка награды] %s (%s): Приобретена награда %s",
+        message.from_user.username,
+        message.from_user.id,
+        award.Name,
     )
-    await main_cmd(message=message, state=state, stp_db=stp_db)
+    await main_cmd(message=message, state=state, user=user)
 
 
 # Обработчик отображения всех возможных наград
@@ -270,7 +275,11 @@ async def awards_all(callback: CallbackQuery, achiever_db):
         message_text, reply_markup=awards_paginated_kb(page, total_pages)
     )
     logging.info(
-        f"[Пользователь] - [Меню] {callback.from_user.username} ({callback.from_user.id}): Открыто меню всех наград, страница {page}"
+        "[Пользователь] - [Меню] %s (%s): Открыто меню всех наград, страница %s",
+        callback.from_user.username,
+        callback.from_user.id,
+        page,
+        extra=MENU_EVENT,
     )
 
 
@@ -282,9 +291,8 @@ async def show_available_awards_page(
     """
     async with achiever_db() as session:
         repo = RequestsRepo(session)
-        total_points = await repo.accruals.accruals_sum(user_id=callback.from_user.id)
-        wasted_points = await repo.executes.executes_sum(user_id=callback.from_user.id)
-        user_balance = total_points - wasted_points
+        balance = await repo.balances.get_balance(user_id=callback.from_user.id)
+        user_balance = balance.Current
 
         available_awards = await repo.awards.get_available_awards(
             user_id=callback.from_user.id, user_balance=user_balance
@@ -333,5 +341,9 @@ async def show_available_awards_page(
         message_text, reply_markup=awards_available_kb(page_awards, page, total_pages)
     )
     logging.info(
-        f"[Пользователь] - [Меню] {callback.from_user.username} ({callback.from_user.id}): Открыто меню доступных наград, страница {page}"
+        "[Пользователь] - [Меню] %s (%s): Открыто меню доступных наград, страница %s",
+        callback.from_user.username,
+        callback.from_user.id,
+        page,
+        extra=MENU_EVENT,
     )
@@ -0,0 +1,66 @@
+import logging
+
+from aiogram import Router
+from aiogram.types import InlineQuery
+
+from infrastructure.database.cache import awards_catalog
+from infrastructure.database.models import User
+from infrastructure.database.repo.requests import RequestsRepo
+from tgbot.filters.admin import ADMIN_ROLE
+from tgbot.services.inline_results import (
+    INLINE_RESULTS_LIMIT,
+    ResultsCache,
+    award_results,
+    employee_results,
+    search_awards,
+)
+
+inline_router = Router()
+
+logger = logging.getLogger(__name__)
+
+# Ответы зависят от роли, поэтому Telegram кэширует их для каждого пользователя отдельно
+AWARDS_CACHE_TIME = 300
+EMPLOYEES_CACHE_TIME = 60
+
+results_cache = ResultsCache()
+
+
+# Telegram ждёт ответа на inline-запрос недолго, дальше пользователь уже печатает следующий
+@inline_router.inline_query(flags={"db_deadline": 3})
+async def inline_search(
+    inline_query: InlineQuery, user: User, main_repo: RequestsRepo, achiever_session
+) -> None:
+    """
+    Автодополнение по @бот <текст>: сотрудники для администраторов, награды для остальных
+    """
+    if user is None:
+        await inline_query.answer([], cache_time=EMPLOYEES_CACHE_TIME, is_personal=True)
+        return
+
+    query = " ".join(inline_query.query.split()).casefold()
+
+    if user.Role == ADMIN_ROLE:
+        cache_key, cache_time = ("employees", query), EMPLOYEES_CACHE_TIME
+        results = results_cache.get(cache_key)
+        if results is None:
+            users = await main_repo.users.get_users_by_fio_parts(query, limit=INLINE_RESULTS_LIMIT)
+            results = employee_results(users)
+            results_cache.set(cache_key, results)
+    else:
+        await awards_catalog.ensure_fresh(achiever_session)
+
+        cache_key, cache_time = ("awards", query), AWARDS_CACHE_TIME
+        results = results_cache.get(cache_key)
+        if results is None:
+            results = award_results(search_awards(awards_catalog.all(), query))
+            results_cache.set(cache_key, results)
+
+    logger.debug(
+        "[Inline] %s (%s): '%s' - результатов %s",
+        inline_query.from_user.username,
+        inline_query.from_user.id,
+        query,
+        len(results),
+    )
+    await inline_query.answer(results, cache_time=cache_time, is_personal=True)
@@ -3,10 +3,20 @@ from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
+from infrastructure.database.cache import leaderboards
 from infrastructure.database.models import User
 from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.config import load_config
-from tgbot.keyboards.user.main import MainMenu, back_kb, user_kb
+from tgbot.keyboards.user.main import (
+    HistoryMenu,
+    LeaderboardMenu,
+    MainMenu,
+    back_kb,
+    history_kb,
+    leaderboard_kb,
+    profile_kb,
+    user_kb,
+)
 
 user_router = Router()
 
@@ -62,27 +72,126 @@ async def main_cb(callback: CallbackQuery, user: User, state: FSMContext):
     )
 
 
-@user_router.callback_query(MainMenu.filter(F.menu == "level"))
-async def user_level(callback: CallbackQuery, achiever_db: RequestsRepo):
-    total_points = await achiever_db.accruals.accruals_sum(
-        user_id=callback.from_user.id
-    )
-    wasted_points = await achiever_db.executes.executes_sum(
-        user_id=callback.from_user.id
-    )
+# Бюджет с запасом на первое построение снимка баланса
+@user_router.callback_query(MainMenu.filter(F.menu == "level"), flags={"query_budget": 5})
+async def user_level(callback: CallbackQuery, achiever_db):
+    async with achiever_db() as session:
+        repo = RequestsRepo(session)
+        balance = await repo.balances.get_balance(user_id=callback.from_user.id)
 
-    current_points_amount = total_points - wasted_points
+    total_points = balance.Accrued
+    wasted_points = balance.Spent
+    current_points_amount = balance.Current
+
+    # Место читается из рейтингов в памяти, устаревшие рейтинги не показываются
+    rank_lines = []
+    for title, by_division in (("Место в общем рейтинге", False), ("Место в направлении", True)):
+        rank = leaderboards.rank(callback.from_user.id, by_division=by_division)
+        if rank is not None:
+            rank_lines.append(f"{title}: <b>{rank.place}</b> из {rank.total}")
+    rank_text = "".join(f"\n{line}" for line in rank_lines)
 
     # TODO уточнить механику расчета уровня
     await callback.message.edit_text(
         f"""<b>🏅 Профиль</b>
 
 Текущее кол-во баллов: <b>{current_points_amount}</b>
-Уровень: <b>{round(total_points / 100)}</b>
+Уровень: <b>{round(total_points / 100)}</b>{rank_text}
 
 <i>Всего накоплено: <b>{total_points}</b>
 Всего потрачено: <b>{wasted_points}</b></i>""",
-        reply_markup=back_kb(),
+        reply_markup=profile_kb(),
+    )
+
+
+@user_router.callback_query(LeaderboardMenu.filter(), flags={"query_budget": 0})
+async def user_leaderboard(callback: CallbackQuery, callback_data: LeaderboardMenu):
+    """
+    Рейтинг по баллам: общий или по направлению, за всё время или за период
+    """
+    periods = leaderboards.periods
+    period_index = callback_data.period if callback_data.period <= len(periods) else 0
+    period = periods[period_index - 1] if period_index else None
+
+    top = leaderboards.top(callback.from_user.id, by_division=callback_data.by_division, period=period)
+    if top is None:
+        await callback.message.edit_text(
+            """<b>🏆 Рейтинг</b>
+
+Рейтинг обновляется, попробуй позже""",
+            reply_markup=leaderboard_kb(callback_data.by_division, 0, []),
+        )
+        return
+
+    places = {1: "🥇", 2: "🥈", 3: "🥉"}
+    leaders_list = [
+        f"{places.get(entry.place, f'{entry.place}.')} {entry.fio} - <b>{entry.points}</b>"
+        for entry in top
+    ]
+    leaders_text = "\n".join(leaders_list) or "Начислений пока нет"
+
+    rank = leaderboards.rank(callback.from_user.id, by_division=callback_data.by_division, period=period)
+    rank_text = f"Твоё место: <b>{rank.place}</b> из {rank.total} ({rank.points} баллов)" if rank else "Ты пока не в рейтинге"
+
+    await callback.message.edit_text(
+        f"""<b>🏆 Рейтинг</b> - {"направление" if callback_data.by_division else "общий"}, {period or "за всё время"}
+
+{leaders_text}
+
+{rank_text}
+
+<i>Обновлено {round(leaderboards.age / 60)} мин назад</i>""",
+        reply_markup=leaderboard_kb(callback_data.by_division, period_index, periods),
+    )
+
+
+@user_router.callback_query(HistoryMenu.filter(), flags={"query_budget": 1})
+async def user_history(callback: CallbackQuery, callback_data: HistoryMenu, achiever_db):
+    """
+    История начислений пользователя постранично от новых к старым
+    """
+    history_per_page = 5
+
+    async with achiever_db() as session:
+        repo = RequestsRepo(session)
+        accruals, has_more = await repo.accruals.accrual_history(
+            user_id=callback.from_user.id,
+            before_id=callback_data.before or None,
+            after_id=callback_data.after or None,
+            limit=history_per_page,
+        )
+
+    # При возврате к новым начислениям более старые точно есть
+    has_older = True if callback_data.after else has_more
+
+    if not accruals:
+        await callback.message.edit_text(
+            """<b>📜 История начислений</b>
+
+Начислений пока нет""",
+            reply_markup=history_kb(page=1),
+        )
+        return
+
+    history_list = []
+    for accrual in accruals:
+        history_list.append(f"""<b>{accrual.Name}</b> +{accrual.Point} баллов
+📊 KPI: {accrual.TargetKPI}
+📅 {accrual.Date} · 🔁 {accrual.Period}
+""")
+    history_text = "\n".join(history_list)
+
+    await callback.message.edit_text(
+        f"""<b>📜 История начислений</b>
+<i>Страница {callback_data.page}</i>
+
+{history_text}""",
+        reply_markup=history_kb(
+            page=callback_data.page,
+            first_id=accruals[0].Id,
+            last_id=accruals[-1].Id,
+            has_older=has_older,
+        ),
     )
 
 
@@ -8,6 +8,17 @@ class MainMenu(CallbackData, prefix='menu'):
     menu: str
 
 
+class HistoryMenu(CallbackData, prefix='history'):
+    page: int = 1
+    before: int = 0
+    after: int = 0
+
+
+class LeaderboardMenu(CallbackData, prefix='leaderboard'):
+    by_division: bool = False
+    period: int = 0
+
+
 # Основная клавиатура для команды /start
 def user_kb(role: int, is_role_changed: bool = False) -> InlineKeyboardMarkup:
     buttons = []
@@ -59,3 +70,99 @@ def back_kb() -> InlineKeyboardMarkup:
         inline_keyboard=buttons,
     )
     return keyboard
+
+
+# Клавиатура профиля
+def profile_kb() -> InlineKeyboardMarkup:
+    buttons = [
+        [
+            InlineKeyboardButton(text="📜 История начислений", callback_data=HistoryMenu().pack()),
+        ],
+        [
+            InlineKeyboardButton(text="🏆 Рейтинг", callback_data=LeaderboardMenu().pack()),
+        ],
+        [
+            InlineKeyboardButton(text="↩️ Назад", callback_data=MainMenu(menu="main").pack()),
+        ]
+    ]
+
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=buttons,
+    )
+    return keyboard
+
+
+# Клавиатура истории начислений с keyset-пагинацией
+def history_kb(page: int, first_id: int = 0, last_id: int = 0, has_older: bool = False) -> InlineKeyboardMarkup:
+    buttons = []
+
+    pagination_row = []
+    if page > 1:
+        pagination_row.append(
+            InlineKeyboardButton(
+                text="⬅️",
+                # Первая страница всегда читается заново, чтобы показать свежие начисления
+                callback_data=(
+                    HistoryMenu(page=page - 1, after=first_id) if page > 2 else HistoryMenu()
+                ).pack()
+            )
+        )
+    if pagination_row or has_older:
+        pagination_row.append(InlineKeyboardButton(text=f"{page}", callback_data="noop"))
+    if has_older:
+        pagination_row.append(
+            InlineKeyboardButton(
+                text="➡️",
+                callback_data=HistoryMenu(page=page + 1, before=last_id).pack()
+            )
+        )
+    if pagination_row:
+        buttons.append(pagination_row)
+
+    buttons.append([
+        InlineKeyboardButton(text="↩️ Назад", callback_data=MainMenu(menu="level").pack()),
+        InlineKeyboardButton(text="🏠 Домой", callback_data=MainMenu(menu="main").pack()),
+    ])
+
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+# Клавиатура рейтинга: общий или по направлению, за всё время или за период
+def leaderboard_kb(by_division: bool, period: int, periods: list[str]) -> InlineKeyboardMarkup:
+    buttons = [
+        [
+            InlineKeyboardButton(
+                text=f"{'✅ ' if not by_division else ''}🌐 Общий",
+                callback_data=LeaderboardMenu(by_division=False, period=period).pack(),
+            ),
+            InlineKeyboardButton(
+                text=f"{'✅ ' if by_division else ''}🏢 Направление",
+                callback_data=LeaderboardMenu(by_division=True, period=period).pack(),
+            ),
+        ]
+    ]
+
+    # Период 0 - за всё время, остальные - номер периода в списке
+    if periods:
+        total = len(periods) + 1
+        buttons.append([
+            InlineKeyboardButton(
+                text="⬅️",
+                callback_data=LeaderboardMenu(by_division=by_division, period=(period - 1) % total).pack(),
+            ),
+            InlineKeyboardButton(
+                text=periods[period - 1] if period else "За всё время",
+                callback_data="noop",
+            ),
+            InlineKeyboardButton(
+                text="➡️",
+                callback_data=LeaderboardMenu(by_division=by_division, period=(period + 1) % total).pack(),
+            ),
+        ])
+
+    buttons.append([
+        InlineKeyboardButton(text="↩️ Назад", callback_data=MainMenu(menu="level").pack()),
+        InlineKeyboardButton(text="🏠 Домой", callback_data=MainMenu(menu="main").pack()),
+    ])
+
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -1,20 +1,33 @@
 import logging
+from contextlib import AsyncExitStack
 from typing import Callable, Dict, Any, Awaitable
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import Message
 from sqlalchemy.exc import OperationalError, DBAPIError, DisconnectionError
 
 from infrastructure.database.models import User
 from infrastructure.database.repo.requests import RequestsRepo
 from tgbot.config import Config
-from tgbot.services.logger import setup_logging
+from tgbot.middlewares.metrics import record_handler_error
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
+MAIN_DEPENDENCIES = frozenset({"main_session", "main_repo", "user"})
+ACHIEVER_DEPENDENCIES = frozenset({"achiever_session", "achiever_repo"})
+DEPENDENCIES = MAIN_DEPENDENCIES | ACHIEVER_DEPENDENCIES
+
 
 class DatabaseMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware, подготавливающий для хендлера только те зависимости БД, которые он запросил.
+
+    Хендлер объявляет зависимости аргументами (user, main_session, main_repo,
+    achiever_session, achiever_repo) или флагом db, например flags={"db": {"user"}}.
+    Хендлеры без зависимостей (статичные экраны) не делают ни одного запроса к БД.
+    """
+
     def __init__(
         self, config: Config, main_session_pool, achiever_session_pool
     ) -> None:
@@ -22,49 +35,73 @@ class DatabaseMiddleware(BaseMiddleware):
         self.achiever_session_pool = achiever_session_pool
         self.config = config
 
+    @staticmethod
+    def requested_dependencies(data: Dict[str, Any]) -> frozenset[str]:
+        """
+        Зависимости БД, объявленные хендлером
+        """
+        handler = data.get("handler")
+        if handler is None or handler.varkw:
+            return DEPENDENCIES
+
+        requested = handler.params & DEPENDENCIES
+        return requested | (frozenset(get_flag(data, "db", default=())) & DEPENDENCIES)
+
     async def __call__(
         self,
         handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
         event: Message,
         data: Dict[str, Any],
     ) -> Any:
+        requested = self.requested_dependencies(data)
+        if not requested:
+            return await handler(event, data)
+
         max_retries = 3
         retry_count = 0
 
         while retry_count < max_retries:
             try:
-                # Use separate sessions for different databases
-                async with self.main_session_pool() as main_session:
-                    async with self.achiever_session_pool() as achiever_session:
-                        # Создаем репозитории для разных БД
-                        main_repo = RequestsRepo(main_session)  # Для БД STPMain
-                        achiever_repo = RequestsRepo(
-                            achiever_session
-                        )  # Для БД AchieverBot
-
-                        user: User = await main_repo.users.get_user(
-                            user_id=event.from_user.id
+                async with AsyncExitStack() as stack:
+                    if requested & MAIN_DEPENDENCIES:
+                        # Сессия для БД STPMain
+                        main_session = await stack.enter_async_context(
+                            self.main_session_pool()
                         )
-
-                        # Add data to the context
                         data["main_session"] = main_session
-                        data["main_repo"] = main_repo
+                        data["main_repo"] = RequestsRepo(main_session)
+
+                    if requested & ACHIEVER_DEPENDENCIES:
+                        # Сессия для БД AchieverBot
+                        achiever_session = await stack.enter_async_context(
+                            self.achiever_session_pool()
+                        )
                         data["achiever_session"] = achiever_session
-                        data["achiever_repo"] = achiever_repo
+                        data["achiever_repo"] = RequestsRepo(achiever_session)
+
+                    if "user" in requested:
+                        user: User = await data["main_repo"].users.get_user(
+                            user_id=event.from_user.id
+                        )
                         data["user"] = user
 
-                        return await handler(event, data)
+                    return await handler(event, data)
 
             except (OperationalError, DBAPIError, DisconnectionError) as e:
                 retry_count += 1
                 logger.warning(
-                    f"[Middleware] Database connection error, повтор {retry_count}/{max_retries}: {e}"
+                    "[Middleware] Database connection error, повтор %s/%s: %s",
+                    retry_count,
+                    max_retries,
+                    e,
                 )
 
                 if retry_count >= max_retries:
                     logger.error(
-                        f"[Middleware] Все попытки подключения к БД исчерпаны: {e}"
+                        "[Middleware] Все попытки подключения к БД исчерпаны: %s",
+                        e,
                     )
+                    record_handler_error(data, e)
                     if hasattr(
                         event, "reply"
                     ):  # Check if it's a message that can be replied to
@@ -80,7 +117,9 @@ class DatabaseMiddleware(BaseMiddleware):
                 continue
 
             except Exception as e:
-                logger.error(f"[Middleware] Неожиданная ошибка: {e}")
+                logger.error("[Middleware] Неожиданная ошибка: %s", e)
+                # Исключение не доходит до HandlerMetricsMiddleware, учитываем его здесь
+                record_handler_error(data, e)
                 return None
 
         # This should not be reached, but just in case
@@ -0,0 +1,29 @@
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+
+from infrastructure.database.timeouts import deadline_scope
+
+
+class DbDeadlineMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware, ограничивающий запросы к БД хендлера общим крайним сроком.
+
+    Хендлер объявляет срок в секундах флагом db_deadline, например flags={"db_deadline": 5}.
+    Бюджет каждого метода репозитория внутри хендлера сокращается до оставшегося срока
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        deadline = get_flag(data, "db_deadline")
+        if deadline is None:
+            return await handler(event, data)
+
+        with deadline_scope(deadline):
+            return await handler(event, data)
@@ -0,0 +1,103 @@
+import time
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from tgbot.services.metrics import (
+    HANDLER_DURATION,
+    HANDLER_ERRORS,
+    TELEGRAM_REQUEST_DURATION,
+    TELEGRAM_REQUEST_ERRORS,
+    UPDATE_DURATION,
+    UPDATES,
+)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Время обработки и результат каждого обновления по его типу
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        event_type = event.event_type
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await handler(event, data)
+            status = "unhandled" if result is UNHANDLED else "handled"
+            return result
+        finally:
+            UPDATE_DURATION.labels(event_type).observe(time.perf_counter() - started)
+            UPDATES.labels(event_type, status).inc()
+
+
+def handler_labels(data: Dict[str, Any]) -> tuple[str, str]:
+    """
+    Метки хендлера для метрик: модуль роутера и имя хендлера
+    """
+    callback = data["handler"].callback
+    router = callback.__module__.removeprefix("tgbot.handlers.")
+    return router, getattr(callback, "__name__", type(callback).__name__)
+
+
+def record_handler_error(data: Dict[str, Any], error: BaseException) -> None:
+    """
+    Учёт исключения хендлера, которое мидлварь обработала сама, не пробросив наружу
+    """
+    HANDLER_ERRORS.labels(*handler_labels(data), type(error).__name__).inc()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Время работы хендлера по модулю роутера и имени хендлера.
+    Регистрируется первой внутренней мидлварью, поэтому учитывает и подготовку зависимостей
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        router, name = handler_labels(data)
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.labels(router, name, type(e).__name__).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(router, name).observe(time.perf_counter() - started)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Время каждого запроса к Telegram Bot API по названию метода
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ):
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            TELEGRAM_REQUEST_ERRORS.labels(api_method, type(e).__name__).inc()
+            raise
+        finally:
+            TELEGRAM_REQUEST_DURATION.labels(api_method).observe(time.perf_counter() - started)
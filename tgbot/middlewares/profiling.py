@@ -0,0 +1,52 @@
+import logging
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+
+from infrastructure.database.profiling import QueryBudgetExceeded, profile_queries
+
+logger = logging.getLogger(__name__)
+
+# Сколько одинаковых запросов за обновление считать признаком N+1
+REPEATED_QUERY_THRESHOLD = 5
+
+
+class QueryBudgetMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware, считающий запросы к БД за обработку обновления.
+
+    Хендлер объявляет бюджет флагом query_budget, например flags={"query_budget": 3}.
+    Превышение бюджета и повторяющиеся запросы логируются,
+    в строгом режиме (тесты) превышение бюджета приводит к QueryBudgetExceeded
+    """
+
+    def __init__(self, strict: bool = False) -> None:
+        self.strict = strict
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = data["handler"].callback
+        name = f"{callback.__module__}.{getattr(callback, '__name__', type(callback).__name__)}"
+
+        with profile_queries(name) as profile:
+            result = await handler(event, data)
+
+        logger.debug("[БД] %s: запросов %s за %.1f мс", name, profile.count, profile.elapsed * 1000)
+
+        for query, count in profile.repeated(REPEATED_QUERY_THRESHOLD):
+            logger.warning("[БД] %s: запрос выполнен %s раз за обновление (N+1?): %s", name, count, query)
+
+        budget = get_flag(data, "query_budget")
+        if budget is not None and profile.count > budget:
+            message = f"{name}: запросов {profile.count} при бюджете {budget}"
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning("[БД] Превышен бюджет запросов %s", message)
+
+        return result
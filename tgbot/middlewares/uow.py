@@ -0,0 +1,43 @@
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+
+from infrastructure.database.routing import reader_scope
+from infrastructure.database.uow import release_connections, unit_of_work_scope
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """
+    Открывает единицу работы на время обработки обновления.
+    Запросы к БД привязываются к отправителю, чтобы после записи он читал из основной БД, а не из реплики
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        with unit_of_work_scope(), reader_scope(user.id if user else None):
+            return await handler(event, data)
+
+
+class ReleaseConnectionsMiddleware(BaseRequestMiddleware):
+    """
+    Возвращает соединения БД текущей единицы работы в пул перед каждым запросом к Telegram API,
+    чтобы медленный Telegram не удерживал соединения пула
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ):
+        await release_connections()
+        return await make_request(bot, method)
@@ -0,0 +1,355 @@
+import asyncio
+import contextvars
+import logging
+import os
+import socket
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from aiogram import Bot
+
+from infrastructure.database.models.broadcasts import BroadcastJob
+from infrastructure.database.repo.requests import RequestsRepo
+from tgbot.services.broadcaster import BLOCKED, BROADCAST_CONCURRENCY, FAILED, SENT, deliver
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+CHECKPOINT_EVERY = 50
+# Аренда задачи процессом: продлевается каждые HEARTBEAT_EVERY секунд, истёкшую забирает другой процесс
+LEASE_SECONDS = 60
+HEARTBEAT_EVERY = 20
+# Как часто процесс рассылок ищет задачи без живой аренды
+WATCH_INTERVAL = 5
+
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+
+
+@dataclass
+class JobProgress:
+    """
+    Прогресс задачи рассылки в памяти процесса
+
+    Прогресс сдвигается только по непрерывному префиксу обработанных получателей,
+    поэтому после перезапуска никто не будет пропущен. Доставка - не менее одного раза:
+    получатели после последнего сохранённого префикса (до CHECKPOINT_EVERY и отправки,
+    завершившиеся не по порядку) после падения или потери аренды получат сообщение повторно.
+
+    Attributes:
+        last_user_id: id последнего получателя непрерывного обработанного префикса
+        sent: Кол-во доставленных сообщений
+        blocked: Кол-во получателей, заблокировавших бота
+        failed: Кол-во неудачных отправок
+        pending: Получатели с отправкой после checkpoint
+    """
+
+    last_user_id: int
+    sent: int = 0
+    blocked: int = 0
+    failed: int = 0
+    pending: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @classmethod
+    def from_job(cls, job: BroadcastJob) -> "JobProgress":
+        return cls(
+            last_user_id=job.LastUserId,
+            sent=job.Sent,
+            blocked=job.Blocked,
+            failed=job.Failed,
+        )
+
+    def advance(self, user_id: int, status: str) -> None:
+        self.last_user_id = user_id
+        self.pending += 1
+        if status == SENT:
+            self.sent += 1
+        elif status == BLOCKED:
+            self.blocked += 1
+        elif status == FAILED:
+            self.failed += 1
+
+
+class BroadcastJobs:
+    """
+    Менеджер задач рассылки по RegisteredUsers.
+
+    Получатели читаются порциями с keyset-пагинацией по id, каждая порция - в отдельной короткой сессии.
+    Прогресс сохраняется в BroadcastJobs каждые CHECKPOINT_EVERY получателей, после каждой порции и при паузе,
+    поэтому задача продолжается с места остановки после перезапуска бота.
+    Пауза сохраняется в БД и замечается выполняющим процессом при ближайшем сохранении прогресса.
+
+    Рассылки выполняет только процесс фоновых задач (runs_jobs), чтобы все сообщения шли через один лимитер.
+    Задача закрепляется за процессом арендой в БД: перезапуск не запускает повторно задачу,
+    которую ещё отправляет другой процесс, а задачу упавшего процесса подхватывают после истечения аренды.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        main_session_pool,
+        achiever_session_pool,
+        batch_size: int = BATCH_SIZE,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        runs_jobs: bool = True,
+    ) -> None:
+        self.bot = bot
+        self.main_session_pool = main_session_pool
+        self.achiever_session_pool = achiever_session_pool
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.runs_jobs = runs_jobs
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._pausing: set[int] = set()
+
+    async def create(
+        self,
+        text: str,
+        created_by: int,
+        division: Optional[str] = None,
+        role: Optional[int] = None,
+        position: Optional[str] = None,
+    ) -> BroadcastJob:
+        """
+        Создание задачи рассылки. Её запускает процесс фоновых задач
+
+        :param text: Текст рассылки
+        :param created_by: Идентификатор создателя задачи в Telegram
+        :param division: Фильтр по направлению
+        :param role: Фильтр по роли
+        :param position: Фильтр по должности
+        """
+        async with self.main_session_pool() as session:
+            total = await RequestsRepo(session).users.count_recipients(division, role, position)
+
+        async with self.achiever_session_pool() as session:
+            job = await RequestsRepo(session).broadcasts.create_job(
+                text=text,
+                created_by=created_by,
+                total=total,
+                division=division,
+                role=role,
+                position=position,
+            )
+
+        logger.info("[Рассылка] Создана задача %s на %s получателей", job.Id, total)
+        self.start(job.Id)
+        return job
+
+    def start(self, job_id: int) -> bool:
+        """
+        Запуск задачи рассылки в текущем процессе, если он выполняет рассылки.
+        Задача, уже закреплённая за другим процессом, не запустится
+
+        :param job_id: Уникальный идентификатор задачи
+        :return: False, если процесс не выполняет рассылки или задача уже выполняется в нём
+        """
+        if not self.runs_jobs:
+            return False
+
+        # Задача, ещё не успевшая остановиться после паузы, просто продолжает работу
+        self._pausing.discard(job_id)
+        if self.is_running(job_id):
+            return False
+
+        # Пустой контекст: задача живёт дольше обновления, которое её запустило, и не должна
+        # наследовать его единицу работы, привязку к пользователю, учёт запросов и крайний срок БД
+        task = asyncio.create_task(self._run(job_id), context=contextvars.Context())
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return True
+
+    def is_running(self, job_id: int) -> bool:
+        task = self._tasks.get(job_id)
+        return task is not None and not task.done()
+
+    async def pause(self, job_id: int) -> Optional[BroadcastJob]:
+        """
+        Постановка задачи рассылки на паузу
+
+        :param job_id: Уникальный идентификатор задачи
+        :return: Задача или None, если задача не найдена
+        """
+        async with self.achiever_session_pool() as session:
+            repo = RequestsRepo(session)
+            job = await repo.broadcasts.get_job(job_id)
+            if job is None or job.Status != RUNNING:
+                return job
+
+            await repo.broadcasts.set_status(job_id, PAUSED)
+            job = await repo.broadcasts.get_job(job_id)
+
+        # Задачу другого процесса остановит её сохранение прогресса или продление аренды
+        if self.is_running(job_id):
+            self._pausing.add(job_id)
+        logger.info("[Рассылка] Задача %s поставлена на паузу", job_id)
+        return job
+
+    async def resume(self, job_id: int) -> Optional[BroadcastJob]:
+        """
+        Продолжение задачи рассылки с сохранённого прогресса
+
+        :param job_id: Уникальный идентификатор задачи
+        :return: Задача или None, если задача не найдена
+        """
+        async with self.achiever_session_pool() as session:
+            repo = RequestsRepo(session)
+            job = await repo.broadcasts.get_job(job_id)
+            if job is None or job.Status != PAUSED:
+                return job
+
+            await repo.broadcasts.set_status(job_id, RUNNING)
+            job = await repo.broadcasts.get_job(job_id)
+
+        logger.info("[Рассылка] Задача %s продолжена с получателя %s", job_id, job.LastUserId)
+        self.start(job_id)
+        return job
+
+    async def watch(self, interval: int = WATCH_INTERVAL) -> None:
+        """
+        Фоновая задача процесса рассылок: запуск задач без живой аренды -
+        новых, продолженных и брошенных остановленным или упавшим процессом
+
+        :param interval: Интервал поиска в секундах
+        """
+        while True:
+            try:
+                async with self.achiever_session_pool() as session:
+                    jobs = await RequestsRepo(session).broadcasts.get_unclaimed_jobs()
+                for job in jobs:
+                    self.start(job.Id)
+            except Exception as e:
+                logger.error("[Рассылка] Ошибка поиска задач для запуска: %s", e)
+            await asyncio.sleep(interval)
+
+    async def get(self, job_id: int) -> Optional[BroadcastJob]:
+        async with self.achiever_session_pool() as session:
+            return await RequestsRepo(session).broadcasts.get_job(job_id)
+
+    async def recent(self, limit: int = 10) -> Sequence[BroadcastJob]:
+        async with self.achiever_session_pool() as session:
+            return await RequestsRepo(session).broadcasts.get_jobs(limit=limit)
+
+    async def stop(self) -> None:
+        """
+        Остановка задач текущего процесса с сохранением прогресса, статус задач не меняется
+        """
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job_id: int) -> None:
+        async with self.achiever_session_pool() as session:
+            repo = RequestsRepo(session)
+            if not await repo.broadcasts.claim_job(job_id, self.owner, LEASE_SECONDS):
+                return
+            job = await repo.broadcasts.get_job(job_id)
+
+        logger.info("[Рассылка] Задача %s выполняется с получателя %s", job_id, job.LastUserId)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        progress = JobProgress.from_job(job)
+        try:
+            while job_id not in self._pausing:
+                async with self.main_session_pool() as session:
+                    batch = await RequestsRepo(session).users.get_recipients_batch(
+                        after_id=progress.last_user_id,
+                        limit=self.batch_size,
+                        division=job.Division,
+                        role=job.Role,
+                        position=job.Position,
+                    )
+
+                if not batch:
+                    async with self.achiever_session_pool() as session:
+                        await RequestsRepo(session).broadcasts.set_status(job_id, DONE)
+                    logger.info(
+                        "[Рассылка] Задача %s завершена: доставлено %s, заблокировали %s, ошибок %s",
+                        job_id,
+                        progress.sent,
+                        progress.blocked,
+                        progress.failed,
+                    )
+                    return
+
+                await self._deliver_batch(job, batch, progress)
+                await self._checkpoint(job_id, progress)
+        except asyncio.CancelledError:
+            await asyncio.shield(self._checkpoint(job_id, progress))
+            raise
+        except Exception as e:
+            logger.error("[Рассылка] Ошибка задачи %s, прогресс сохранён: %s", job_id, e)
+            await self._checkpoint(job_id, progress)
+        finally:
+            heartbeat.cancel()
+            self._pausing.discard(job_id)
+            await asyncio.shield(self._release(job_id))
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_EVERY)
+            try:
+                async with self.achiever_session_pool() as session:
+                    renewed = await RequestsRepo(session).broadcasts.renew_lease(
+                        job_id, self.owner, LEASE_SECONDS
+                    )
+            except Exception as e:
+                logger.warning("[Рассылка] Не удалось продлить аренду задачи %s: %s", job_id, e)
+                continue
+
+            if not renewed:
+                # Задачу поставили на паузу или её аренду забрал другой процесс
+                self._pausing.add(job_id)
+
+    async def _release(self, job_id: int) -> None:
+        try:
+            async with self.achiever_session_pool() as session:
+                await RequestsRepo(session).broadcasts.release_lease(job_id, self.owner)
+        except Exception as e:
+            logger.warning("[Рассылка] Не удалось освободить аренду задачи %s: %s", job_id, e)
+
+    async def _deliver_batch(
+        self, job: BroadcastJob, batch: Sequence[tuple[int, int]], progress: JobProgress
+    ) -> None:
+        statuses: list[Optional[str]] = [None] * len(batch)
+        recipients = iter(enumerate(batch))
+        prefix = 0
+
+        async def sender() -> None:
+            nonlocal prefix
+            for index, (_, chat_id) in recipients:
+                if job.Id in self._pausing:
+                    return
+                statuses[index] = await deliver(self.bot, chat_id, job.Text)
+
+                while prefix < len(batch) and statuses[prefix] is not None:
+                    progress.advance(batch[prefix][0], statuses[prefix])
+                    prefix += 1
+
+                if progress.pending >= CHECKPOINT_EVERY:
+                    await self._checkpoint(job.Id, progress)
+
+        await asyncio.gather(*(sender() for _ in range(self.concurrency)))
+
+    async def _checkpoint(self, job_id: int, progress: JobProgress) -> None:
+        """
+        Сохранение прогресса и проверка паузы, выставленной другим процессом
+        """
+        async with progress.lock:
+            if not progress.pending:
+                return
+            progress.pending = 0
+
+            async with self.achiever_session_pool() as session:
+                repo = RequestsRepo(session)
+                await repo.broadcasts.save_checkpoint(
+                    job_id, self.owner, progress.last_user_id, progress.sent, progress.blocked, progress.failed
+                )
+                job = await repo.broadcasts.get_job(job_id)
+
+            if job is not None and job.Status != RUNNING:
+                self._pausing.add(job_id)
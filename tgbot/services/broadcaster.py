@@ -1,11 +1,157 @@
 import asyncio
 import logging
-from typing import Union
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Union
 
 from aiogram import Bot
 from aiogram import exceptions
 from aiogram.types import InlineKeyboardMarkup
 
+# Telegram allows about 30 messages per second to different chats
+BROADCAST_RATE = 25
+BROADCAST_CONCURRENCY = 8
+MAX_RETRIES = 3
+
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the rate of outgoing messages for the whole process.
+
+    Any sender can pause the bucket after a flood wait, all senders then wait for it.
+    """
+
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or rate
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._resume = asyncio.Event()
+        self._resume.set()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Wait for a free token, respecting a global pause.
+        """
+        async with self._lock:
+            while True:
+                await self._resume.wait()
+
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop all senders for the given number of seconds.
+        """
+        until = time.monotonic() + seconds
+        if until <= self._paused_until:
+            return
+
+        self._paused_until = until
+        self._tokens = 0
+        self._resume.clear()
+        asyncio.get_running_loop().call_later(seconds, self._maybe_resume)
+
+    def _maybe_resume(self) -> None:
+        if time.monotonic() >= self._paused_until - 0.01:
+            self._updated = time.monotonic()
+            self._resume.set()
+
+
+bucket = TokenBucket(rate=BROADCAST_RATE)
+
+
+@dataclass
+class BroadcastResult:
+    """
+    Report of a broadcast.
+
+    Attributes:
+        sent: Recipients who received the message.
+        blocked: Recipients who blocked the bot or deleted the chat.
+        failed: Recipients whose message failed after all retries.
+    """
+
+    sent: list[Union[str, int]] = field(default_factory=list)
+    blocked: list[Union[str, int]] = field(default_factory=list)
+    failed: list[Union[str, int]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.sent)
+
+    def add(self, user_id: Union[str, int], status: str) -> None:
+        getattr(self, status).append(user_id)
+
+
+async def deliver(
+    bot: Bot,
+    user_id: Union[int, str],
+    text: str,
+    disable_notification: bool = False,
+    reply_markup: InlineKeyboardMarkup = None,
+    max_retries: int = MAX_RETRIES,
+) -> str:
+    """
+    Rate limited message sender with bounded retries.
+
+    :param bot: Bot instance.
+    :param user_id: user id. If str - must contain only digits.
+    :param text: text of the message.
+    :param disable_notification: disable notification or not.
+    :param reply_markup: reply markup.
+    :param max_retries: how many times a flood wait or network error is retried.
+    :return: delivery status: sent, blocked or failed.
+    """
+    for attempt in range(max_retries + 1):
+        await bucket.acquire()
+        try:
+            await bot.send_message(
+                user_id,
+                text,
+                disable_notification=disable_notification,
+                reply_markup=reply_markup,
+            )
+        except exceptions.TelegramForbiddenError:
+            logging.error("Target [ID:%s]: got TelegramForbiddenError", user_id)
+            return BLOCKED
+        except exceptions.TelegramBadRequest as e:
+            logging.error("Target [ID:%s]: Telegram server says - Bad Request: %s", user_id, e.message)
+            return FAILED
+        except exceptions.TelegramRetryAfter as e:
+            logging.error(
+                "Target [ID:%s]: Flood limit is exceeded. Sleep %s seconds.",
+                user_id,
+                e.retry_after,
+            )
+            bucket.pause(e.retry_after)
+        except (exceptions.TelegramNetworkError, exceptions.TelegramServerError):
+            logging.warning("Target [ID:%s]: network error, attempt %s/%s", user_id, attempt + 1, max_retries + 1)
+            await asyncio.sleep(2**attempt)
+        except exceptions.TelegramAPIError:
+            logging.exception("Target [ID:%s]: failed", user_id)
+            return FAILED
+        else:
+            logging.debug("Target [ID:%s]: success", user_id)
+            return SENT
+
+    logging.error("Target [ID:%s]: failed after %s retries", user_id, max_retries)
+    return FAILED
+
 
 async def send_message(
     bot: Bot,
@@ -24,60 +170,49 @@ async def send_message(
     :param reply_markup: reply markup.
     :return: success.
     """
-    try:
-        await bot.send_message(
-            user_id,
-            text,
-            disable_notification=disable_notification,
-            reply_markup=reply_markup,
-        )
-    except exceptions.TelegramBadRequest as e:
-        logging.error("Telegram server says - Bad Request: chat not found")
-    except exceptions.TelegramForbiddenError:
-        logging.error(f"Target [ID:{user_id}]: got TelegramForbiddenError")
-    except exceptions.TelegramRetryAfter as e:
-        logging.error(
-            f"Target [ID:{user_id}]: Flood limit is exceeded. Sleep {e.retry_after} seconds."
-        )
-        await asyncio.sleep(e.retry_after)
-        return await send_message(
-            bot, user_id, text, disable_notification, reply_markup
-        )  # Recursive call
-    except exceptions.TelegramAPIError:
-        logging.exception(f"Target [ID:{user_id}]: failed")
-    else:
-        logging.info(f"Target [ID:{user_id}]: success")
-        return True
-    return False
+    status = await deliver(bot, user_id, text, disable_notification, reply_markup)
+    return status == SENT
 
 
 async def broadcast(
     bot: Bot,
-    users: list[Union[str, int]],
+    users: Iterable[Union[str, int]],
     text: str,
     disable_notification: bool = False,
     reply_markup: InlineKeyboardMarkup = None,
-) -> int:
+    concurrency: int = BROADCAST_CONCURRENCY,
+) -> BroadcastResult:
     """
-    Simple broadcaster.
+    Concurrent broadcaster.
+
+    Senders share the global token bucket, so the overall rate stays within Telegram limits.
+
     :param bot: Bot instance.
-    :param users: List of users.
+    :param users: Iterable of users.
     :param text: Text of the message.
     :param disable_notification: Disable notification or not.
     :param reply_markup: Reply markup.
-    :return: Count of messages.
+    :param concurrency: Number of concurrent senders.
+    :return: Report of sent, blocked and failed recipients.
     """
-    count = 0
+    result = BroadcastResult()
+    recipients = iter(users)
+
+    async def sender() -> None:
+        for user_id in recipients:
+            status = await deliver(bot, user_id, text, disable_notification, reply_markup)
+            result.add(user_id, status)
+
+    started = time.monotonic()
     try:
-        for user_id in users:
-            if await send_message(
-                bot, user_id, text, disable_notification, reply_markup
-            ):
-                count += 1
-            await asyncio.sleep(
-                0.05
-            )  # 20 messages per second (Limit: 30 messages per second)
+        await asyncio.gather(*(sender() for _ in range(concurrency)))
     finally:
-        logging.info(f"{count} messages successful sent.")
+        logging.info(
+            "%s messages successful sent, %s blocked, %s failed in %.1fs.",
+            result.count,
+            len(result.blocked),
+            len(result.failed),
+            time.monotonic() - started,
+        )
 
-    return count
+    return result
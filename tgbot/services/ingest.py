@@ -0,0 +1,237 @@
+import argparse
+import asyncio
+import csv
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from infrastructure.database.repo.requests import RequestsRepo
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10000
+# Сколько ошибок валидации попадёт в лог и отчёт
+MAX_REPORTED_ERRORS = 20
+
+COLUMNS = ("ChatId", "FIO", "Name", "TargetKPI", "Point", "Period", "Date")
+TEXT_LIMIT = 255
+
+
+class IngestError(Exception):
+    pass
+
+
+@dataclass
+class IngestReport:
+    """
+    Отчёт о загрузке начислений
+
+    Attributes:
+        rows: Кол-во прочитанных строк
+        inserted: Кол-во вставленных начислений
+        duplicates: Кол-во строк, уже загруженных ранее или повторённых в файле
+        invalid: Кол-во строк, не прошедших валидацию
+        elapsed: Время загрузки (сек)
+        errors: Первые ошибки валидации
+    """
+
+    rows: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    elapsed: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"прочитано {self.rows}, загружено {self.inserted}, дублей {self.duplicates}, "
+            f"ошибок {self.invalid} за {self.elapsed:.1f} сек ({self.rows_per_sec:.0f} строк/сек)"
+        )
+
+
+def read_csv(path: Path) -> Iterator[dict[str, Any]]:
+    """
+    Потоковое чтение CSV с заголовком, разделитель определяется автоматически
+    """
+    with path.open(newline="", encoding="utf-8-sig") as file:
+        sample = file.read(64 * 1024)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        except csv.Error:
+            dialect = csv.excel
+
+        yield from csv.DictReader(file, dialect=dialect)
+
+
+def read_xlsx(path: Path) -> Iterator[dict[str, Any]]:
+    """
+    Потоковое чтение первого листа XLSX с заголовком в первой строке
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise IngestError("Для загрузки XLSX установи openpyxl: pip install achieverbot[xlsx]") from None
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(path: Path) -> Iterator[dict[str, Any]]:
+    match path.suffix.lower():
+        case ".csv" | ".txt":
+            return read_csv(path)
+        case ".xlsx" | ".xlsm":
+            return read_xlsx(path)
+        case suffix:
+            raise IngestError(f"Неподдерживаемый формат файла: {suffix or path.name}")
+
+
+def _text(row: dict[str, Any], column: str) -> str:
+    value = row.get(column)
+    if isinstance(value, datetime):
+        value = value.strftime("%Y-%m-%d %H:%M:%S")
+    elif isinstance(value, date):
+        value = value.strftime("%Y-%m-%d")
+    value = "" if value is None else str(value).strip()
+
+    if not value:
+        raise ValueError(f"пустое поле {column}")
+    if len(value) > TEXT_LIMIT:
+        raise ValueError(f"поле {column} длиннее {TEXT_LIMIT} символов")
+    return value
+
+
+def _int(row: dict[str, Any], column: str) -> int:
+    value = row.get(column)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValueError(f"поле {column} не число: {value!r}")
+
+
+def validate_row(row: dict[str, Any]) -> dict[str, Any]:
+    """
+    Приведение строки файла к начислению accurals
+
+    :raises ValueError: Строка не проходит валидацию
+    """
+    row = {str(key).strip().casefold(): value for key, value in row.items() if key is not None}
+    row = {column: row.get(column.casefold()) for column in COLUMNS}
+
+    return {
+        "ChatId": _int(row, "ChatId"),
+        "FIO": _text(row, "FIO"),
+        "Name": _text(row, "Name"),
+        "TargetKPI": _text(row, "TargetKPI"),
+        "Point": _int(row, "Point"),
+        "Period": _text(row, "Period"),
+        "Date": _text(row, "Date"),
+    }
+
+
+def prepare_batch(rows: list[dict[str, Any]], first_line: int, report: IngestReport) -> list[dict[str, Any]]:
+    """
+    Валидация пакета и удаление повторов ключа (ChatId, Name, Period) внутри пакета.
+    Повторы между пакетами и с уже загруженными данными отсекает БД
+    """
+    batch = {}
+    for line, row in enumerate(rows, start=first_line):
+        try:
+            accrual = validate_row(row)
+        except ValueError as e:
+            report.invalid += 1
+            if len(report.errors) < MAX_REPORTED_ERRORS:
+                report.errors.append(f"строка {line}: {e}")
+            continue
+
+        key = (accrual["ChatId"], accrual["Name"], accrual["Period"])
+        if key in batch:
+            report.duplicates += 1
+        else:
+            batch[key] = accrual
+    return list(batch.values())
+
+
+async def ingest_accruals(path: Path, session_pool, batch_size: int = BATCH_SIZE) -> IngestReport:
+    """
+    Загрузка начислений из CSV/XLSX пакетами по batch_size строк.
+    Файл читается потоково в отдельном потоке, в памяти находится только текущий пакет.
+    Повторная загрузка того же файла ничего не добавляет
+
+    :param path: Путь к файлу
+    :param session_pool: Пул сессий БД AchieverBot, движок лучше создать с fast_executemany=True
+    :param batch_size: Размер пакета
+    :return: Отчёт о загрузке
+    """
+    report = IngestReport()
+    rows = read_rows(path)
+    started = time.perf_counter()
+
+    try:
+        while True:
+            chunk = await asyncio.to_thread(lambda: list(itertools.islice(rows, batch_size)))
+            if not chunk:
+                break
+
+            # Строка 1 - заголовок
+            batch = prepare_batch(chunk, first_line=report.rows + 2, report=report)
+            report.rows += len(chunk)
+
+            if batch:
+                async with session_pool() as session:
+                    inserted = await RequestsRepo(session).accruals.ingest_accruals(batch)
+                report.inserted += inserted
+                report.duplicates += len(batch) - inserted
+
+            report.elapsed = time.perf_counter() - started
+            logger.info("[Загрузка] %s: %s", path.name, report.summary())
+    finally:
+        rows.close()
+        report.elapsed = time.perf_counter() - started
+
+    for error in report.errors:
+        logger.warning("[Загрузка] %s: %s", path.name, error)
+    return report
+
+
+async def main() -> None:
+    from infrastructure.database.setup import create_engine, create_session_pool
+    from tgbot.config import load_config
+    from tgbot.services.logger import setup_logging
+
+    parser = argparse.ArgumentParser(description="Загрузка начислений из CSV/XLSX в accurals")
+    parser.add_argument("path", type=Path, help="Файл CSV или XLSX с колонками " + ", ".join(COLUMNS))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    config = load_config(".env")
+    setup_logging(config.log.level, json_format=config.log.json, sampling=config.log.sampling)
+    engine = create_engine(config.db, db_name=config.db.achiever_db, fast_executemany=True)
+    try:
+        report = await ingest_accruals(args.path, create_session_pool(engine), args.batch_size)
+    finally:
+        await engine.dispose()
+
+    print(f"{args.path.name}: {report.summary()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional
+
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+
+from infrastructure.database.models import User
+from infrastructure.database.models.awards import Awards
+from tgbot.misc.roles import role_names
+
+INLINE_RESULTS_LIMIT = 20
+
+
+class ResultsCache:
+    """
+    LRU кэш готовых ответов на inline-запросы.
+
+    Одинаковые запросы разных пользователей одной роли собираются один раз за ttl секунд.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries: OrderedDict[Hashable, tuple[float, list[InlineQueryResultArticle]]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[list[InlineQueryResultArticle]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, results: list[InlineQueryResultArticle]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def search_awards(awards: Iterable[Awards], query: str, limit: int = INLINE_RESULTS_LIMIT) -> list[Awards]:
+    """
+    Награды с названием, содержащим запрос. Совпадения с начала названия идут первыми
+
+    :param awards: Награды каталога
+    :param query: Текст inline-запроса
+    :param limit: Максимальное количество результатов
+    """
+    query = query.strip().casefold()
+
+    ranked = []
+    for award in awards:
+        if award.Name is None:
+            continue
+        name = award.Name.casefold()
+        if not query:
+            ranked.append((award.Sum, 0, award))
+        elif name.startswith(query):
+            ranked.append((0, award.Sum, award))
+        elif query in name:
+            ranked.append((1, award.Sum, award))
+
+    ranked.sort(key=lambda item: item[:2])
+    return [award for *_, award in ranked[:limit]]
+
+
+def award_results(awards: Iterable[Awards]) -> list[InlineQueryResultArticle]:
+    """
+    Карточки наград для ответа на inline-запрос
+    """
+    return [
+        InlineQueryResultArticle(
+            id=f"award:{award.Id}",
+            title=award.Name,
+            description=f"✨ {award.Sum} баллов · 🧮 {award.Count} активаций",
+            input_message_content=InputTextMessageContent(
+                message_text=f"""<b>👏 {award.Name}</b>
+
+<blockquote expandable><b>✨ Стоимость:</b> {award.Sum} баллов
+<b>📝 Описание:</b> {award.Description}
+<b>🧮 Активаций:</b> {award.Count}</blockquote>""",
+            ),
+        )
+        for award in awards
+    ]
+
+
+def employee_results(users: Iterable[User]) -> list[InlineQueryResultArticle]:
+    """
+    Карточки сотрудников для ответа на inline-запрос
+    """
+    results = []
+    for user in users:
+        role = role_names[user.Role] if user.Role is not None and 0 <= user.Role < len(role_names) else "—"
+        username = f"@{user.Username}" if user.Username else "—"
+
+        results.append(
+            InlineQueryResultArticle(
+                id=f"user:{user.id}",
+                title=user.FIO,
+                description=" · ".join(part for part in (user.Position, user.Division) if part),
+                input_message_content=InputTextMessageContent(
+                    message_text=f"""<b>👤 {user.FIO}</b>
+
+<b>💼 Должность:</b> {user.Position or "—"} {user.Division or ""}
+<b>👑 Руководитель:</b> {user.Boss or "—"}
+<b>🎭 Роль:</b> {role}
+<b>✉️ Telegram:</b> {username}""",
+                ),
+            )
+        )
+    return results
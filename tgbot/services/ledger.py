@@ -0,0 +1,39 @@
+import asyncio
+import logging
+
+from infrastructure.database.repo.requests import RequestsRepo
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile_balances(achiever_session_pool) -> int:
+    """
+    Однократная сверка снимков балансов с таблицами начислений и наград
+
+    :param achiever_session_pool: Пул сессий БД AchieverBot
+    :return: Кол-во исправленных снимков
+    """
+    async with achiever_session_pool() as session:
+        repo = RequestsRepo(session)
+        fixed = await repo.balances.reconcile()
+
+    if fixed:
+        logger.warning("[Баланс] Сверка завершена, исправлено снимков: %s", fixed)
+    else:
+        logger.info("[Баланс] Сверка завершена, расхождений нет")
+    return fixed
+
+
+async def reconcile_balances_job(achiever_session_pool, interval: int) -> None:
+    """
+    Фоновая задача периодической сверки снимков балансов
+
+    :param achiever_session_pool: Пул сессий БД AchieverBot
+    :param interval: Интервал между сверками в секундах
+    """
+    while True:
+        try:
+            await reconcile_balances(achiever_session_pool)
+        except Exception as e:
+            logger.error("[Баланс] Ошибка сверки снимков: %s", e)
+        await asyncio.sleep(interval)
@@ -1,13 +1,141 @@
+import atexit
+import copy
+import datetime
+import json
 import logging
+import queue
+import random
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Union
 
 import betterlogging as bl
 
+# Обновление и пользователь, при обработке которых пишется запись. Заполняет LogContextMiddleware
+update_id_var: ContextVar[Optional[int]] = ContextVar("log_update_id", default=None)
+user_id_var: ContextVar[Optional[int]] = ContextVar("log_user_id", default=None)
 
-def setup_logging():
-    log_level = logging.INFO
-    bl.basic_colorized_config(level=log_level)
+# Категория частых событий для выборки, например logger.info(..., extra=MENU_EVENT)
+MENU_EVENT = {"category": "menu"}
 
-    logging.basicConfig(
-        level=log_level,
-        format="%(filename)s:%(lineno)d #%(levelname)-8s [%(asctime)s] - %(name)s - %(message)s",
-    )
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class ContextFilter(logging.Filter):
+    """
+    Добавляет к записи id обновления и пользователя из контекста обработки
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.update_id = update_id_var.get()
+        record.user_id = user_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Оставляет долю записей уровня INFO и ниже по категории (extra={"category": ...}) или имени логгера.
+    Предупреждения и ошибки проходят всегда
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "category", record.name), 1.0)
+        return rate >= 1 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Запись одной строкой JSON
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "source": f"{record.module}:{record.lineno}",
+        }
+        for key in ("update_id", "user_id", "category"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    В потоке события подставляет только аргументы сообщения,
+    трейсбек, цвета и JSON формирует поток слушателя
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+def setup_logging(
+    level: Union[int, str] = logging.INFO,
+    json_format: bool = False,
+    sampling: Optional[dict[str, float]] = None,
+) -> None:
+    """
+    Настройка логов процесса. Выполняется один раз, повторные вызовы ничего не меняют.
+
+    Записи попадают в очередь, а в поток вывода их пишет отдельный поток QueueListener,
+    поэтому хендлеры не ждут вывода
+
+    :param level: Уровень корневого логгера
+    :param json_format: Писать JSON вместо цветного текста
+    :param sampling: Доля оставляемых записей по категории или имени логгера, например {"menu": 0.1}
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if json_format else bl.ColorizedFormatter())
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    if sampling:
+        _queue_handler.addFilter(SamplingFilter(sampling))
+    _queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """
+    Вывод оставшихся в очереди записей и остановка потока слушателя
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    _listener = None
+    _queue_handler = None
@@ -1,26 +1,315 @@
+import asyncio
 import logging
 import smtplib
+import socket
 import ssl
+import time
+from dataclasses import dataclass, field
 from email.header import Header
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from typing import Callable, Optional
 
 from infrastructure.database.models import User
 from infrastructure.database.models.awards import Awards
 from infrastructure.database.models.executes import Execute
-from tgbot.config import load_config
-from tgbot.services.logger import setup_logging
+from tgbot.config import Email, load_config
 
 config = load_config(".env")
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
+# Обрыв соединения: письмо сразу повторяется на новом соединении.
+# Остальные ошибки SMTP (отказ получателя, ошибка данных) соединение не рвут
+RECONNECT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    socket.timeout,
+)
+
+
+@dataclass
+class OutgoingEmail:
+    """
+    Письмо, ожидающее отправки в очереди
+
+    Attributes:
+        to_addrs: Список адресов для отправки письма
+        subject: Заголовок письма
+        body: Тело письма
+        html: Использовать ли HTML для форматирования
+        enqueued_at: Момент постановки письма в очередь (time.monotonic)
+        attempts: Кол-во совершённых попыток отправки
+    """
+
+    to_addrs: list[str]
+    subject: str
+    body: str
+    html: bool = True
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+@dataclass
+class OutboxStats:
+    """
+    Счётчики очереди писем
+
+    Attributes:
+        sent: Кол-во отправленных писем
+        failed: Кол-во писем, отброшенных после всех попыток
+        reconnects: Кол-во переподключений к SMTP серверу
+        batches: Кол-во отправленных пачек
+        last_latency: Время от постановки в очередь до отправки последнего письма (сек)
+        total_latency: Суммарное время от постановки в очередь до отправки (сек)
+        max_latency: Максимальное время от постановки в очередь до отправки (сек)
+    """
+
+    sent: int = 0
+    failed: int = 0
+    reconnects: int = 0
+    batches: int = 0
+    last_latency: float = 0.0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.sent if self.sent else 0.0
+
+
+class EmailOutbox:
+    """
+    Неблокирующая очередь исходящих писем.
+
+    Письма ставятся в очередь без ожидания SMTP сервера, а фоновый воркер
+    держит одно авторизованное соединение, отправляет письма пачками
+    в отдельном потоке и переподключается при обрыве.
+    """
+
+    def __init__(
+        self,
+        email: Email,
+        batch_size: int = 20,
+        max_attempts: int = 3,
+        keepalive: float = 60.0,
+    ) -> None:
+        self.email = email
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.keepalive = keepalive
+        self.stats = OutboxStats()
+        # Получатели времени от постановки в очередь до отправки письма, вызываются в потоке отправки
+        self.latency_observers: list[Callable[[float], None]] = []
+
+        self._queue: Optional[asyncio.Queue[OutgoingEmail]] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Кол-во писем, ожидающих отправки
+        """
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self) -> None:
+        """
+        Запуск фонового воркера очереди
+        """
+        if self._worker and not self._worker.done():
+            return
+
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        logger.info("[Email] Очередь писем запущена")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Остановка воркера с попыткой дослать накопившиеся письма
+
+        :param timeout: Максимальное время ожидания отправки очереди (сек)
+        """
+        if self._queue is not None and self._worker and not self._worker.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "[Email] Очередь не отправлена при остановке, осталось писем: %s",
+                    self.queue_depth,
+                )
+
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        await asyncio.to_thread(self._disconnect)
+        logger.info("[Email] Очередь писем остановлена")
+
+    def enqueue(self, message: OutgoingEmail) -> None:
+        """
+        Постановка письма в очередь без ожидания отправки
+
+        :param message: Письмо для отправки
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._queue.put_nowait(message)
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                retry = await asyncio.to_thread(self._send_batch, batch)
+            except Exception as e:
+                logger.error("[Email] Ошибка воркера очереди писем: %s", e)
+                retry = []
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            for message in retry:
+                self._queue.put_nowait(message)
+            if retry:
+                # Даём серверу время прийти в себя перед повторной попыткой
+                await asyncio.sleep(min(2 ** retry[0].attempts, 30))
+
+    def _send_batch(self, batch: list[OutgoingEmail]) -> list[OutgoingEmail]:
+        """
+        Отправка пачки писем через общее соединение. Выполняется в отдельном потоке
+
+        :return: Письма, которые нужно повторить позже
+        """
+        retry: list[OutgoingEmail] = []
+        self.stats.batches += 1
+
+        for message in batch:
+            message.attempts += 1
+            try:
+                self._deliver(message)
+            except RECONNECT_ERRORS as e:
+                # Соединение оборвалось - пробуем ещё раз на свежем соединении
+                logger.warning("[Email] Соединение с SMTP сервером потеряно: %s", e)
+                self._disconnect()
+                message.attempts += 1
+                try:
+                    self._deliver(message)
+                except smtplib.SMTPException as e:
+                    self._handle_failure(message, e, retry)
+                except OSError as e:
+                    self._disconnect()
+                    self._handle_failure(message, e, retry)
+            except smtplib.SMTPException as e:
+                # SMTPException - подкласс OSError, поэтому обрабатывается раньше него
+                self._handle_failure(message, e, retry)
+            except OSError as e:
+                # Прочие сетевые ошибки (SSL, DNS): соединение ненадёжно, следующее письмо откроет новое
+                self._disconnect()
+                self._handle_failure(message, e, retry)
+
+        return retry
+
+    def _deliver(self, message: OutgoingEmail) -> None:
+        server = self._connection()
+
+        msg = MIMEMultipart()
+        msg["From"] = self.email.user
+        msg["To"] = ", ".join(message.to_addrs)  # Join list into comma-separated string
+        msg["Subject"] = Header(message.subject, "utf-8")
+
+        content_type = "html" if message.html else "plain"
+        msg.attach(MIMEText(message.body, content_type, "utf-8"))
+
+        server.sendmail(
+            from_addr=self.email.user, to_addrs=message.to_addrs, msg=msg.as_string()
+        )
+        self._last_used = time.monotonic()
+
+        latency = self._last_used - message.enqueued_at
+        self.stats.sent += 1
+        self.stats.last_latency = latency
+        self.stats.total_latency += latency
+        self.stats.max_latency = max(self.stats.max_latency, latency)
+        for observer in self.latency_observers:
+            observer(latency)
+        logger.info("[Email] Письмо успешно отправлено за %.2f сек", latency)
+
+    def _handle_failure(
+        self, message: OutgoingEmail, error: Exception, retry: list[OutgoingEmail]
+    ) -> None:
+        if message.attempts < self.max_attempts:
+            logger.warning(
+                "[Email] Ошибка отправки письма, попытка %s/%s: %s",
+                message.attempts,
+                self.max_attempts,
+                error,
+            )
+            retry.append(message)
+        else:
+            self.stats.failed += 1
+            logger.error("[Email] Ошибка отправки письма: %s", error)
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._server is not None and time.monotonic() - self._last_used > self.keepalive:
+            # Соединение простаивало - проверяем, что сервер его не закрыл
+            try:
+                self._server.noop()
+            except (smtplib.SMTPException, OSError):
+                self._disconnect()
+
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def _connect(self) -> smtplib.SMTP:
+        context = ssl.create_default_context()
+
+        if self.email.use_ssl:
+            server = smtplib.SMTP_SSL(
+                host=self.email.host, port=self.email.port, context=context
+            )
+        else:
+            server = smtplib.SMTP(host=self.email.host, port=self.email.port)
+            server.ehlo()
+            if server.has_extn("starttls"):
+                server.starttls(context=context)
+                server.ehlo()
+
+        if self.email.password:
+            server.login(user=self.email.user, password=self.email.password)
+
+        self.stats.reconnects += 1
+        self._last_used = time.monotonic()
+        logger.info("[Email] Установлено соединение с SMTP сервером")
+        return server
+
+    def _disconnect(self) -> None:
+        if self._server is None:
+            return
+
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+outbox = EmailOutbox(config.email)
+
 
-# TODO Добавить логирование отправки Email
 async def send_email(to_addrs: list[str], subject: str, body: str, html: bool = True):
     """
-    Отправка email
+    Постановка email в очередь на отправку
 
     Args:
         to_addrs: Список адресов для отправки письма
@@ -28,27 +317,10 @@ async def send_email(to_addrs: list[str], subject: str, body: str, html: bool =
         body: Тело письма
         html: Использовать ли HTML для форматирования
     """
-    context = ssl.create_default_context()
-
-    msg = MIMEMultipart()
-    msg["From"] = config.email.user
-    msg["To"] = ", ".join(to_addrs)  # Join list into comma-separated string
-    msg["Subject"] = Header(subject, "utf-8")
-
-    content_type = "html" if html else "plain"
-    msg.attach(MIMEText(body, content_type, "utf-8"))
-
-    try:
-        with smtplib.SMTP_SSL(
-            host=config.email.host, port=config.email.port, context=context
-        ) as server:
-            server.login(user=config.email.user, password=config.email.password)
-            server.sendmail(
-                from_addr=config.email.user, to_addrs=to_addrs, msg=msg.as_string()
-            )
-            logger.info("[Email] Письмо успешно отправлено")
-    except smtplib.SMTPException as e:
-        logger.error(f"[Email] Ошибка отправки письма: {e}")
+    outbox.enqueue(
+        OutgoingEmail(to_addrs=to_addrs, subject=subject, body=body, html=html)
+    )
+    logger.info("[Email] Письмо поставлено в очередь, писем в очереди: %s", outbox.queue_depth)
 
 
 async def new_award_email(execute: Execute, award: Awards, user: User, boss: User):
@@ -68,7 +340,7 @@ async def new_award_email(execute: Execute, award: Awards, user: User, boss: Use
     match execute.Executing % 7:
         case 3:
             if user.Division == "НЦК":
-                interaction = execute.Executing % 7
+                interaction = "НЦК"
             else:
                 interaction = "НТП1" if "первой" in user.Position else "НТП2"
         case 4:
@@ -80,13 +352,12 @@ async def new_award_email(execute: Execute, award: Awards, user: User, boss: Use
         case _:
             interaction = "Неизвестно"
 
-    # TODO добавить проверку на направление специалиста вместо конфига
+    # Адрес направления специалиста
     if interaction in ["НЦК", "НТП1", "НТП2"]:
-        match config.tg_bot.division:
-            case "NCK":
-                to_addrs.append(config.email.nck_email_addr)
-            case "NTP":
-                to_addrs.append(config.email.ntp_email_addr)
+        if user.Division == "НЦК":
+            to_addrs.append(config.email.nck_email_addr)
+        else:
+            to_addrs.append(config.email.ntp_email_addr)
 
     if user.Email != "Не указан email":
         to_addrs.append(user.Email)
@@ -0,0 +1,291 @@
+import time
+from typing import TYPE_CHECKING, Optional
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from infrastructure.database.pool import pool_state
+from infrastructure.database.timeouts import timeout_observers
+
+if TYPE_CHECKING:
+    from tgbot.services.mailing import EmailOutbox
+
+# Границы гистограмм: запросы БД и Telegram обычно укладываются в миллисекунды, обновления - в секунды
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+UPDATES = Counter(
+    "bot_updates_total",
+    "Обработанные обновления по типу и результату",
+    ["event_type", "status"],
+)
+UPDATE_DURATION = Histogram(
+    "bot_update_duration_seconds",
+    "Время обработки обновления целиком",
+    ["event_type"],
+    buckets=REQUEST_BUCKETS,
+)
+HANDLER_DURATION = Histogram(
+    "bot_handler_duration_seconds",
+    "Время работы хендлера с подготовкой зависимостей",
+    ["router", "handler"],
+    buckets=REQUEST_BUCKETS,
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total",
+    "Исключения в хендлерах",
+    ["router", "handler", "error"],
+)
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения запроса к БД",
+    ["engine", "statement"],
+    buckets=DB_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total",
+    "Ошибки запросов к БД",
+    ["engine", "error"],
+)
+DB_QUERY_TIMEOUTS = Counter(
+    "db_query_timeouts_total",
+    "Методы репозиториев, прерванные по таймауту с отменой запроса",
+    ["method"],
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Время ожидания свободного соединения в пуле",
+    ["engine"],
+    buckets=DB_BUCKETS,
+)
+DB_CONNECTION_HELD = Histogram(
+    "db_connection_held_seconds",
+    "Время от выдачи соединения из пула до возврата",
+    ["engine"],
+    buckets=REQUEST_BUCKETS,
+)
+DB_DRIVER_QUEUE_WAIT = Histogram(
+    "db_driver_queue_wait_seconds",
+    "Время ожидания свободного потока драйвера",
+    ["engine"],
+    buckets=DB_BUCKETS,
+)
+DB_DRIVER_CALL_DURATION = Histogram(
+    "db_driver_call_seconds",
+    "Время блокирующего вызова драйвера в потоке",
+    ["engine"],
+    buckets=DB_BUCKETS,
+)
+DB_CONNECTIONS_CHECKED_OUT = Gauge(
+    "db_connections_checked_out",
+    "Выданные из пула соединения",
+    ["engine"],
+)
+
+
+class PoolCollector:
+    """
+    Состояние пулов соединений, снимаемое в момент запроса метрик
+    """
+
+    def __init__(self) -> None:
+        self.engines: dict[str, AsyncEngine] = {}
+
+    def collect(self):
+        size = GaugeMetricFamily("db_pool_size", "Постоянный размер пула", labels=["engine"])
+        max_overflow = GaugeMetricFamily(
+            "db_pool_max_overflow", "Сколько соединений можно открыть сверх размера пула", labels=["engine"]
+        )
+        idle = GaugeMetricFamily("db_pool_idle_connections", "Свободные соединения в пуле", labels=["engine"])
+        overflow = GaugeMetricFamily(
+            "db_pool_overflow_connections", "Открытые сверх размера пула соединения", labels=["engine"]
+        )
+        timeouts = CounterMetricFamily(
+            "db_pool_timeouts", "Запросы соединения, не дождавшиеся свободного", labels=["engine"]
+        )
+        liveness_checks = CounterMetricFamily(
+            "db_pool_liveness_checks", "Проверки простаивающих соединений", labels=["engine"]
+        )
+        liveness_failures = CounterMetricFamily(
+            "db_pool_liveness_failures", "Проверки, нашедшие разорванное соединение", labels=["engine"]
+        )
+        driver_threads = GaugeMetricFamily("db_driver_threads", "Потоки драйвера движка", labels=["engine"])
+        driver_busy = GaugeMetricFamily(
+            "db_driver_threads_busy", "Потоки, занятые вызовом драйвера", labels=["engine"]
+        )
+        driver_queued = GaugeMetricFamily(
+            "db_driver_calls_queued", "Вызовы драйвера, ждущие свободного потока", labels=["engine"]
+        )
+
+        for name, engine in self.engines.items():
+            state = pool_state(engine)
+            size.add_metric([name], state.size)
+            max_overflow.add_metric([name], state.max_overflow)
+            idle.add_metric([name], state.idle)
+            overflow.add_metric([name], state.overflow)
+            if state.stats is not None:
+                timeouts.add_metric([name], state.stats.timeouts)
+                liveness_checks.add_metric([name], state.stats.liveness_checks)
+                liveness_failures.add_metric([name], state.stats.liveness_failures)
+            if state.driver is not None:
+                driver_threads.add_metric([name], state.threads)
+                driver_busy.add_metric([name], state.driver.busy)
+                driver_queued.add_metric([name], state.driver.queued)
+
+        yield from (size, max_overflow, idle, overflow, timeouts, liveness_checks, liveness_failures)
+        yield from (driver_threads, driver_busy, driver_queued)
+
+
+POOLS = PoolCollector()
+REGISTRY.register(POOLS)
+
+TELEGRAM_REQUEST_DURATION = Histogram(
+    "telegram_api_request_duration_seconds",
+    "Время запроса к Telegram Bot API",
+    ["method"],
+    buckets=REQUEST_BUCKETS,
+)
+TELEGRAM_REQUEST_ERRORS = Counter(
+    "telegram_api_request_errors_total",
+    "Ошибки запросов к Telegram Bot API",
+    ["method", "error"],
+)
+
+EMAIL_SEND_LATENCY = Histogram(
+    "email_send_latency_seconds",
+    "Время от постановки письма в очередь до отправки",
+    buckets=REQUEST_BUCKETS,
+)
+
+
+class OutboxCollector:
+    """
+    Состояние очереди писем, снимаемое в момент запроса метрик
+    """
+
+    def __init__(self) -> None:
+        self.outbox: Optional["EmailOutbox"] = None
+
+    def collect(self):
+        if self.outbox is None:
+            return
+
+        stats = self.outbox.stats
+        depth = GaugeMetricFamily("email_outbox_queue_depth", "Письма, ожидающие отправки")
+        depth.add_metric([], self.outbox.queue_depth)
+        sent = CounterMetricFamily("email_sent", "Отправленные письма")
+        sent.add_metric([], stats.sent)
+        failed = CounterMetricFamily("email_failed", "Письма, отброшенные после всех попыток")
+        failed.add_metric([], stats.failed)
+        reconnects = CounterMetricFamily("email_smtp_reconnects", "Подключения к SMTP серверу")
+        reconnects.add_metric([], stats.reconnects)
+
+        yield from (depth, sent, failed, reconnects)
+
+
+OUTBOX = OutboxCollector()
+REGISTRY.register(OUTBOX)
+
+
+def statement_kind(statement: str) -> str:
+    """
+    Тип запроса по первому слову, чтобы не плодить метки на каждый текст запроса
+    """
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def instrument_engine(name: str, engine: AsyncEngine) -> None:
+    """
+    Подключение метрик запросов и пула соединений к движку
+
+    :param name: Название движка в метках
+    :param engine: Асинхронный движок SQLAlchemy
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        DB_QUERY_DURATION.labels(name, statement_kind(statement)).observe(time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+        DB_QUERY_ERRORS.labels(name, type(exception_context.original_exception).__name__).inc()
+
+    @event.listens_for(sync_engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        DB_CONNECTIONS_CHECKED_OUT.labels(name).inc()
+
+    @event.listens_for(sync_engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            DB_CONNECTION_HELD.labels(name).observe(time.perf_counter() - checked_out_at)
+            DB_CONNECTIONS_CHECKED_OUT.labels(name).dec()
+
+    POOLS.engines[name] = engine
+
+    # Время ожидания соединения меряет сам пул, события на это у SQLAlchemy нет
+    wait_observers = getattr(sync_engine.pool, "wait_observers", None)
+    if wait_observers is not None:
+        wait_observers.append(DB_POOL_WAIT.labels(name).observe)
+
+    # Ожидание потока против работы драйвера: медленный MSSQL или нехватка потоков в боте
+    executor = getattr(sync_engine.pool, "executor", None)
+    if executor is not None:
+        queue_wait = DB_DRIVER_QUEUE_WAIT.labels(name)
+        driver_call = DB_DRIVER_CALL_DURATION.labels(name)
+
+        def observe_driver_call(wait: float, call: float) -> None:
+            queue_wait.observe(wait)
+            driver_call.observe(call)
+
+        executor.observers.append(observe_driver_call)
+
+
+def instrument_query_timeouts() -> None:
+    """
+    Подключение счётчика таймаутов методов репозиториев
+    """
+    timeout_observers.append(lambda method: DB_QUERY_TIMEOUTS.labels(method).inc())
+
+
+def instrument_email_outbox(outbox: "EmailOutbox") -> None:
+    """
+    Подключение метрик очереди писем: глубина очереди, счётчики и время до отправки
+    """
+    OUTBOX.outbox = outbox
+    outbox.latency_observers.append(EMAIL_SEND_LATENCY.observe)
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """
+    Выдача метрик в текстовом формате Prometheus
+    """
+    response = web.Response(body=generate_latest())
+    response.content_type = CONTENT_TYPE_LATEST.split(";")[0]
+    response.charset = "utf-8"
+    return response
+
+
+def setup_metrics_route(app: web.Application, path: str) -> None:
+    """
+    Регистрация эндпоинта метрик в приложении aiohttp
+
+    :param app: Приложение aiohttp, например приложение вебхука
+    :param path: Путь эндпоинта
+    """
+    app.router.add_get(path, metrics_handler)
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+UPDATE_QUEUE_KEY = "achiever:updates:{shard}"
+# Обновления, взятые воркером шарда в обработку, но ещё не обработанные
+PROCESSING_KEY = "achiever:updates:{shard}:processing"
+
+# Типы обновлений, в которых есть отправитель
+USER_UPDATE_TYPES = (
+    "message",
+    "edited_message",
+    "callback_query",
+    "inline_query",
+    "chosen_inline_result",
+    "chat_member",
+    "my_chat_member",
+    "pre_checkout_query",
+    "shipping_query",
+)
+
+
+def update_user_id(update: dict[str, Any]) -> Optional[int]:
+    """
+    Получение идентификатора отправителя из сырого обновления Telegram
+
+    :param update: Обновление в виде словаря
+    :return: Идентификатор пользователя или None, если отправителя нет
+    """
+    for update_type in USER_UPDATE_TYPES:
+        event = update.get(update_type)
+        if event and event.get("from"):
+            return event["from"]["id"]
+    return None
+
+
+def shard_for_update(update: dict[str, Any], shards: int) -> int:
+    """
+    Номер шарда для обновления. Все обновления одного пользователя попадают в один шард
+
+    :param update: Обновление в виде словаря
+    :param shards: Кол-во шардов (воркеров)
+    :return: Номер шарда
+    """
+    user_id = update_user_id(update)
+    if user_id is None:
+        return update.get("update_id", 0) % shards
+    return user_id % shards
+
+
+class UpdateGateway:
+    """
+    Приём обновлений на вебхуке и распределение их по очередям воркеров в Redis
+    """
+
+    def __init__(self, redis: Redis, shards: int, secret_token: Optional[str] = None) -> None:
+        self.redis = redis
+        self.shards = shards
+        self.secret_token = secret_token
+
+    async def route(self, update: dict[str, Any]) -> int:
+        """
+        Постановка обновления в очередь шарда
+
+        :param update: Обновление в виде словаря
+        :return: Номер шарда
+        """
+        shard = shard_for_update(update, self.shards)
+        await self.redis.rpush(UPDATE_QUEUE_KEY.format(shard=shard), json.dumps(update))
+        return shard
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Обработчик запросов Telegram на вебхук
+        """
+        if self.secret_token and (
+            request.headers.get("X-Telegram-Bot-Api-Secret-Token") != self.secret_token
+        ):
+            return web.Response(status=401, text="Unauthorized")
+
+        await self.route(await request.json())
+        return web.Response()
+
+    def register(self, app: web.Application, path: str) -> None:
+        app.router.add_post(path, self.handle)
+
+
+class UpdateWorker:
+    """
+    Воркер, обрабатывающий обновления своего шарда.
+
+    Обновления разных пользователей обрабатываются конкурентно,
+    обновления одного пользователя - строго по очереди.
+
+    Обновление переносится из очереди в список обработки шарда (BLMOVE, Redis 6.2+) и удаляется
+    из него только после обработки. Обновления, оставшиеся в списке после падения воркера,
+    возвращаются в начало очереди при его запуске, поэтому у шарда должен быть один воркер.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        dp: Dispatcher,
+        redis: Redis,
+        shard: int,
+        concurrency: int = 64,
+    ) -> None:
+        self.bot = bot
+        self.dp = dp
+        self.redis = redis
+        self.shard = shard
+        self.processed = 0
+
+        self._processing_key = PROCESSING_KEY.format(shard=shard)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._user_tails: dict[int, asyncio.Task] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        """
+        Основной цикл воркера: забирает обновления из очереди шарда и передает их в диспетчер
+        """
+        key = UPDATE_QUEUE_KEY.format(shard=self.shard)
+        await self._requeue_unfinished(key)
+        logger.info("[Воркер] Шард %s запущен, очередь %s", self.shard, key)
+
+        await self.dp.emit_startup(bot=self.bot, dispatcher=self.dp)
+        try:
+            while True:
+                await self._slots.acquire()
+                raw = await self.redis.blmove(key, self._processing_key, timeout=5, src="LEFT", dest="RIGHT")
+                if raw is None:
+                    self._slots.release()
+                    continue
+
+                self._schedule(raw)
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self.dp.emit_shutdown(bot=self.bot, dispatcher=self.dp)
+
+    async def _requeue_unfinished(self, key: str) -> None:
+        # Справа - самые поздние, поэтому перенос справа налево сохраняет порядок обновлений
+        requeued = 0
+        while await self.redis.lmove(self._processing_key, key, src="RIGHT", dest="LEFT") is not None:
+            requeued += 1
+        if requeued:
+            logger.warning("[Воркер] Шард %s: возвращено в очередь необработанных обновлений: %s", self.shard, requeued)
+
+    def _schedule(self, raw: bytes) -> None:
+        update = json.loads(raw)
+        user_id = update_user_id(update)
+        previous = self._user_tails.get(user_id) if user_id is not None else None
+
+        task = asyncio.create_task(self._process(raw, update, previous))
+        self._tasks.add(task)
+        if user_id is not None:
+            self._user_tails[user_id] = task
+
+        def _done(t: asyncio.Task) -> None:
+            self._tasks.discard(t)
+            self._slots.release()
+            if user_id is not None and self._user_tails.get(user_id) is t:
+                del self._user_tails[user_id]
+
+        task.add_done_callback(_done)
+
+    async def _process(self, raw: bytes, update: dict[str, Any], previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            # Дожидаемся предыдущего обновления этого же пользователя
+            await asyncio.wait([previous])
+
+        try:
+            await self.dp.feed_raw_update(self.bot, update)
+        except Exception as e:
+            logger.error("[Воркер] Ошибка обработки обновления %s: %s", update.get('update_id'), e)
+        # Обновление с ошибкой тоже снимается: повтор упал бы так же
+        await self.redis.lrem(self._processing_key, 1, raw)
+        self.processed += 1